@@ -0,0 +1,106 @@
+"""Check cold start against a time budget.
+
+Measures the `-X importtime` cost of the entry modules, the wall time of a
+headless subcommand until the process exits and the time until the first
+calender frame is drawn (inside a pseudo terminal). Exits with status 1 when
+any median is over its budget, so it can run in CI.
+
+    python benchmarks/bench_importtime.py --runs 10 --import-budget-ms 60
+"""
+import argparse
+import os
+import pty
+import select
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from harness import SRC_DIR
+
+MAIN = os.path.join(SRC_DIR, "main.py")
+
+
+def _env() -> dict[str, str]:
+    return dict(os.environ, PYTHONPATH=SRC_DIR, TERM="xterm-256color")
+
+
+def import_time_ms(module: str) -> float:
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                             f"import {module}"], env=_env(),
+                            capture_output=True, text=True, check=True)
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        _, cumulative, name = line.split("|")
+        if name.rstrip() == f" {module}":
+            return int(cumulative) / 1000
+    raise RuntimeError(f"{module} missing from -X importtime output")
+
+
+def subcommand_exit_ms(cwd: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, MAIN, "task", "add", "--date",
+                    "2025-01-17 12:00", "budget"], cwd=cwd, env=_env(),
+                   check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def first_frame_ms(cwd: str, timeout: float = 10.0) -> float:
+    start = time.perf_counter()
+    pid, fd = pty.fork()
+    if pid == 0:  # pragma: no cover - child process
+        os.chdir(cwd)
+        os.execve(sys.executable, [sys.executable, MAIN], _env())
+    output = b""
+    try:
+        while b"Tasks:" not in output:
+            if time.perf_counter() - start > timeout:
+                raise RuntimeError("calender did not draw a frame in time")
+            ready, _, _ = select.select([fd], [], [], 0.01)
+            if ready:
+                output += os.read(fd, 65536)
+        return (time.perf_counter() - start) * 1000
+    finally:
+        os.write(fd, b"\x03")
+        os.waitpid(pid, 0)
+        os.close(fd)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--import-budget-ms", type=float, default=100.0,
+                        help="Budget for `import main`.")
+    parser.add_argument("--ui-import-budget-ms", type=float, default=150.0,
+                        help="Budget for `import CliCalendar`.")
+    parser.add_argument("--exit-budget-ms", type=float, default=300.0,
+                        help="Budget for `task add` until the process exits.")
+    parser.add_argument("--frame-budget-ms", type=float, default=500.0,
+                        help="Budget for launch until the first frame.")
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory() as cwd:
+        checks = [
+            ("import main", args.import_budget_ms,
+             lambda: import_time_ms("main")),
+            ("import CliCalendar", args.ui_import_budget_ms,
+             lambda: import_time_ms("CliCalendar")),
+            ("task add until exit", args.exit_budget_ms,
+             lambda: subcommand_exit_ms(cwd)),
+            ("launch until first frame", args.frame_budget_ms,
+             lambda: first_frame_ms(cwd)),
+        ]
+        failed = False
+        for name, budget, fn in checks:
+            fn()  # warm up the page cache
+            median = statistics.median(fn() for _ in range(args.runs))
+            ok = median <= budget
+            failed |= not ok
+            print(f"{name:<26} median {median:8.1f} ms  budget "
+                  f"{budget:8.1f} ms  {'ok' if ok else 'OVER BUDGET'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+import io
+import os
+import random
+import time
+from datetime import datetime
+from datetime import timedelta
+
+from harness import measure
+from harness import Results
+from harness import summarize
+from TaskRepository import TaskRepository
+
+FIRST_DAY = datetime(2000, 1, 1)
+# One task every seven minutes, a million rows cover a bit over 13 years.
+SPACING = timedelta(minutes=7)
+
+
+def populate(db_path: str, rows: int) -> tuple[TaskRepository, float]:
+    repo = TaskRepository(db_path)
+    repo.init_db()
+    start = time.perf_counter()
+    repo.add_tasks(((FIRST_DAY + i * SPACING).isoformat(" "), f"task {i}")
+                   for i in range(rows))
+    return repo, time.perf_counter() - start
+
+
+def run(results: Results, workdir: str, sizes: list[int], runs: int) -> None:
+    # Imported here, src is only on the path once harness is loaded.
+    import agenda
+    rnd = random.Random(0)
+    for size in sizes:
+        db_path = os.path.join(workdir, f"repo_{size}.db")
+        repo, elapsed = populate(db_path, size)
+        results.add(f"repository/{size}/bulk_insert_per_row",
+                    summarize([elapsed / size]))
+        span_days = max(1, (size * SPACING).days)
+
+        def random_day() -> datetime:
+            return FIRST_DAY + timedelta(days=rnd.randrange(span_days))
+
+        results.add(f"repository/{size}/tasks_for_day",
+                    measure(lambda: repo.tasks_for_day(random_day()), runs))
+
+        def month_range() -> None:
+            day = random_day()
+            start = day.replace(day=1).isoformat(" ")
+            end = (day.replace(day=28) + timedelta(days=4)).isoformat(" ")
+            for _ in repo.iter_tasks(start, end):
+                pass
+
+        results.add(f"repository/{size}/month_range",
+                    measure(month_range, runs))
+
+        last_day = (FIRST_DAY + size * SPACING).isoformat(" ")
+        repo.add_recurrence(FIRST_DAY.isoformat(" "), "standup",
+                            "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR")
+
+        def agenda_year() -> None:
+            day = random_day()
+            agenda.write_agenda(io.StringIO(), agenda.iter_agenda(
+                repo, day.isoformat(" "),
+                (day + timedelta(days=365)).isoformat(" ")), "text")
+
+        results.add(f"repository/{size}/agenda_year", measure(agenda_year,
+                                                              runs))
+        # The whole table, the first row has to arrive without the rest
+        # being read.
+        results.add(f"repository/{size}/agenda_first_row",
+                    measure(lambda: next(agenda.iter_agenda(
+                        repo, FIRST_DAY.isoformat(" "), last_day)), runs))
+
+        # Every description is "task <n>": "task" matches every row, a
+        # number matches exactly one.
+        results.add(f"repository/{size}/search_page_every_row_matches",
+                    measure(lambda: list(repo.search("task", limit=50)),
+                            runs))
+        results.add(f"repository/{size}/search_single_match",
+                    measure(lambda: list(repo.search(
+                        str(rnd.randrange(size)), limit=50)), runs))
+        results.add(f"repository/{size}/search_next_matching_day",
+                    measure(lambda: list(repo.search(
+                        "task", start=random_day().isoformat(" "), limit=1)),
+                            runs))
+
+        def add_one() -> None:
+            repo.add_task(random_day().isoformat(" "), "benchmark")
+
+        results.add(f"repository/{size}/add_task", measure(add_one, runs))
+
+        ids: list[int] = []
+
+        def add_victim() -> None:
+            ids.append(repo.add_task(random_day().isoformat(" "), "victim"))
+
+        results.add(f"repository/{size}/delete_task_by_id",
+                    measure(lambda: repo.delete_task_by_id(ids.pop()), runs,
+                            setup=add_victim))
+
+        # What an idle calender pays every second to notice other writers.
+        repo.watch()
+        results.add(f"repository/{size}/poll_changes_idle",
+                    measure(repo.poll_changes, runs))
+        repo.close()
+
+        # --snapshot: the same lookups against an in-memory copy, next to
+        # the cost of taking the copy.
+        def open_snapshot() -> None:
+            with TaskRepository(db_path, snapshot=True) as copy:
+                copy.tasks_for_day(FIRST_DAY)
+
+        results.add(f"repository/{size}/snapshot_open",
+                    measure(open_snapshot, max(1, runs // 10)))
+        with TaskRepository(db_path, snapshot=True) as snapshot:
+            results.add(f"repository/{size}/snapshot_tasks_for_day",
+                        measure(lambda: snapshot.tasks_for_day(random_day()),
+                                runs))
+
+            def snapshot_month() -> None:
+                day = random_day()
+                snapshot.entries(
+                    day.replace(day=1).isoformat(" "),
+                    (day.replace(day=28) + timedelta(days=4)).isoformat(" "))
+
+            results.add(f"repository/{size}/snapshot_month_entries",
+                        measure(snapshot_month, runs))
+        with TaskRepository(db_path) as plain:
+
+            def plain_month() -> None:
+                day = random_day()
+                plain.entries(
+                    day.replace(day=1).isoformat(" "),
+                    (day.replace(day=28) + timedelta(days=4)).isoformat(" "))
+
+            results.add(f"repository/{size}/month_entries",
+                        measure(plain_month, runs))
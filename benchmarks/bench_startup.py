@@ -0,0 +1,104 @@
+"""Compare process startup of `task add` through curses, headless and
+through a running `cli_calender daemon`.
+
+The curses path is driven inside a pseudo terminal so it pays the same
+terminal init and colour setup a real invocation does.
+
+    python benchmarks/bench_startup.py --runs 30
+"""
+import argparse
+import os
+import pty
+import subprocess
+import sys
+import tempfile
+import time
+
+from harness import Results
+from harness import SRC_DIR
+from harness import summarize
+
+TASK_ARGV = ["task", "add", "--date", "2025-01-17 12:00", "benchmark"]
+
+HEADLESS = (
+    "import main\n"
+    f"main.main_entry({TASK_ARGV!r})\n"
+)
+
+# The thin client the cli_calender script runs, answered by a daemon.
+THROUGH_DAEMON = (
+    "import client\n"
+    f"client.main_entry({TASK_ARGV!r})\n"
+)
+
+# What every `task add` did before the headless dispatch existed.
+THROUGH_CURSES = (
+    "import curses\n"
+    "import main\n"
+    "from ArgParser import get_args\n"
+    "try:\n"
+    f"    curses.wrapper(main.main, get_args({TASK_ARGV!r}))\n"
+    "except SystemExit:\n"
+    "    pass\n"
+)
+
+
+def _run_once(code: str, cwd: str) -> float:
+    env = dict(os.environ, PYTHONPATH=SRC_DIR, TERM="xterm-256color")
+    master, slave = pty.openpty()
+    try:
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env,
+                       stdin=slave, stdout=slave, stderr=slave, check=True)
+        elapsed = time.perf_counter() - start
+    finally:
+        os.close(slave)
+        os.close(master)
+    return elapsed
+
+
+def measure(code: str, runs: int, daemon: bool = False) -> list[float]:
+    with tempfile.TemporaryDirectory() as cwd:
+        server = None
+        if daemon:
+            env = dict(os.environ, PYTHONPATH=SRC_DIR)
+            server = subprocess.Popen(
+                [sys.executable, "-c", "import main; main.main_entry"
+                 "(['daemon'])"], cwd=cwd, env=env,
+                stderr=subprocess.DEVNULL)
+            while not os.path.exists(os.path.join(cwd, "cli_calender.sock")):
+                time.sleep(0.01)
+        try:
+            _run_once(code, cwd)  # warm the page cache and create the db
+            return [_run_once(code, cwd) for _ in range(runs)]
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+
+def run(results: Results, runs: int) -> None:
+    curses_stats = summarize(measure(THROUGH_CURSES, runs))
+    headless_stats = summarize(measure(HEADLESS, runs))
+    daemon_stats = summarize(measure(THROUGH_DAEMON, runs, daemon=True))
+    results.add("startup/task_add_through_curses", curses_stats)
+    results.add("startup/task_add_headless", headless_stats)
+    results.add("startup/task_add_through_daemon", daemon_stats)
+    saved = curses_stats["median_us"] - headless_stats["median_us"]
+    print(f"headless saves {saved / 1000:.1f} ms per invocation "
+          f"({saved / curses_stats['median_us']:.0%})")
+    saved = headless_stats["median_us"] - daemon_stats["median_us"]
+    print(f"the daemon saves another {saved / 1000:.1f} ms "
+          f"({saved / headless_stats['median_us']:.0%})")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args(argv)
+    run(Results(), args.runs)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+import os
+import random
+import time
+from datetime import datetime
+from datetime import timedelta
+
+from constants import STORAGE_BACKENDS
+from harness import measure
+from harness import Results
+from harness import summarize
+from storage import open_storage
+
+FIRST_DAY = datetime(2000, 1, 1)
+SPACING = timedelta(minutes=7)
+
+
+def run(results: Results, workdir: str, sizes: list[int], runs: int) -> None:
+    # The same workload against every backend, side by side.
+    rnd = random.Random(0)
+    for size in sizes:
+        span_days = max(1, (size * SPACING).days)
+
+        def random_day() -> datetime:
+            return FIRST_DAY + timedelta(days=rnd.randrange(span_days))
+
+        for backend in STORAGE_BACKENDS:
+            name = f"storage/{backend}/{size}"
+            path = os.path.join(workdir, f"storage_{size}.{backend}")
+            repo = open_storage(backend, path)
+            repo.init_db()
+            start = time.perf_counter()
+            repo.add_tasks(((FIRST_DAY + i * SPACING).isoformat(" "),
+                            f"task {i}") for i in range(size))
+            results.add(f"{name}/bulk_insert_per_row",
+                        summarize([(time.perf_counter() - start) / size]))
+            if backend != "memory":
+                # What every process pays before its first query.
+                def reopen() -> None:
+                    with open_storage(backend, path) as other:
+                        other.bootstrap("2000-01-01 00:00:00",
+                                        "2000-01-31 23:59:59")
+
+                results.add(f"{name}/open", measure(reopen,
+                                                    max(3, runs // 20)))
+            results.add(f"{name}/tasks_for_day",
+                        measure(lambda: repo.tasks_for_day(random_day()),
+                                runs))
+
+            def month() -> None:
+                day = random_day()
+                repo.entries(
+                    day.replace(day=1).isoformat(" "),
+                    (day.replace(day=28) + timedelta(days=4)).isoformat(" "))
+
+            results.add(f"{name}/month_entries", measure(month, runs))
+            results.add(f"{name}/search_single_match",
+                        measure(lambda: list(repo.search(
+                            str(rnd.randrange(size)), limit=50)),
+                                max(3, runs // 20)))
+            results.add(f"{name}/add_task",
+                        measure(lambda: repo.add_task(
+                            random_day().isoformat(" "), "benchmark"), runs))
+            repo.watch()
+            results.add(f"{name}/poll_changes_idle",
+                        measure(repo.poll_changes, runs))
+            repo.close()
@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Optional
+
+import CliCalendar
+from bench_repository import populate
+from CliCalendar import CliCalender
+from fakes import FakeCurses
+from fakes import FakeWindow
+from harness import measure
+from harness import Results
+from storage import open_storage
+from TaskRepository import TaskRepository
+
+NOW = datetime(2005, 6, 15, 12, 0, 0)
+# Stands in for a database on a network filesystem, where every
+# transaction pays a round trip for its locks.
+ROUND_TRIP_S = 0.002
+
+
+class SlowRepository(TaskRepository):
+
+    def _configure(self, con: sqlite3.Connection) -> None:
+        def round_trip(_sql: str) -> None:
+            if not con.in_transaction:
+                time.sleep(ROUND_TRIP_S)
+        con.set_trace_callback(round_trip)
+        super()._configure(con)
+
+
+def open_slow_storage(backend: str, path: Optional[str] = None,
+                      snapshot: bool = False) -> SlowRepository:
+    assert path is not None
+    return SlowRepository(path, snapshot=snapshot)
+
+
+def make_calendar(db_path: str) -> CliCalender:
+    return CliCalender(db_path=db_path, now_fn=lambda: NOW,
+                       curses_api=FakeCurses())
+
+
+def run(results: Results, workdir: str, sizes: list[int], runs: int) -> None:
+    for size in sizes:
+        db_path = os.path.join(workdir, f"ui_{size}.db")
+        if not os.path.exists(db_path):
+            populate(db_path, size)[0].close()
+        prefix = f"ui/{size}"
+
+        def startup() -> None:
+            cal = make_calendar(db_path)
+            cal.draw(FakeWindow())
+            cal._repo.close()
+
+        results.add(f"{prefix}/startup_to_first_frame", measure(startup, runs))
+
+        def slow_startup() -> None:
+            CliCalendar.open_storage = open_slow_storage
+            try:
+                startup()
+            finally:
+                CliCalendar.open_storage = open_storage
+
+        results.add(f"{prefix}/startup_to_first_frame_slow_fs",
+                    measure(slow_startup, max(1, runs // 10)))
+
+        cal = make_calendar(db_path)
+        stdscr = FakeWindow()
+        cal.draw(stdscr)
+
+        def keypress(keys: list[str]) -> None:
+            stdscr.keys = keys
+            cal.move(stdscr)
+
+        results.add(f"{prefix}/keypress_to_frame",
+                    measure(lambda: keypress(["KEY_RIGHT"]), runs,
+                            setup=lambda: keypress(["KEY_LEFT"])))
+        # A held arrow key: 30 repeats queued while one frame was drawn.
+        results.add(f"{prefix}/key_burst_30",
+                    measure(lambda: cal.handle_keys(
+                        stdscr, ["KEY_RIGHT", "KEY_LEFT"] * 15), runs))
+        results.add(f"{prefix}/month_flip_cached",
+                    measure(lambda: keypress(["\x0e"]), runs,
+                            setup=lambda: keypress(["\x10"])))
+
+        def flip_cold() -> None:
+            cal._tasks.clear()
+            keypress(["\x0e"])
+
+        results.add(f"{prefix}/month_flip_uncached",
+                    measure(flip_cold, runs,
+                            setup=lambda: keypress(["\x10"])))
+
+        keypress(["y"])
+        results.add(f"{prefix}/year_flip_cached",
+                    measure(lambda: keypress(["\x0e"]), runs,
+                            setup=lambda: keypress(["\x10"])))
+
+        def year_flip_cold() -> None:
+            cal._year_view._years.clear()
+            keypress(["\x0e"])
+
+        results.add(f"{prefix}/year_flip_uncached",
+                    measure(year_flip_cold, runs,
+                            setup=lambda: keypress(["\x10"])))
+        keypress(["y"])
+        results.add(f"{prefix}/gen_current_month",
+                    measure(lambda: cal._gen_current_month(2005, 6), runs))
+        cal._repo.close()
@@ -0,0 +1,65 @@
+from typing import Any
+
+
+class FakeWindow:
+    # Swallows output but counts what would have been sent to the terminal.
+
+    def __init__(self, size: tuple[int, int] = (30, 120)) -> None:
+        self.size = size
+        self.bytes_written = 0
+        self.keys: list[str] = []
+
+    def addstr(self, *args: Any) -> None:
+        positioned = len(args) >= 3 and isinstance(args[0], int)
+        text = args[2] if positioned else args[0]
+        self.bytes_written += len(text)
+
+    def clear(self) -> None:
+        pass
+
+    def erase(self) -> None:
+        pass
+
+    def refresh(self) -> None:
+        pass
+
+    def noutrefresh(self) -> None:
+        pass
+
+    def getmaxyx(self) -> tuple[int, int]:
+        return self.size
+
+    def getkey(self) -> str:
+        return self.keys.pop()
+
+
+class FakeCurses:
+    COLOR_RED = 1
+    COLOR_GREEN = 2
+    COLOR_YELLOW = 3
+    COLOR_BLUE = 4
+    COLOR_MAGENTA = 5
+    COLOR_CYAN = 6
+    COLOR_WHITE = 7
+    A_STANDOUT = 256
+    A_BOLD = 512
+    A_UNDERLINE = 1024
+    A_REVERSE = 2048
+
+    def start_color(self) -> None:
+        pass
+
+    def init_pair(self, index: int, fg: int, bg: int) -> None:
+        pass
+
+    def color_pair(self, value: int) -> int:
+        return value
+
+    def newwin(self, *args: Any) -> FakeWindow:
+        return FakeWindow()
+
+    def doupdate(self) -> None:
+        pass
+
+    def endwin(self) -> None:
+        pass
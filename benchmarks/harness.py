@@ -0,0 +1,89 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any
+from typing import Callable
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    # All timings are reported in microseconds.
+    us = [s * 1e6 for s in samples]
+    return {
+        "runs": len(us),
+        "min_us": min(us),
+        "median_us": statistics.median(us),
+        "p95_us": percentile(us, 95),
+        "mean_us": statistics.fmean(us),
+    }
+
+
+def measure(fn: Callable[[], Any], runs: int,
+            setup: Callable[[], Any] | None = None) -> dict[str, float]:
+    samples = []
+    for _ in range(runs):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                             cwd=SRC_DIR, capture_output=True, text=True,
+                             check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+class Results:
+
+    def __init__(self) -> None:
+        self.meta = {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+        }
+        self.benchmarks: dict[str, dict[str, float]] = {}
+
+    def add(self, name: str, stats: dict[str, float]) -> None:
+        self.benchmarks[name] = stats
+        print(f"{name:<45} median {stats['median_us']:>12.1f} us  "
+              f"p95 {stats['p95_us']:>12.1f} us", flush=True)
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump({"meta": self.meta, "benchmarks": self.benchmarks},
+                      f, indent=2)
+
+
+def compare(old_path: str, new: Results) -> None:
+    with open(old_path) as f:
+        old = json.load(f)
+    print(f"\nmedian change against {old_path} "
+          f"(commit {old['meta'].get('commit')}):")
+    for name, stats in new.benchmarks.items():
+        before = old["benchmarks"].get(name)
+        if before is None:
+            continue
+        change = stats["median_us"] / before["median_us"] - 1
+        print(f"{name:<45} {change:>+8.1%}")
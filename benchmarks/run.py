@@ -0,0 +1,54 @@
+"""Run the cli_calender benchmark suite and save the results as JSON.
+
+    python benchmarks/run.py --output before.json
+    python benchmarks/run.py --output after.json --compare before.json
+"""
+import argparse
+import sys
+import tempfile
+
+import bench_repository
+import bench_storage
+import bench_ui
+from harness import compare
+from harness import Results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--sizes", type=str, default="1000,100000",
+                        help="Comma separated database sizes in rows, "
+                             "e.g. 1000,100000,1000000.")
+    parser.add_argument("--runs", type=int, default=200,
+                        help="Timed runs per benchmark.")
+    parser.add_argument("--only", choices=("repository", "storage", "ui",
+                                           "startup"),
+                        action="append",
+                        help="Only run these groups, may be repeated.")
+    parser.add_argument("--output", type=str, default="bench_results.json")
+    parser.add_argument("--compare", type=str,
+                        help="Earlier results to compare medians against.")
+    args = parser.parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    groups = args.only or ["repository", "storage", "ui", "startup"]
+    results = Results()
+    with tempfile.TemporaryDirectory() as workdir:
+        if "repository" in groups:
+            bench_repository.run(results, workdir, sizes, args.runs)
+        if "storage" in groups:
+            bench_storage.run(results, workdir, sizes, args.runs)
+        if "ui" in groups:
+            bench_ui.run(results, workdir, sizes, args.runs)
+        if "startup" in groups:
+            import bench_startup
+            bench_startup.run(results, max(5, args.runs // 20))
+    results.save(args.output)
+    print(f"\nsaved {len(results.benchmarks)} results to {args.output}")
+    if args.compare:
+        compare(args.compare, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,15 @@ from datetime import datetime
 from constants import _COLORS
 from constants import _DAYS
 from constants import _MONTHS
+from constants import AGENDA_DAYS
+from constants import AGENDA_FORMATS
+from constants import DEFAULT_BATCH_SIZE
+from constants import LOG_LEVELS
+from constants import REPEAT_CHOICES
+from constants import SEARCH_ORDERS
+from constants import SEARCH_PAGE_SIZE
+from constants import STORAGE_BACKENDS
+from constants import TASK_FORMATS
 
 DESCRIPTION = """
 cli_calender is an interactive calender avaiable in the terminal.
@@ -17,15 +26,46 @@ ascending time order.
 You can add or delete desk with the task subcomand.
 """
 
+# Task subcommands that write to the database.
+_WRITING_TASK_COMMANDS = ("add", "delete", "import", "skip", "move")
 
-def get_args(argv: list[str] | None = None) -> Namespace:
-    if argv is None:
-        argv = sys.argv[1:]
-    parser = ArgumentParser(description=DESCRIPTION)
+
+def _defaults() -> tuple[int, str, int]:
     cur_date = datetime.now()
     cur_month = cur_date.strftime("%b")
     cur_day = int(cur_date.strftime("%-d"))
     cur_year = int(cur_date.strftime("%Y"))
+    return cur_year, cur_month, cur_day
+
+
+def get_args(argv: list[str] | None = None,
+             parser: ArgumentParser | None = None) -> Namespace:
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv:
+        # Plain `cli_calender` is by far the most common invocation, it
+        # only needs today's date so the parser tree is never built.
+        cur_year, cur_month, cur_day = _defaults()
+        return Namespace(year=cur_year, month=cur_month, day=cur_day,
+                         profile=False, profile_output=None, snapshot=False,
+                         backend=None, command=None)
+    if parser is None:
+        parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.snapshot and (args.command == "config" or getattr(
+            args, "task_command", None) in _WRITING_TASK_COMMANDS):
+        parser.error("--snapshot opens the database read-only, it can not "
+                     "be used to change it")
+    if args.snapshot and args.command == "daemon":
+        parser.error("--snapshot can not be used with daemon")
+    if args.snapshot and args.backend not in (None, "sqlite"):
+        parser.error("--snapshot only works with the sqlite backend")
+    return args
+
+
+def build_parser() -> ArgumentParser:
+    parser = ArgumentParser(description=DESCRIPTION)
+    cur_year, cur_month, cur_day = _defaults()
     parser.add_argument("--year",
                         action="store",
                         default=cur_year,
@@ -43,6 +83,28 @@ def get_args(argv: list[str] | None = None) -> Namespace:
                         type=int,
                         choices=_DAYS,
                         help="The day of the month.")
+    parser.add_argument("--profile",
+                        action="store_true",
+                        help="Print keypress latency, database and drawing "
+                             "timings when the calender exits.")
+    parser.add_argument("--profile-output",
+                        action="store",
+                        type=str,
+                        metavar="FILE",
+                        help="Also write cProfile stats to FILE, implies "
+                             "--profile.")
+    parser.add_argument("--snapshot",
+                        action="store_true",
+                        help="Copy the database into memory at startup and "
+                             "browse the copy read-only, without touching "
+                             "the file again.")
+    parser.add_argument("--backend",
+                        choices=STORAGE_BACKENDS,
+                        help="Where tasks are kept: sqlite (the default), "
+                             "log (an append-only JSON lines file, for "
+                             "shared storage where sqlite misbehaves) or "
+                             "memory (nothing is saved). Also read from "
+                             "CLI_CALENDER_BACKEND.")
     subparsers = parser.add_subparsers(dest="command")
     task = subparsers.add_parser("task", help="Subcommand for adding "
                                  "and deleting tasks.")
@@ -73,13 +135,48 @@ def get_args(argv: list[str] | None = None) -> Namespace:
                         help="Change the background color.",
                         type=str,
                         choices=_COLORS)
+    config.add_argument("--log-path",
+                        action="store",
+                        help="Write the log to this file.",
+                        type=str)
+    config.add_argument("--log-level",
+                        action="store",
+                        help="Only log messages of this level and above, "
+                             "off disables logging.",
+                        type=str,
+                        choices=LOG_LEVELS)
+    agenda = subparsers.add_parser("agenda", help="Print the tasks of a "
+                                   "range of days to stdout.")
+    agenda.add_argument("--from",
+                        action="store",
+                        dest="date_from",
+                        type=str,
+                        help="First day of the agenda, YYYY-MM-DD or "
+                             "YYYY-MM-DD HH:mm. Defaults to today.")
+    agenda.add_argument("--to",
+                        action="store",
+                        dest="date_to",
+                        type=str,
+                        help="Last day of the agenda, inclusive. Defaults to "
+                             f"{AGENDA_DAYS} days from --from.")
+    agenda.add_argument("--format",
+                        action="store",
+                        type=str,
+                        choices=AGENDA_FORMATS,
+                        default="text",
+                        help="text (default), json with one object per line, "
+                             "or csv.")
+    subparsers.add_parser("daemon", help="Keep the database open and serve "
+                          "task and agenda commands run in this directory "
+                          "over a Unix socket, until interrupted.")
     task_subpars = task.add_subparsers(dest="task_command")
     add_task = task_subpars.add_parser("add",
                                        help="Add task to calender. "
                                             "Needs to be used with --date.")
     delete_task = task_subpars.add_parser("delete",
-                                          help="Delete task from calender."
-                                               "Needs to be used with --date.")
+                                          help="Delete tasks from calender. "
+                                               "Needs to be used with --date,"
+                                               " --id or --from and --to.")
     add_task.add_argument("--date",
                           action="store",
                           type=str,
@@ -91,12 +188,167 @@ def get_args(argv: list[str] | None = None) -> Namespace:
                           type=str,
                           help="Description of the task to"
                           " add.")
-    delete_task.add_argument("--date",
+    repeat = add_task.add_mutually_exclusive_group()
+    repeat.add_argument("--repeat",
+                        action="store",
+                        type=str,
+                        choices=REPEAT_CHOICES,
+                        help="Repeat the task from --date on.")
+    repeat.add_argument("--rrule",
+                        action="store",
+                        type=str,
+                        metavar="RULE",
+                        help="Repeat the task by an iCalendar RRULE, e.g. "
+                             "FREQ=WEEKLY;BYDAY=MO,WE;COUNT=10. FREQ, "
+                             "INTERVAL, COUNT, UNTIL and BYDAY (weekly "
+                             "only) are supported.")
+    delete_target = delete_task.add_mutually_exclusive_group(required=True)
+    delete_target.add_argument("--date",
+                               action="store",
+                               type=str,
+                               help="Delete every task at this date, in the "
+                                    "following format: YYYY-MM-DD HH:mm. "
+                                    "Time is in the 24h format.")
+    delete_target.add_argument("--id",
+                               action="store",
+                               type=int,
+                               help="Delete the task with this id, see "
+                                    "task export.")
+    delete_target.add_argument("--from",
+                               action="store",
+                               dest="date_from",
+                               type=str,
+                               help="Delete every task from this date up "
+                                    "to --to, YYYY-MM-DD HH:mm.")
+    delete_target.add_argument("--rule",
+                               action="store",
+                               type=int,
+                               help="Delete the recurring task with this id "
+                                    "and all of its occurrences, see task "
+                                    "rules.")
+    delete_task.add_argument("--to",
                              action="store",
+                             dest="date_to",
                              type=str,
-                             required=True,
-                             help="The date in the following format:"
-                                  " YYYY-MM-DD HH:mm. "
-                                  "Time is in the 24h format.")
-    args = parser.parse_args(argv)
-    return args
+                             help="End of the range deleted with --from, "
+                                  "inclusive.")
+    import_task = task_subpars.add_parser("import",
+                                          help="Import tasks from a CSV or "
+                                               "JSONL file in one "
+                                               "transaction, or events "
+                                               "from an iCalendar file.")
+    import_task.add_argument("file",
+                             action="store",
+                             nargs="?",
+                             default="-",
+                             type=str,
+                             help="File to read, - for stdin (default).")
+    import_task.add_argument("--format",
+                             action="store",
+                             type=str,
+                             choices=TASK_FORMATS,
+                             help="Input format, guessed from the file "
+                                  "extension when omitted.")
+    import_task.add_argument("--batch-size",
+                             action="store",
+                             type=int,
+                             default=DEFAULT_BATCH_SIZE,
+                             help="Rows inserted per executemany call, "
+                                  "events per transaction for .ics files.")
+    export_task = task_subpars.add_parser("export",
+                                          help="Export tasks as CSV, JSONL "
+                                               "or iCalendar.")
+    export_task.add_argument("file",
+                             action="store",
+                             nargs="?",
+                             default="-",
+                             type=str,
+                             help="File to write, - for stdout (default).")
+    export_task.add_argument("--format",
+                             action="store",
+                             type=str,
+                             choices=TASK_FORMATS,
+                             help="Output format, guessed from the file "
+                                  "extension when omitted.")
+    export_task.add_argument("--from",
+                             action="store",
+                             dest="date_from",
+                             type=str,
+                             help="Only export tasks from this date on, "
+                                  "YYYY-MM-DD HH:mm.")
+    export_task.add_argument("--to",
+                             action="store",
+                             dest="date_to",
+                             type=str,
+                             help="Only export tasks up to this date, "
+                                  "YYYY-MM-DD HH:mm.")
+    search_task = task_subpars.add_parser("search",
+                                          help="Find tasks whose description "
+                                               "contains the given words.")
+    search_task.add_argument("query",
+                             action="store",
+                             nargs="+",
+                             type=str,
+                             help="Words to look for. Other forms of a word "
+                                  "match too (meet finds meeting), end a "
+                                  "word with * to match every word "
+                                  "starting with it.")
+    search_task.add_argument("--order",
+                             action="store",
+                             type=str,
+                             choices=SEARCH_ORDERS,
+                             default="date",
+                             help="Sort by date (default) or by relevance.")
+    search_task.add_argument("--limit",
+                             action="store",
+                             type=int,
+                             default=SEARCH_PAGE_SIZE,
+                             help="Number of results per page.")
+    search_task.add_argument("--page",
+                             action="store",
+                             type=int,
+                             default=1,
+                             help="Page of results to show, starting at 1.")
+    search_task.add_argument("--from",
+                             action="store",
+                             dest="date_from",
+                             type=str,
+                             help="Only search tasks from this date on, "
+                                  "YYYY-MM-DD HH:mm.")
+    search_task.add_argument("--to",
+                             action="store",
+                             dest="date_to",
+                             type=str,
+                             help="Only search tasks up to this date, "
+                                  "inclusive.")
+    task_subpars.add_parser("rules", help="List the recurring tasks.")
+    skip_task = task_subpars.add_parser("skip",
+                                        help="Cancel one occurrence of a "
+                                             "recurring task.")
+    move_task = task_subpars.add_parser("move",
+                                        help="Move or rename one occurrence "
+                                             "of a recurring task.")
+    for occurrence in (skip_task, move_task):
+        occurrence.add_argument("--rule",
+                                action="store",
+                                type=int,
+                                required=True,
+                                help="Id of the recurring task, see task "
+                                     "rules.")
+        occurrence.add_argument("--date",
+                                action="store",
+                                type=str,
+                                required=True,
+                                help="The original date of the occurrence, "
+                                     "YYYY-MM-DD HH:mm.")
+    move_task.add_argument("--to",
+                           action="store",
+                           dest="new_date",
+                           type=str,
+                           help="New date of the occurrence, "
+                                "YYYY-MM-DD HH:mm.")
+    move_task.add_argument("--description",
+                           action="store",
+                           type=str,
+                           help="New description of the occurrence.")
+    return parser
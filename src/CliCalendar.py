@@ -1,27 +1,39 @@
 import calendar
 import curses
 import logging
+import math
 import os
 import signal
-import sqlite3
 import sys
+import time
 from _curses import window
 from argparse import Namespace
 from collections import ChainMap
 from datetime import datetime
+from datetime import timedelta
 from typing import Any
 from typing import Callable
 from typing import Optional
+from typing import TYPE_CHECKING
 
+import commands
+from constants import DEFAULT_BACKEND
 from constants import DEFAULT_CONFIG
-from constants import DB_NAME
-from dateutil.relativedelta import relativedelta
-from TaskRepository import TaskRepository
+from constants import MAX_FPS
+from constants import REFRESH_INTERVAL_MS
+from MonthCache import MonthCache
+from MonthGrid import month_grid
+from MonthGrid import MonthGrid
+from storage import open_storage
+from timestamps import add_months
+from YearView import YearView
+
+if TYPE_CHECKING:
+    from Profiler import Profiler
 
 _CUR_DIR = os.path.dirname(os.path.abspath(__file__))
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(filename="cli-calender.log", level=logging.INFO)
 
 
 months_to_nums = {
@@ -41,69 +53,113 @@ months_to_nums = {
 
 nums_to_months = {v: k for k, v in months_to_nums.items()}
 
-color_to_curses_color_pair = {
-    "black": 0,
-    "red": 1,
-    "green": 2,
-    "yellow": 3,
-    "blue": 4,
-    "magenta": 5,
-    "cyan": 6,
-    "white": 7
+# (row, column) step on the month grid for every arrow key.
+_ARROW_STEPS = {
+    "KEY_UP": (-1, 0),
+    "KEY_DOWN": (1, 0),
+    "KEY_LEFT": (0, -1),
+    "KEY_RIGHT": (0, 1),
+}
+# In the year view the cursor moves by days and weeks across months.
+_YEAR_STEPS = {
+    "KEY_UP": -7,
+    "KEY_DOWN": 7,
+    "KEY_LEFT": -1,
+    "KEY_RIGHT": 1,
 }
+# Keys that read more input themselves, nothing typed after them belongs to
+# the current frame.
+_PROMPT_KEYS = ("/",)
 
 
 class CliCalender():
 
     def __init__(self,
-                 db_path: str = DB_NAME,
+                 db_path: Optional[str] = None,
                  now_fn: Callable[[], datetime] = datetime.now,
-                 curses_api: Any = curses):
-        self.pos = (0, 0)  # (y, x)
+                 curses_api: Any = curses,
+                 backend: str = DEFAULT_BACKEND,
+                 snapshot: bool = False,
+                 profiler: Optional["Profiler"] = None):
+        self.pos = (0, 0)  # (week row, weekday column) on the month grid
         self.state_matrix = None
+        # (year, month, screen size) the grid on screen was painted for.
+        self._layout: Optional[tuple[int, int, tuple[int, int]]] = None
+        self._cursor_day: Optional[int] = None
+        self._task_win: Optional[window] = None
+        self._task_win_size: Optional[tuple[int, int]] = None
         self._curses = curses_api
         self._text_cal = calendar.TextCalendar()
         self._date = now_fn()
-        self._month_calender = self._gen_current_month(self._date.year,
-                                                       self._date.month)
-        self._repo = TaskRepository(db_path)
-        self._init_db()
-        self._config = None
-        self._load_config()
+        self._set_month()
+        self._last_frame = 0.0
+        self._repo = open_storage(backend, db_path, snapshot=snapshot)
+        self._tasks = MonthCache(self._repo)
+        self._year_view = YearView(self._repo, self._curses,
+                                   self._text_cal.firstweekday)
+        self._show_year = False
+        self._query: Optional[str] = None
+        if profiler is not None:
+            # Before the bootstrap read, it is part of the startup cost.
+            self.instrument(profiler)
+        self._bootstrap()
         self._curses.start_color()
         self._init_colors()
 
-    def _load_config(self) -> None:
-        if self._config is not None:
-            return
-        user_config = self._user_config()
-        self._config = ChainMap(user_config, DEFAULT_CONFIG)
-
-    def _user_config(self) -> dict[str, int]:
-        conf = self._repo.load_config()
-        if not conf:
+    def _bootstrap(self) -> None:
+        # The schema check, the config and the tasks around the opening
+        # month come in one read transaction, the first frame needs no
+        # further queries.
+        boot = self._repo.bootstrap(*self._tasks.span(self._date.year,
+                                                      self._date.month))
+        self._tasks.preload(self._date.year, self._date.month, boot.entries)
+        self._log_settings = boot.log_settings
+        if not boot.config:
             logger.info("No user configuration found in the database.")
-        logger.info(f"Loaded configuration: {conf}")
-        return conf
+        logger.info("Loaded configuration: %s", boot.config)
+        self._config = ChainMap(boot.config, DEFAULT_CONFIG)
+
+    def apply_log_settings(self) -> None:
+        commands.apply_log_settings(self._repo, self._log_settings)
+
+    def instrument(self, profiler: "Profiler") -> None:
+        profiler.instrument(self, ("draw", "_draw_month", "_draw_tasks"))
+        profiler.instrument(self._tasks, ("tasks_for_day",), "MonthCache.")
+        profiler.instrument(self._year_view, ("draw", "counts"), "YearView.")
+        profiler.instrument(self._repo, ("bootstrap", "entries",
+                                         "iter_tasks", "tasks_for_day",
+                                         "task_counts", "occurrences",
+                                         "search", "add_task",
+                                         "delete_task", "poll_changes"),
+                            "db.")
+        self._curses = profiler.wrap_curses(self._curses)
 
-    def _init_db(self) -> None:
-        self._repo.init_db()
+    @property
+    def _grid(self) -> MonthGrid:
+        return month_grid(self._date.year, self._date.month,
+                          self._text_cal.firstweekday)
 
     def _gen_current_month(self, year: int = 0, month: int = 0) -> str:
         return self._text_cal.formatmonth(year, month)
 
+    def _set_month(self) -> None:
+        self._month_calender = self._gen_current_month(self._date.year,
+                                                       self._date.month)
+        # The title and weekday header, split once per month instead of on
+        # every repaint.
+        self._month_header = self._month_calender.splitlines()[:2]
+
     def _draw_tasks(self, win: window) -> None:
         four_spaces = "    "
-        win.clear()
+        win.erase()
         win.addstr(f"\n\n{four_spaces}")
         win.addstr("Tasks:",
                    self._curses.color_pair(self._config["task_title"]))
-        for date, task in self._repo.tasks_for_day(self._date):
-            hour = datetime.strptime(date, "%Y-%m-%d %H:%M:%S").time()\
-                .strftime("%H:%M")
-            logger.debug(f"Printing task: {task} to side window. Hour: {hour}")
+        for entry in self._tasks.tasks_for_day(self._date):
+            logger.debug("Printing task: %s to side window. Hour: %s",
+                         entry.task, entry.time)
             win.addstr(f"\n{four_spaces}")
-            win.addstr(f"{hour}: {task}",
+            win.addstr(f"{entry.time}: {entry.task}",
                        self._curses.color_pair(self._config["task_color"]))
 
     def _init_colors(self) -> None:
@@ -124,231 +180,296 @@ class CliCalender():
             day = self._date.strftime("%-d")
         else:
             self._date = self._date.replace(day=int(day))
-        stdscr.clear()
+        if self._show_year:
+            self._year_view.draw(stdscr, self._date, self._config)
+            self._curses.doupdate()
+            return
+        size = stdscr.getmaxyx()
+        layout = (self._date.year, self._date.month, size)
+        if self._layout != layout:
+            # Only a month change or a resize repaints the whole grid,
+            # moving the cursor just repaints the two cells involved.
+            self._draw_month(stdscr, resized=self._layout is not None
+                             and self._layout[2] != size)
+            self._layout = layout
+        elif self._cursor_day is not None:
+            self._draw_cell(stdscr, self._cursor_day, selected=False)
+        self._cursor_day = int(day)
+        self._draw_cell(stdscr, self._cursor_day, selected=True)
+        self.pos = self._grid.cell_of(self._cursor_day)
+        logger.debug("current pos is %s", self.pos)
+        stdscr.noutrefresh()
+        win = self._task_window(size)
+        self._draw_tasks(win)
+        win.noutrefresh()
+        self._curses.doupdate()
+
+    def _draw_month(self, stdscr: window, resized: bool = False) -> None:
+        if resized:
+            stdscr.clear()
+        else:
+            stdscr.erase()
         stdscr.addstr("\n\n")
-        if len(day) == 1:
-            day = " " + day
+        lines = self._month_header + list(self._grid.lines)
+        width = max(len(line) for line in lines)
+        attrs = self._curses.color_pair(self._config["calendar_color"])
         four_spaces = "    "
-        found = False
-        split = self._month_calender.splitlines()
-        for i, line in enumerate(split):
-            logger.debug(f"Entered loop with index {i}")
-            if i == 0:
-                line += "    "
-            if i == len(split) - 1:
-                x = len(split[2]) - len(line)
-                line += " " * x
-            if day not in line or found or i < 2:
-                stdscr.addstr(f"{four_spaces}")
-                stdscr.addstr(f"{line}\n",
-                              self._curses.color_pair(self._config["calendar_color"])
-                              )
-                continue
-            stdscr.addstr(f"{four_spaces}")
-            if i == 2:
-                self._pad_line(stdscr, line)
-            x_pos = line.index(day)
-            self.pos = (i, x_pos)
-            logger.debug(f"current pos is {self.pos}")
-            logger.debug(f"current num is:{line[x_pos:x_pos+2]}")
-            for j, c in enumerate(line.split()):
-                if len(c) == 1:
-                    c = " " + c
-                if c == day:
-                    if j != 0:
-                        stdscr.addstr(" ",
-                                      self._curses.color_pair(self._config["calendar"
-                                                                     "_color"]
-                                                        )
-                                      )
-                    attrs = self._curses.color_pair(self._config["cursor_color"]) \
-                        | self._curses.A_STANDOUT
-                    stdscr.addstr(f"{c}", attrs)
-                    found = True
-                    continue
-                if j != 0:
-                    c = " " + c
-                stdscr.addstr(f"{c}",
-                              self._curses.color_pair(self._config["calendar_color"]
-                                                )
-                              )
-            if i == len(split) - 1:
-                logger.info("Usli smo aleluja")
-                stdscr.addstr(" " * (len(split[2]) - len(split[6])),
-                              self._curses.color_pair(self._config["calendar_color"])
-                              )
-            stdscr.addstr("\n")
-        max_y, max_x = stdscr.getmaxyx()
-        win = self._curses.newwin(max_y,
-                            max_x // 4,
-                            0,
-                            max_x // 4)
-        stdscr.refresh()
-        self._draw_tasks(win)
-        win.refresh()
+        for line in lines:
+            stdscr.addstr(four_spaces)
+            stdscr.addstr(f"{line.ljust(width)}\n", attrs)
+
+    def _draw_cell(self, stdscr: window, day: int, selected: bool) -> None:
+        row, col = self._grid.cell_of(day)
+        if selected:
+            attrs = self._curses.color_pair(self._config["cursor_color"]) \
+                | self._curses.A_STANDOUT
+        else:
+            attrs = self._curses.color_pair(self._config["calendar_color"])
+        # Two blank lines and the month header sit above the first week,
+        # every cell is two digits wide plus a separating space.
+        stdscr.addstr(row + 4, col * 3 + 4, f"{day:>2}", attrs)
+
+    def _task_window(self, size: tuple[int, int]) -> window:
+        if self._task_win is None or self._task_win_size != size:
+            max_y, max_x = size
+            self._task_win = self._curses.newwin(max_y,
+                                                 max_x // 4,
+                                                 0,
+                                                 max_x // 4)
+            self._task_win_size = size
+        return self._task_win
 
     def _handle_signal(self, signal_number: int, frame: Any) -> None:
-        # clean up any db cons?
+        self._repo.close()
         self._curses.endwin()
-        logger.info(f"Exiting on signal: {signal_number}")
+        logger.info("Exiting on signal: %d", signal_number)
         sys.exit(0)
 
     def _add_date(self, year: int = 0, month: int = 0, day: int = 0) -> None:
-        self._date = self._date + relativedelta(years=year,
-                                                months=month,
-                                                days=day)
-        self._month_calender = self._gen_current_month(self._date.year,
-                                                       self._date.month)
-        logger.info(f"New date is {self._date}")
+        self._date = add_months(self._date, year * 12 + month) \
+            + timedelta(days=day)
+        self._set_month()
+        logger.info("New date is %s", self._date)
 
-    def move(self, stdscr: window) -> None:
-        temp = self._month_calender.splitlines()
+    def install_signal_handlers(self) -> None:
         signal.signal(signal.SIGINT, self._handle_signal)
         signal.signal(signal.SIGTSTP, self._handle_signal)
-        m = len(temp)
-        n = len(temp[2])
-        match stdscr.getkey():
-            case "KEY_UP":
-                if self.pos[0] - 1 > 1:
-                    logger.debug(f"Going from pos {self.pos} to "
-                                 f"{self.pos[0]-1}:{self.pos[1]}")
-                    day = temp[self.pos[0] - 1][self.pos[1]:self.pos[1] + 2]
-                    day = day.strip()
-                    if not day.isnumeric():
-                        logger.debug(f"Early exit {day}")
-                        return
-                    logger.debug(f"new day is {day}")
-                    self.draw(stdscr, day)
-                    logger.debug("Yoou pressed up!")
-            case "KEY_DOWN":
-                if self.pos[0] + 1 < m:
-                    logger.debug(f"Going from pos {self.pos} to "
-                                 f"{self.pos[0] + 1}:{self.pos[1]}")
-                    day = temp[self.pos[0] + 1][self.pos[1]:self.pos[1] + 2]
-                    day = day.strip()
-                    if not day.isnumeric():
-                        logger.debug(f"Early exit {day}")
-                        return
-                    logger.debug(f"new day is {day}")
-                    self.draw(stdscr, day)
-                    logger.debug("Yoou pressed down!")
-            case "KEY_LEFT":
-                if self.pos[1] - 3 >= 0:
-                    logger.debug(f"Going from pos {self.pos} to "
-                                 f"{self.pos[0]}:{self.pos[1] - 3}")
-                    day = temp[self.pos[0]][self.pos[1] - 3:self.pos[1]]
-                    day = day.strip()
-                    if not day.isnumeric():
-                        logger.debug(f"Early exit {day}")
-                        return
-                    logger.debug(f"new day is {day}")
-                    self.draw(stdscr, day)
-                    logger.debug("Yoou pressed left!")
-            case "KEY_RIGHT":
-                if self.pos[1] + 3 < n:
-                    logger.debug(f"Going from pos {self.pos} to "
-                                 f"{self.pos[0]}:{self.pos[1] + 3}")
-                    day = temp[self.pos[0]][self.pos[1] + 3:self.pos[1] + 5]
-                    day = day.strip()
-                    if not day.isnumeric():
-                        logger.debug(f"Early exit {day}")
-                        return
-                    logger.debug(f"new day is {day}")
-                    self.draw(stdscr, day)
-                    logger.debug("Yoou pressed right!")
+
+    def run(self, stdscr: window,
+            on_frame: Optional[Callable[[], None]] = None) -> None:
+        self.install_signal_handlers()
+        while True:
+            keys = self._read_keys(stdscr)
+            if keys:
+                self.handle_keys(stdscr, keys)
+            elif self._repo.poll_changes():
+                # Another process wrote to the database, the months it
+                # touched were dropped from the caches and reload here.
+                self.draw(stdscr)
+            else:
+                continue
+            self._last_frame = time.monotonic()
+            if on_frame is not None:
+                on_frame()
+
+    def _read_keys(self, stdscr: window) -> list[str]:
+        # Waits for the next key, then takes every key already queued and
+        # whatever arrives until the frame budget since the last frame is
+        # spent. A held arrow key becomes one move per frame instead of a
+        # backlog of frames played back after it is released. No keys
+        # means the wait timed out and the calender is idle.
+        stdscr.timeout(REFRESH_INTERVAL_MS)
+        try:
+            keys = [stdscr.getkey()]
+        except self._curses.error:
+            return []
+        ready = self._last_frame + 1 / MAX_FPS
+        while keys[-1] not in _PROMPT_KEYS:
+            wait = ready - time.monotonic()
+            stdscr.timeout(max(0, math.ceil(wait * 1000)))
+            try:
+                keys.append(stdscr.getkey())
+            except self._curses.error:
+                break
+        return keys
+
+    def move(self, stdscr: window) -> None:
+        self.handle_keys(stdscr, [stdscr.getkey()])
+
+    def handle_keys(self, stdscr: window, keys: list[str]) -> None:
+        # Cursor and page moves only change the date, the screen is painted
+        # once for all of them.
+        dirty = False
+        for key in keys:
+            if key not in ("/", "n", "N"):
+                dirty = self._apply_key(key) or dirty
+                continue
+            # Searches start from the day the earlier keys moved to, and
+            # the prompt is shown over the screen for it.
+            if dirty:
+                self.draw(stdscr, str(self._date.day))
+                dirty = False
+            if key == "/":
+                self._search(stdscr)
+            else:
+                self._jump_to_match(stdscr, forward=key == "n")
+        if dirty:
+            self.draw(stdscr, str(self._date.day))
+
+    def _apply_key(self, key: str) -> bool:
+        # Returns whether the screen needs painting.
+        if key == "KEY_RESIZE":
+            # draw notices the new size and repaints everything for it.
+            return True
+        if key == "y":
+            self._show_year = not self._show_year
+            # Both views paint over the whole screen.
+            self._layout = None
+            self._year_view.invalidate()
+            logger.debug("Showing the %s view",
+                         "year" if self._show_year else "month")
+            return True
+        if self._show_year:
+            return self._move_year(key)
+        step = _ARROW_STEPS.get(key)
+        if step is not None:
+            day = self._grid.neighbour(self._date.day, *step)
+            if day is None:
+                logger.debug("No day %s away from %s", step, self.pos)
+                return False
+            logger.debug("Pressed %s, new day is %d", key, day)
+            self._date = self._date.replace(day=day)
+            return True
+        match key:
             case "\x0e":  # This is the asci value for control + n
                 logger.debug("Pressed the next page button!")
                 self._add_date(month=1)
-                self.draw(stdscr, str(self._date.day))
+                return True
             case "\x10":  # This is the asci value for control + p
                 logger.debug("Pressed the prev page button!")
                 self._add_date(month=-1)
-                self.draw(stdscr, str(self._date.day))
+                return True
+        return False
 
-    def _pad_line(self, stdscr: window, line: str) -> None:
-        i = 0
-        for c in line:
-            if c != " ":
-                break
-            i += 1
-        logger.debug({f"Need to pad {i} times"})
-        stdscr.addstr(" " * (i - 1),
-                      self._curses.color_pair(self._config["calendar_color"]))
+    def _move_year(self, key: str) -> bool:
+        days = _YEAR_STEPS.get(key)
+        if days is not None:
+            self._add_date(day=days)
+        elif key == "\x0e":
+            self._add_date(year=1)
+        elif key == "\x10":
+            self._add_date(year=-1)
+        else:
+            return False
+        return True
 
-    def _add_task(self, date: str, task_desc: str) -> None:
-        try:
-            datetime.strptime(date, "%Y-%m-%d %H:%M")
-        except ValueError as e:
-            logger.error(f"Got error parsing date to add: {e}")
-            raise SystemExit(2)
+    def _search(self, stdscr: window) -> None:
+        query = self._prompt(stdscr, "/")
+        if query:
+            self._query = query
+            self._jump_to_match(stdscr, forward=True, include_today=True)
+        else:
+            self._repaint(stdscr)
+
+    def _jump_to_match(self, stdscr: window, forward: bool,
+                       include_today: bool = False) -> None:
+        if not self._query:
+            return
+        midnight = self._date.replace(hour=0, minute=0, second=0,
+                                      microsecond=0)
+        if forward:
+            start = midnight if include_today else midnight \
+                + timedelta(days=1)
+            matches = list(self._repo.search(self._query, start=str(start),
+                                             limit=1))
+        else:
+            end = midnight - timedelta(minutes=1)
+            matches = list(self._repo.search(self._query, end=str(end),
+                                             limit=1, reverse=True))
+        wrapped = not matches
+        if wrapped:
+            # Like vim, the search continues from the other end.
+            matches = list(self._repo.search(self._query, limit=1,
+                                             reverse=not forward))
+        if not matches:
+            logger.debug("No task matching %r", self._query)
+            self._show_status(stdscr, f"no tasks matching {self._query!r}")
+            return
+        found = datetime.fromisoformat(matches[0][1])
+        self._date = self._date.replace(year=found.year, month=found.month,
+                                        day=found.day)
+        self._set_month()
+        if wrapped:
+            self._show_status(stdscr, "search hit "
+                              + ("bottom, continuing at top" if forward
+                                 else "top, continuing at bottom"))
+        else:
+            self.draw(stdscr)
+
+    def _prompt(self, stdscr: window, label: str) -> str:
+        max_y, max_x = stdscr.getmaxyx()
+        stdscr.move(max_y - 1, 0)
+        stdscr.clrtoeol()
+        stdscr.addstr(max_y - 1, 0, label)
+        self._curses.echo()
+        self._curses.curs_set(1)
+        # _read_keys leaves a timeout set, getstr would give up on a
+        # pause in typing and return what was typed so far.
+        stdscr.timeout(-1)
         try:
-            self._repo.add_task(date + ":00", task_desc)
-            logger.info(f"Added task '{task_desc}', to date {date}.")
-        except sqlite3.IntegrityError as e:
-            logger.error(f"Task for date {date} already exists: {e}")
+            text = stdscr.getstr(max_y - 1, len(label),
+                                 max_x - len(label) - 1)
+        finally:
+            stdscr.timeout(REFRESH_INTERVAL_MS)
+            self._curses.noecho()
+            self._curses.curs_set(0)
+        # The prompt was typed over whatever was on the last line.
+        self._layout = None
+        self._year_view.invalidate()
+        return text.decode(errors="replace").strip()
+
+    def _show_status(self, stdscr: window, text: str) -> None:
+        max_y, max_x = stdscr.getmaxyx()
+        self._repaint(stdscr)
+        stdscr.addstr(max_y - 1, 0, text[:max_x - 1])
+        stdscr.noutrefresh()
+        self._curses.doupdate()
+        # Gone with the next full repaint.
+        self._layout = None
+        self._year_view.invalidate()
+
+    def _repaint(self, stdscr: window) -> None:
+        self._layout = None
+        self._year_view.invalidate()
+        self.draw(stdscr)
+
+    def _add_task(self, date: str, task_desc: str) -> None:
+        commands.add_task(self._repo, date, task_desc)
 
     def _delete_task(self, date: str) -> None:
-        try:
-            datetime.strptime(date, "%Y-%m-%d %H:%M")
-        except ValueError as e:
-            logger.error(f"Got error deleting date: {e}")
-            raise SystemExit(2)
-        rowcount = self._repo.delete_task(date + ":00")
-        if rowcount == 0:
-            logger.info(f"No task found for date {date} to delete.")
-        else:
-            logger.info(f"Task for date {date} deleted.")
+        commands.delete_task(self._repo, date)
 
     def _handle_task(self, args: Namespace) -> None:
-        if args.task_command == "add":
-            self._add_task(args.date, args.description)
-        elif args.task_command == "delete":
-            self._delete_task(args.date)
+        commands.handle_task(self._repo, args)
 
     def _save_user_config(self, args: Namespace) -> None:
-        updates = []
-        values = []
-        if args.bg_color:
-            updates.append("bg_color = ?")
-            values.append(color_to_curses_color_pair[args.bg_color])
-        if args.cursor_color:
-            updates.append("cursor_color = ?")
-            values.append(color_to_curses_color_pair[args.cursor_color])
-        if args.task_color:
-            updates.append("task_color = ?")
-            values.append(color_to_curses_color_pair[args.task_color])
-        if args.task_title:
-            updates.append("task_title = ?")
-            values.append(color_to_curses_color_pair[args.task_title])
-        if args.calendar_color:
-            updates.append("calendar_color = ?")
-            values.append(color_to_curses_color_pair[args.calendar_color])
-        if not updates:
-            self._repo.save_config({})
-            return
-        parsed_updates = {}
-        for update, value in zip(updates, values):
-            key = update.split(" = ")[0]
-            parsed_updates[key] = value
-        self._repo.save_config(parsed_updates)
+        commands.save_user_config(self._repo, args)
 
     def handle_args(self, args: Namespace) -> None:
         if args.year:
-            mon = self._date.month
             self._date = self._date.replace(year=args.year)
-            self._month_calender = self._gen_current_month(args.year, mon)
+            self._set_month()
         if args.month:
             self._date = self._date.replace(month=months_to_nums[args.month])
-            self._month_calender = self._gen_current_month(self._date.year,
-                                                           self._date.month)
+            self._set_month()
         if args.day:
             mon = self._date.month
             year = self._date.year
             _, last_day = calendar.monthrange(year, mon)
-            logger.debug(f"The last day of the month is {last_day}")
+            logger.debug("The last day of the month is %d", last_day)
             if args.day > last_day:
-                logger.error(f"Invalid day {args.day!r} for month"
-                             f" {nums_to_months[mon]}")
+                logger.error("Invalid day %r for month %s", args.day,
+                             nums_to_months[mon])
                 self._curses.endwin()
                 raise SystemExit(2)
             self._date = self._date.replace(day=args.day)
@@ -0,0 +1,190 @@
+import fcntl
+import gc
+import json
+import os
+from contextlib import contextmanager
+from contextlib import suppress
+from typing import BinaryIO
+from typing import Iterator
+from typing import Optional
+
+from constants import LOG_COMPACT_RECORDS
+from MemoryStorage import MemoryStorage
+from MemoryStorage import Record
+
+# (log inode, index modification time), both change with every compaction.
+_Version = tuple[Optional[int], Optional[int]]
+
+
+def _encode(record: Record) -> bytes:
+    return json.dumps(record, separators=(",", ":")).encode() + b"\n"
+
+
+class LogStorage(MemoryStorage):
+    # Every write is appended to a JSON lines log at path, all of it is
+    # kept in memory. Once the log is long enough it is folded into
+    # path.index, a JSON dump of everything, and started afresh. Writers
+    # take a lock on path.lock and first read what other processes
+    # appended, readers never lock: poll_changes picks up new records with
+    # two stat calls. Nothing relies on sqlite3 or byte range locks, which
+    # misbehave on some network filesystems.
+
+    def __init__(self, path: str,
+                 compact_records: int = LOG_COMPACT_RECORDS):
+        super().__init__()
+        self._path = path
+        self._index_path = path + ".index"
+        self._lock_path = path + ".lock"
+        self._compact_records = compact_records
+        self._version: _Version = (None, None)
+        self._offset = 0  # bytes of the log read so far
+        self._records = 0  # records in the log
+        self._reload()
+
+    def init_db(self) -> None:
+        with self._lock, self._locked():
+            self._catch_up()
+            if self._version[0] is None:
+                with open(self._path, "ab") as log:
+                    self._version = (os.fstat(log.fileno()).st_ino,
+                                     self._version[1])
+
+    def _stat(self) -> tuple[_Version, int]:
+        # The version of the files and the size of the log.
+        try:
+            log = os.stat(self._path)
+        except FileNotFoundError:
+            log = None
+        try:
+            index_version: Optional[int] = \
+                os.stat(self._index_path).st_mtime_ns
+        except FileNotFoundError:
+            index_version = None
+        if log is None:
+            return (None, index_version), 0
+        return (log.st_ino, index_version), log.st_size
+
+    def _reload(self) -> None:
+        # The log is opened before the index is read. A compaction in
+        # between leaves the old log to replay over the new index, which
+        # ends in the same state: replayed adds of ids already there are
+        # skipped and deletes find nothing new to delete.
+        try:
+            log: Optional[BinaryIO] = open(self._path, "rb")
+        except FileNotFoundError:
+            log = None
+        # Only acyclic tuples are built, the collector passes triggered by
+        # a million allocations would find nothing and take half the time.
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            self._reset()
+            index_version = None
+            try:
+                with open(self._index_path, "rb") as index:
+                    state = json.load(index)
+                    index_version = os.fstat(index.fileno()).st_mtime_ns
+            except FileNotFoundError:
+                state = None
+            if state is not None:
+                self._tasks = list(map(tuple, state["tasks"]))
+                self._minutes = {task_id: ts
+                                 for ts, task_id, _ in self._tasks}
+                self._last_id = state["last_id"]
+                self._config = state["config"]
+            self._version = (None if log is None
+                             else os.fstat(log.fileno()).st_ino,
+                             index_version)
+            if log is not None:
+                self._apply(self._read(log))
+        finally:
+            if collecting:
+                gc.enable()
+            if log is not None:
+                log.close()
+
+    def _reset(self) -> None:
+        self._tasks = []
+        self._minutes = {}
+        self._last_id = 0
+        self._config = {}
+        self._offset = 0
+        self._records = 0
+
+    def _read(self, log: BinaryIO) -> list[Record]:
+        log.seek(self._offset)
+        data = log.read()
+        # A writer may be half way through its last line.
+        end = data.rfind(b"\n") + 1
+        # One JSON array, a single call into the C decoder.
+        records = json.loads(b"[" + data[:end - 1].replace(b"\n", b",")
+                             + b"]") if end else []
+        self._offset += end
+        self._records += len(records)
+        return records
+
+    def _catch_up(self) -> bool:
+        version, size = self._stat()
+        if version != self._version:
+            self._reload()
+            self._notify(None)
+            return True
+        if size == self._offset:
+            return False
+        with open(self._path, "rb") as log:
+            records = self._read(log)
+        if not records:
+            return False
+        months = self._apply(records)
+        if months is None or months:
+            self._notify_months(months)
+        return True
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def _save(self, records: list[Record]) -> None:
+        # Called with the lock held, after the records were applied.
+        data = b"".join(_encode(record) for record in records)
+        try:
+            with open(self._path, "ab") as log:
+                log.write(data)
+                log.flush()
+                os.fsync(log.fileno())
+                self._version = (os.fstat(log.fileno()).st_ino,
+                                 self._version[1])
+        except BaseException:
+            # Drop a partly written line and whatever was applied.
+            with suppress(OSError):
+                os.truncate(self._path, self._offset)
+            self._reload()
+            raise
+        self._offset += len(data)
+        self._records += len(records)
+        # Folding rewrites every task, waiting for as many records as there
+        # are tasks keeps its cost per write constant.
+        if self._records >= max(self._compact_records, len(self._tasks)):
+            self._compact()
+
+    def _compact(self) -> None:
+        tmp = self._index_path + ".tmp"
+        with open(tmp, "w") as index:
+            json.dump({"last_id": self._last_id, "config": self._config,
+                       "tasks": self._tasks}, index, separators=(",", ":"))
+            index.flush()
+            os.fsync(index.fileno())
+        os.replace(tmp, self._index_path)
+        # The empty log gets a new inode, which tells other processes to
+        # reload rather than read on from their old offset.
+        tmp = self._path + ".tmp"
+        open(tmp, "wb").close()
+        os.replace(tmp, self._path)
+        self._version = self._stat()[0]
+        self._offset = 0
+        self._records = 0
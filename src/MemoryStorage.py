@@ -0,0 +1,321 @@
+import threading
+from bisect import bisect_left
+from bisect import bisect_right
+from bisect import insort
+from contextlib import contextmanager
+from contextlib import nullcontext
+from datetime import datetime
+from itertools import islice
+from operator import itemgetter
+from types import TracebackType
+from typing import Any
+from typing import Callable
+from typing import ContextManager
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+
+from constants import DEFAULT_BATCH_SIZE
+from constants import DEFAULT_CONFIG
+from constants import SEARCH_ORDERS
+from storage import Bootstrap
+from timestamps import day_range
+from timestamps import from_minutes
+from timestamps import MINUTES_PER_DAY
+from timestamps import to_minutes
+
+# Every write is a list of records, applied in order:
+#   ["add", id, minute, description]
+#   ["delete", id]
+#   ["clear", first minute, last minute]
+#   ["config", {column: value}]
+# LogStorage appends the same records to its log.
+Record = list[Any]
+
+_minute = itemgetter(0)
+_MIN_TS = -(2 ** 63)
+_MAX_TS = 2 ** 63 - 1
+
+
+def _month(ts: int) -> str:
+    return from_minutes(ts)[0:7]
+
+
+def _bounds(start: Optional[str], end: Optional[str]) -> tuple[int, int]:
+    return (_MIN_TS if start is None else to_minutes(start),
+            _MAX_TS if end is None else to_minutes(end))
+
+
+def _matches(text: str, words: list[str]) -> bool:
+    # Same as the LIKE '%word%word%' scan of a database without FTS5: the
+    # words in order, anywhere in the description.
+    pos = 0
+    for word in words:
+        pos = text.find(word, pos)
+        if pos < 0:
+            return False
+        pos += len(word)
+    return True
+
+
+class MemoryStorage:
+
+    def __init__(self) -> None:
+        # (minute, id, description) sorted, a range is two bisections.
+        self._tasks: list[tuple[int, int, str]] = []
+        self._minutes: dict[int, int] = {}  # id -> minute
+        self._last_id = 0
+        self._config: dict[str, int | str] = {}
+        self._listeners: list[Callable[[Optional[str]], None]] = []
+        self._lock = threading.RLock()
+
+    def __enter__(self) -> "MemoryStorage":
+        return self
+
+    def __exit__(self,
+                 exc_type: Optional[type[BaseException]],
+                 exc: Optional[BaseException],
+                 tb: Optional[TracebackType]) -> None:
+        self.close()
+
+    def close(self) -> None:
+        pass
+
+    def subscribe(self, listener: Callable[[Optional[str]], None]) -> None:
+        self._listeners.append(listener)
+
+    def _notify(self, date: Optional[str]) -> None:
+        for listener in self._listeners:
+            listener(date)
+
+    def _notify_months(self, months: Optional[set[str]]) -> None:
+        if months is None:
+            self._notify(None)
+        else:
+            for month in sorted(months):
+                self._notify(f"{month}-01 00:00:00")
+
+    def watch(self) -> None:
+        pass
+
+    def poll_changes(self) -> bool:
+        with self._lock:
+            return self._catch_up()
+
+    def init_db(self) -> None:
+        pass
+
+    def bootstrap(self, start: str, end: str) -> Bootstrap:
+        with self._lock:
+            self._catch_up()
+            return Bootstrap(self.load_config(), self.load_log_settings(),
+                             self.entries(start, end))
+
+    # Hooks for LogStorage: a lock across processes, picking up what they
+    # wrote and saving records before they count as written.
+
+    def _locked(self) -> ContextManager[None]:
+        return nullcontext()
+
+    def _catch_up(self) -> bool:
+        return False
+
+    def _save(self, records: list[Record]) -> None:
+        pass
+
+    @contextmanager
+    def _writing(self) -> Iterator[list[Record]]:
+        # Records collected in the block are applied once it is done, a
+        # write failing half way changes nothing.
+        records: list[Record] = []
+        with self._lock, self._locked():
+            self._catch_up()
+            yield records
+            if not records:
+                return
+            months = self._apply(records)
+            self._save(records)
+        if months is None or months:
+            self._notify_months(months)
+
+    def _apply(self, records: Iterable[Record]) -> Optional[set[str]]:
+        # Returns the months that changed, None when any may have.
+        months: Optional[set[str]] = set()
+        added: list[tuple[int, int, str]] = []
+        for record in records:
+            op = record[0]
+            if op == "add":
+                # Adding an id twice happens when a log is replayed over
+                # an index that already has it, see LogStorage._compact.
+                if record[1] not in self._minutes:
+                    self._minutes[record[1]] = record[2]
+                    self._last_id = max(self._last_id, record[1])
+                    added.append((record[2], record[1], record[3]))
+                    if months is not None:
+                        months.add(_month(record[2]))
+                continue
+            self._insert(added)
+            added = []
+            if op == "delete":
+                ts = self._minutes.pop(record[1], None)
+                if ts is None:
+                    continue
+                i = bisect_left(self._tasks, (ts, record[1]))
+                del self._tasks[i]
+                if months is not None:
+                    months.add(_month(ts))
+            elif op == "clear":
+                low, high = record[1], record[2]
+                i = bisect_left(self._tasks, low, key=_minute)
+                j = bisect_right(self._tasks, high, key=_minute)
+                if i == j:
+                    continue
+                for _, task_id, _ in self._tasks[i:j]:
+                    del self._minutes[task_id]
+                del self._tasks[i:j]
+                if months is None or _month(low) != _month(high):
+                    months = None
+                else:
+                    months.add(_month(low))
+            elif op == "config":
+                self._config.update(record[1])
+            else:
+                raise ValueError(f"Unknown storage record {op!r}")
+        self._insert(added)
+        return months
+
+    def _insert(self, added: list[tuple[int, int, str]]) -> None:
+        if len(added) * 8 < len(self._tasks):
+            for task in added:
+                insort(self._tasks, task)
+        elif added:
+            # Both runs are sorted, timsort merges them in one pass.
+            added.sort()
+            self._tasks.extend(added)
+            self._tasks.sort()
+
+    def load_config(self) -> dict[str, int]:
+        # The colours only count once every one of them is set.
+        with self._lock:
+            colors = {key: self._config.get(key) for key in DEFAULT_CONFIG}
+        if None in colors.values():
+            return {}
+        return colors  # type: ignore[return-value]
+
+    def load_log_settings(self) -> dict[str, str]:
+        with self._lock:
+            return {key: str(self._config[column]) for key, column
+                    in (("path", "log_path"), ("level", "log_level"))
+                    if self._config.get(column) is not None}
+
+    def save_config(self, updates: dict[str, int | str]) -> None:
+        with self._writing() as records:
+            records.append(["config", dict(updates)])
+
+    def add_task(self, date: str, task_desc: str) -> int:
+        with self._writing() as records:
+            task_id = self._last_id + 1
+            records.append(["add", task_id, to_minutes(date), task_desc])
+        return task_id
+
+    def add_tasks(self, rows: Iterable[tuple[str, str]],
+                  batch_size: int = DEFAULT_BATCH_SIZE
+                  ) -> tuple[int, list[tuple[str, str]]]:
+        # Same rules as TaskRepository.add_tasks: only an exact repeat of a
+        # task already there, or earlier in rows, is a conflict. Nothing is
+        # written in batches here, batch_size is only checked.
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+        conflicts: list[tuple[str, str]] = []
+        with self._writing() as records:
+            fresh: set[tuple[int, str]] = set()
+            task_id = self._last_id
+            for date, task_desc in rows:
+                ts = to_minutes(date)
+                if (ts, task_desc) in fresh or any(
+                        task[2] == task_desc for task in self._slice(ts, ts)):
+                    conflicts.append((date, task_desc))
+                    continue
+                fresh.add((ts, task_desc))
+                task_id += 1
+                records.append(["add", task_id, ts, task_desc])
+        return len(records), conflicts
+
+    def delete_task(self, date: str) -> int:
+        ts = to_minutes(date)
+        with self._writing() as records:
+            deleted = len(self._slice(ts, ts))
+            if deleted:
+                records.append(["clear", ts, ts])
+        return deleted
+
+    def delete_task_by_id(self, task_id: int) -> int:
+        with self._writing() as records:
+            if task_id in self._minutes:
+                records.append(["delete", task_id])
+        return len(records)
+
+    def delete_tasks_in_range(self, start: str, end: str) -> int:
+        low, high = to_minutes(start), to_minutes(end)
+        with self._writing() as records:
+            deleted = len(self._slice(low, high))
+            if deleted:
+                records.append(["clear", low, high])
+        return deleted
+
+    def _slice(self, low: int, high: int) -> list[tuple[int, int, str]]:
+        with self._lock:
+            return self._tasks[bisect_left(self._tasks, low, key=_minute):
+                               bisect_right(self._tasks, high, key=_minute)]
+
+    def entries(self, start: str, end: str) -> list[tuple[int, str]]:
+        return [(ts, task_desc) for ts, _, task_desc
+                in self._slice(to_minutes(start), to_minutes(end))]
+
+    def occurrences(self, start: str,
+                    end: str) -> list[tuple[int, str, str]]:
+        # Recurring tasks are only stored by the sqlite backend.
+        return []
+
+    def iter_occurrences(self, start: str,
+                         end: str) -> Iterator[tuple[int, str, str]]:
+        return iter(())
+
+    def tasks_for_day(self, date: datetime) -> list[tuple[str, str]]:
+        return [(from_minutes(ts), task_desc)
+                for ts, _, task_desc in self._slice(*day_range(date))]
+
+    def iter_tasks(self, start: Optional[str] = None,
+                   end: Optional[str] = None
+                   ) -> Iterator[tuple[int, str, str]]:
+        for ts, task_id, task_desc in self._slice(*_bounds(start, end)):
+            yield task_id, from_minutes(ts), task_desc
+
+    def search(self, query: str, start: Optional[str] = None,
+               end: Optional[str] = None, limit: Optional[int] = None,
+               offset: int = 0, order: str = "date",
+               reverse: bool = False) -> Iterator[tuple[int, str, str]]:
+        # A scan in date order, there is no index to rank matches by.
+        if order not in SEARCH_ORDERS:
+            raise ValueError(f"Unknown search order {order!r}")
+        if reverse and order == "rank":
+            raise ValueError("Matches by rank can not be listed in reverse")
+        words = query.lower().replace("*", " ").split()
+        if not words:
+            return
+        tasks = self._slice(*_bounds(start, end))
+        if reverse:
+            tasks.reverse()
+        found = (task for task in tasks if _matches(task[2].lower(), words))
+        for ts, task_id, task_desc in islice(
+                found, offset, None if limit is None else offset + limit):
+            yield task_id, from_minutes(ts), task_desc
+
+    def task_counts(self, start: str, end: str) -> list[tuple[str, int]]:
+        first = to_minutes(start)
+        counts: dict[int, int] = {}
+        for ts, _, _ in self._slice(first, to_minutes(end)):
+            day = (ts - first) // MINUTES_PER_DAY
+            counts[day] = counts.get(day, 0) + 1
+        return [(from_minutes(first + day * MINUTES_PER_DAY)[:10], count)
+                for day, count in sorted(counts.items())]
@@ -0,0 +1,136 @@
+import calendar
+import logging
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import datetime
+from itertools import accumulate
+from typing import Optional
+
+from constants import MONTH_CACHE_SIZE
+from storage import Storage
+from Task import Task
+from timestamps import MINUTES_PER_DAY
+from timestamps import to_minutes
+
+logger = logging.getLogger(__name__)
+
+Month = tuple[int, int]  # (year, month)
+
+
+def _shift(key: Month, months: int) -> Month:
+    index = key[0] * 12 + key[1] - 1 + months
+    return index // 12, index % 12 + 1
+
+
+def _month_of(date: str) -> Month:
+    return int(date[0:4]), int(date[5:7])
+
+
+def _first_minute(key: Month) -> int:
+    return to_minutes(datetime(key[0], key[1], 1))
+
+
+class MonthTasks:
+    # The tasks of a month in date order, and for every day the index of
+    # its first task: day d is tasks[starts[d - 1]:starts[d]], a slice
+    # instead of a scan or a dict of lists per day.
+    __slots__ = ("tasks", "starts")
+
+    def __init__(self, first_minute: int, days: int, tasks: list[Task]):
+        self.tasks = tasks
+        if not tasks:
+            self.starts = array("I", bytes(4 * (days + 1)))
+            return
+        counts = [0] * (days + 1)
+        for task in tasks:
+            counts[(task.ts - first_minute) // MINUTES_PER_DAY + 1] += 1
+        self.starts = array("I", accumulate(counts))
+
+    def day(self, day: int) -> list[Task]:
+        return self.tasks[self.starts[day - 1]:self.starts[day]]
+
+
+class MonthCache:
+
+    def __init__(self, repo: Storage,
+                 capacity: int = MONTH_CACHE_SIZE,
+                 prefetch: bool = True):
+        if capacity < (3 if prefetch else 1):
+            raise ValueError(f"Month cache capacity {capacity} is too small")
+        self._repo = repo
+        self._capacity = capacity
+        self._prefetch = prefetch
+        self._months: OrderedDict[Month, MonthTasks] = OrderedDict()
+        self.loads = 0
+        repo.subscribe(self._on_change)
+
+    def tasks_for_day(self, date: datetime) -> list[Task]:
+        return self.month(date.year, date.month).day(date.day)
+
+    def month(self, year: int, month: int) -> MonthTasks:
+        key = (year, month)
+        if key not in self._months:
+            self._load(key)
+        self._months.move_to_end(key)
+        return self._months[key]
+
+    def _wanted(self, key: Month) -> list[Month]:
+        if not self._prefetch:
+            return [key]
+        # The neighbours come along in the same range query, so the next
+        # Ctrl+N/Ctrl+P is already served from memory.
+        return [m for m in (_shift(key, -1), key, _shift(key, 1))
+                if m == key or m not in self._months]
+
+    def span(self, year: int, month: int) -> tuple[str, str]:
+        # The range loaded for a month, neighbours included.
+        wanted = self._wanted((year, month))
+        first, last = wanted[0], wanted[-1]
+        _, last_day = calendar.monthrange(*last)
+        return (f"{first[0]:04d}-{first[1]:02d}-01 00:00:00",
+                f"{last[0]:04d}-{last[1]:02d}-{last_day:02d} 23:59:59")
+
+    def _load(self, key: Month) -> None:
+        self.preload(key[0], key[1], self._repo.entries(*self.span(*key)))
+
+    def preload(self, year: int, month: int,
+                entries: list[tuple[int, str]]) -> None:
+        # Takes the entries of span(year, month) read by the caller, like
+        # the ones Storage.bootstrap hands over at startup.
+        # Recurring tasks are among them for the loaded months only, the
+        # cache capacity bounds how many expanded months are kept.
+        key = (year, month)
+        loaded: dict[Month, MonthTasks] = {}
+        for m in self._wanted(key):
+            first = _first_minute(m)
+            following = _first_minute(_shift(m, 1))
+            lo = bisect_left(entries, first, key=lambda entry: entry[0])
+            hi = bisect_left(entries, following, lo,
+                             key=lambda entry: entry[0])
+            loaded[m] = MonthTasks(
+                first, (following - first) // MINUTES_PER_DAY,
+                [Task(ts, task) for ts, task in entries[lo:hi]])
+        self.loads += 1
+        logger.debug("Loaded tasks for months %s", list(loaded))
+        # Neighbours go in first so the requested month is the most recent.
+        for m in sorted(loaded, key=lambda m: m == key):
+            self._months[m] = loaded[m]
+            self._months.move_to_end(m)
+        while len(self._months) > self._capacity:
+            self._months.popitem(last=False)
+
+    def invalidate(self, year: int, month: int) -> None:
+        self._months.pop((year, month), None)
+
+    def clear(self) -> None:
+        self._months.clear()
+
+    def _on_change(self, date: Optional[str]) -> None:
+        if date is None:
+            self.clear()
+        else:
+            self.invalidate(*_month_of(date))
+
+    def __contains__(self, key: Month) -> bool:
+        return key in self._months
@@ -0,0 +1,44 @@
+import calendar
+from functools import lru_cache
+from typing import Optional
+
+from constants import MONTH_GRID_CACHE_SIZE
+
+
+class MonthGrid:
+
+    def __init__(self, year: int, month: int, firstweekday: int = 0):
+        self.year = year
+        self.month = month
+        cal = calendar.Calendar(firstweekday)
+        # weeks[row][col] is the day in that cell, 0 for cells outside
+        # the month.
+        self.weeks = tuple(tuple(week)
+                           for week in cal.monthdayscalendar(year, month))
+        self._cells = {day: (row, col)
+                       for row, week in enumerate(self.weeks)
+                       for col, day in enumerate(week) if day}
+        self.lines = tuple(" ".join(f"{day:>2}" if day else "  "
+                                    for day in week).rstrip()
+                           for week in self.weeks)
+
+    @property
+    def last_day(self) -> int:
+        return len(self._cells)
+
+    def cell_of(self, day: int) -> tuple[int, int]:
+        return self._cells[day]
+
+    def day_at(self, row: int, col: int) -> Optional[int]:
+        if not (0 <= row < len(self.weeks) and 0 <= col < 7):
+            return None
+        return self.weeks[row][col] or None
+
+    def neighbour(self, day: int, d_row: int, d_col: int) -> Optional[int]:
+        row, col = self._cells[day]
+        return self.day_at(row + d_row, col + d_col)
+
+
+@lru_cache(maxsize=MONTH_GRID_CACHE_SIZE)
+def month_grid(year: int, month: int, firstweekday: int = 0) -> MonthGrid:
+    return MonthGrid(year, month, firstweekday)
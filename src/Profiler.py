@@ -0,0 +1,188 @@
+import functools
+import inspect
+import sys
+import time
+from collections import defaultdict
+from typing import Any
+from typing import Callable
+from typing import Generator
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import TextIO
+
+# Upper bounds in milliseconds of the keypress latency histogram buckets.
+_BUCKETS_MS = (0.5, 1, 2, 4, 8, 16, 32, 64, float("inf"))
+_BAR_WIDTH = 40
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _drawn_bytes(args: tuple[Any, ...]) -> int:
+    for arg in args:
+        if isinstance(arg, str):
+            return len(arg.encode())
+    return 0
+
+
+class _ProfiledWindow:
+    def __init__(self, win: Any, profiler: "Profiler"):
+        self._win = win
+        self._profiler = profiler
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._win, name)
+
+    def addstr(self, *args: Any) -> None:
+        self._profiler.bytes_drawn += _drawn_bytes(args)
+        self._win.addstr(*args)
+
+    def getkey(self) -> str:
+        # The wait for the key is not part of the frame, its latency is
+        # counted from the moment the key arrives.
+        key = self._win.getkey()
+        self._profiler.key_received()
+        return key
+
+
+class _ProfiledCurses:
+    def __init__(self, curses_api: Any, profiler: "Profiler"):
+        self._curses = curses_api
+        self._profiler = profiler
+        self.doupdate = profiler.timed("curses.doupdate", curses_api.doupdate)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._curses, name)
+
+    def newwin(self, *args: Any) -> _ProfiledWindow:
+        return _ProfiledWindow(self._curses.newwin(*args), self._profiler)
+
+
+class Profiler:
+    def __init__(self, pstats_path: Optional[str] = None,
+                 clock: Callable[[], float] = time.perf_counter):
+        self.timings: defaultdict[str, list[float]] = defaultdict(list)
+        self.bytes_drawn = 0
+        self.pstats_path = pstats_path
+        self._clock = clock
+        self._frame_start: Optional[float] = None
+        self._cprofile: Optional[Any] = None
+
+    def start(self) -> None:
+        if self.pstats_path:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def timed(self, section: str,
+              fn: Callable[..., Any]) -> Callable[..., Any]:
+        samples = self.timings[section]
+        clock = self._clock
+        if inspect.isgeneratorfunction(fn):
+            return self._timed_generator(samples, fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                samples.append(clock() - start)
+        return wrapper
+
+    def _timed_generator(self, samples: list[float],
+                         fn: Callable[..., Generator[Any, None, None]]
+                         ) -> Callable[..., Iterator[Any]]:
+        # Generators do their work (fetching rows) while they are iterated,
+        # every next() is timed and the sum is one sample per call.
+        clock = self._clock
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Iterator[Any]:
+            start = clock()
+            it = fn(*args, **kwargs)
+            elapsed = clock() - start
+            try:
+                while True:
+                    start = clock()
+                    try:
+                        item = next(it)
+                    except StopIteration:
+                        return
+                    finally:
+                        elapsed += clock() - start
+                    yield item
+            finally:
+                it.close()
+                samples.append(elapsed)
+        return wrapper
+
+    def instrument(self, obj: Any, names: Iterable[str],
+                   prefix: str = "") -> None:
+        # Only the instance is patched, nothing changes for code that
+        # is not being profiled.
+        for name in names:
+            setattr(obj, name, self.timed(prefix + name, getattr(obj, name)))
+
+    def wrap_window(self, win: Any) -> Any:
+        return _ProfiledWindow(win, self)
+
+    def wrap_curses(self, curses_api: Any) -> Any:
+        return _ProfiledCurses(curses_api, self)
+
+    def key_received(self) -> None:
+        # Keys coalesced into one frame are timed from the first of them.
+        if self._frame_start is None:
+            self._frame_start = self._clock()
+
+    def frame_done(self) -> None:
+        if self._frame_start is not None:
+            self.timings["keypress"].append(self._clock() - self._frame_start)
+            self._frame_start = None
+
+    def report(self, out: Optional[TextIO] = None) -> None:
+        out = out or sys.stderr
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.pstats_path)
+            self._cprofile = None
+        keypresses = self.timings.get("keypress", [])
+        print(f"cli_calender profile: {len(keypresses)} keypresses", file=out)
+        print(f"{'section':<28}{'calls':>7}{'total ms':>10}{'p50 ms':>9}"
+              f"{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}", file=out)
+        for section, samples in sorted(self.timings.items()):
+            if not samples:
+                continue
+            print(f"{section:<28}{len(samples):>7}"
+                  f"{sum(samples) * 1000:>10.2f}"
+                  f"{_percentile(samples, 50) * 1000:>9.3f}"
+                  f"{_percentile(samples, 90) * 1000:>9.3f}"
+                  f"{_percentile(samples, 99) * 1000:>9.3f}"
+                  f"{max(samples) * 1000:>9.3f}", file=out)
+        per_key = self.bytes_drawn // len(keypresses) if keypresses else 0
+        print(f"bytes drawn: {self.bytes_drawn} ({per_key} per keypress)",
+              file=out)
+        if keypresses:
+            self._histogram(keypresses, out)
+        if self.pstats_path:
+            print(f"pstats written to {self.pstats_path}", file=out)
+
+    def _histogram(self, samples: list[float], out: TextIO) -> None:
+        counts = [0] * len(_BUCKETS_MS)
+        for sample in samples:
+            ms = sample * 1000
+            counts[next(i for i, bound in enumerate(_BUCKETS_MS)
+                        if ms < bound)] += 1
+        widest = max(counts)
+        print("keypress latency:", file=out)
+        lower = 0.0
+        for bound, count in zip(_BUCKETS_MS, counts):
+            label = (f">= {lower:g} ms" if bound == float("inf")
+                     else f"< {bound:g} ms")
+            bar = "#" * round(count / widest * _BAR_WIDTH)
+            print(f"  {label:>10} {bar} {count}", file=out)
+            lower = bound
@@ -0,0 +1,32 @@
+from timestamps import from_minutes
+from timestamps import MINUTES_PER_DAY
+
+# "HH:MM" for every minute of a day, shared by all tasks at that minute.
+_TIMES = tuple(f"{minute // 60:02d}:{minute % 60:02d}"
+               for minute in range(MINUTES_PER_DAY))
+
+
+class Task:
+    # A cached task or occurrence. Slots and an integer timestamp take less
+    # memory than a tuple of date and description strings, and the time
+    # shown in the task pane is formatted once, not on every frame.
+    __slots__ = ("ts", "task", "time")
+
+    def __init__(self, ts: int, task: str):
+        self.ts = ts
+        self.task = task
+        # Minutes before the epoch still give the time of day, the epoch
+        # is midnight.
+        self.time = _TIMES[ts % MINUTES_PER_DAY]
+
+    @property
+    def date(self) -> str:
+        return from_minutes(self.ts)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Task):
+            return NotImplemented
+        return self.ts == other.ts and self.task == other.task
+
+    def __repr__(self) -> str:
+        return f"Task({self.date!r}, {self.task!r})"
@@ -1,65 +1,466 @@
+import functools
+import heapq
+import math
+import os
 import sqlite3
+import threading
+import time
 from datetime import datetime
+from itertools import islice
+from types import TracebackType
+from typing import Any
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import TypeVar
 
+import migrations
+from constants import BUSY_BACKOFF_S
+from constants import BUSY_RETRIES
+from constants import BUSY_TIMEOUT_MS
+from constants import DB_CHANGE_TABLE
 from constants import DB_CONFIG_TABLE
+from constants import DB_EXCEPTION_TABLE
+from constants import DB_FTS_SYNC_TABLE
+from constants import DB_FTS_TABLE
+from constants import DB_IMPORT_TABLE
+from constants import DB_RECURRENCE_TABLE
 from constants import DB_TASK_TABLE
+from constants import DEFAULT_BATCH_SIZE
+from constants import DEFAULT_JOURNAL_MODE
+from constants import DEFAULT_SYNCHRONOUS
+from constants import JOURNAL_MODES
+from constants import OCCURRENCE_WINDOW_DAYS
+from constants import SEARCH_ORDERS
+from constants import SYNCHRONOUS_LEVELS
+from recurrence import format_rule
+from recurrence import last_occurrence
+from recurrence import occurrences
+from recurrence import parse_rule
+from storage import Bootstrap
+from timestamps import day_range
+from timestamps import from_minutes
+from timestamps import MINUTES_PER_DAY
+from timestamps import to_minutes
+
+# sqlite3 keeps prepared statements keyed by their SQL text, so every query
+# below is a module level constant and gets compiled once per connection.
+STATEMENT_CACHE_SIZE = 128
+
+_SELECT_CONFIG_ROW = (f"SELECT bg_color, task_color, task_title, "
+                      "calendar_color, cursor_color, log_path, log_level "
+                      f"FROM {DB_CONFIG_TABLE} WHERE id = 1")
+_INSERT_CONFIG_ROW = (f"INSERT OR IGNORE INTO {DB_CONFIG_TABLE} (id) "
+                      "VALUES (1);")
+_INSERT_TASK = f"INSERT INTO {DB_TASK_TABLE} (ts, task) VALUES (?, ?)"
+_DELETE_TASK = f"DELETE FROM {DB_TASK_TABLE} WHERE ts = ?"
+_DELETE_TASK_BY_ID = f"DELETE FROM {DB_TASK_TABLE} WHERE id = ? RETURNING ts"
+_DELETE_TASKS_IN_RANGE = (f"DELETE FROM {DB_TASK_TABLE} "
+                          "WHERE ts BETWEEN ? AND ?")
+_SELECT_TASKS_IN_RANGE = (f"SELECT id, ts, task FROM {DB_TASK_TABLE} "
+                          "WHERE ts BETWEEN ? AND ? ORDER BY ts ASC")
+# Days are counted from the start of the range, which keeps the division
+# exact for dates before the epoch as well.
+_COUNT_TASKS_PER_DAY = (f"SELECT (ts - ?) / {MINUTES_PER_DAY} AS day, "
+                        f"COUNT(*) FROM {DB_TASK_TABLE} "
+                        "WHERE ts BETWEEN ? AND ? GROUP BY day ORDER BY day")
+# The full text index hands over the matching ids, so the cost follows the
+# number of matches rather than the size of the table.
+_SEARCH_BY_DATE = (f"SELECT id, ts, task FROM {DB_TASK_TABLE} "
+                   "WHERE ts BETWEEN ? AND ? AND id IN "
+                   f"(SELECT rowid FROM {DB_FTS_TABLE} "
+                   f"WHERE {DB_FTS_TABLE} MATCH ?) "
+                   "ORDER BY ts {order}, id {order} LIMIT ? OFFSET ?")
+# When most rows match, walking the ts index and probing the full text
+# index row by row reaches the first page long before all matches could be
+# fetched and sorted.
+_SEARCH_BY_DATE_PROBE = (f"SELECT id, ts, task FROM {DB_TASK_TABLE} "
+                         "WHERE ts BETWEEN ? AND ? AND EXISTS "
+                         f"(SELECT 1 FROM {DB_FTS_TABLE} "
+                         f"WHERE {DB_FTS_TABLE} MATCH ? "
+                         f"AND rowid = {DB_TASK_TABLE}.id) "
+                         "ORDER BY ts {order}, id {order} LIMIT ? OFFSET ?")
+_COUNT_MATCHES = (f"SELECT count(*) FROM (SELECT rowid FROM {DB_FTS_TABLE} "
+                  f"WHERE {DB_FTS_TABLE} MATCH ? LIMIT ?)")
+# A probe costs about a hundred times as much as fetching one match, so the
+# probe plan is used once matches^2 > _PROBE_COST * rows * wanted.
+_PROBE_COST = 100
+_SEARCH_BY_RANK = (f"SELECT t.id, t.ts, t.task FROM {DB_FTS_TABLE} f "
+                   f"JOIN {DB_TASK_TABLE} t ON t.id = f.rowid "
+                   f"WHERE f.{DB_FTS_TABLE} MATCH ? AND t.ts BETWEEN ? AND ? "
+                   "ORDER BY f.rank LIMIT ? OFFSET ?")
+# Without FTS5 every term has to appear in the description, in order.
+_SEARCH_BY_SCAN = (f"SELECT id, ts, task FROM {DB_TASK_TABLE} "
+                   "WHERE ts BETWEEN ? AND ? AND task LIKE ? ESCAPE '\\' "
+                   "ORDER BY ts {order}, id {order} LIMIT ? OFFSET ?")
+_DEFER_FTS = f"UPDATE {DB_FTS_SYNC_TABLE} SET deferred = ? WHERE id = 1"
+_MAX_TASK_ID = f"SELECT coalesce(max(id), 0) FROM {DB_TASK_TABLE}"
+_INDEX_TASKS_AFTER = (f"INSERT INTO {DB_FTS_TABLE} (rowid, task) "
+                      f"SELECT id, task FROM {DB_TASK_TABLE} WHERE id > ?")
+_HAS_FTS = ("SELECT 1 FROM sqlite_master "
+            f"WHERE type = 'table' AND name = '{DB_FTS_TABLE}'")
+_INSERT_RECURRENCE = (f"INSERT INTO {DB_RECURRENCE_TABLE} "
+                      "(ts, task, rule, until_ts) VALUES (?, ?, ?, ?)")
+_DELETE_RECURRENCE = f"DELETE FROM {DB_RECURRENCE_TABLE} WHERE id = ?"
+_DELETE_EXCEPTIONS = (f"DELETE FROM {DB_EXCEPTION_TABLE} "
+                      "WHERE recurrence_id = ?")
+_SELECT_RECURRENCE = (f"SELECT ts, rule FROM {DB_RECURRENCE_TABLE} "
+                      "WHERE id = ?")
+_SELECT_RECURRENCES = (f"SELECT id, ts, task, rule FROM {DB_RECURRENCE_TABLE} "
+                       "ORDER BY id")
+_UPSERT_EXCEPTION = (f"INSERT OR REPLACE INTO {DB_EXCEPTION_TABLE} "
+                     "(recurrence_id, ts, new_ts, new_task) "
+                     "VALUES (?, ?, ?, ?)")
+# Only rules that started before the end of the range and did not end
+# before its start are expanded, the rest of the table is never read.
+_SELECT_RECURRENCES_IN_RANGE = (f"SELECT id, ts, task, rule "
+                                f"FROM {DB_RECURRENCE_TABLE} "
+                                "WHERE ts <= ? "
+                                "AND (until_ts IS NULL OR until_ts >= ?)")
+# Exceptions hiding an occurrence in the range, and moved occurrences
+# landing in it.
+_SELECT_EXCEPTIONS_IN_RANGE = (f"SELECT e.recurrence_id, e.ts, e.new_ts, "
+                               "coalesce(e.new_task, r.task), "
+                               "e.new_ts IS NULL AND e.new_task IS NULL "
+                               f"FROM {DB_EXCEPTION_TABLE} e "
+                               f"JOIN {DB_RECURRENCE_TABLE} r "
+                               "ON r.id = e.recurrence_id "
+                               "WHERE e.ts BETWEEN ? AND ? "
+                               "OR e.new_ts BETWEEN ? AND ?")
+_INSERT_TASK_WITH_UID = (f"INSERT OR IGNORE INTO {DB_TASK_TABLE} "
+                         "(ts, task, uid) VALUES (?, ?, ?)")
+_INSERT_RECURRENCE_WITH_UID = (f"INSERT OR IGNORE INTO {DB_RECURRENCE_TABLE} "
+                               "(ts, task, rule, until_ts, uid) "
+                               "VALUES (?, ?, ?, ?, ?)")
+_SELECT_RECURRENCE_BY_UID = (f"SELECT id FROM {DB_RECURRENCE_TABLE} "
+                             "WHERE uid = ?")
+_INSERT_EXCEPTION = (f"INSERT OR IGNORE INTO {DB_EXCEPTION_TABLE} "
+                     "(recurrence_id, ts, new_ts, new_task) "
+                     "VALUES (?, ?, ?, ?)")
+_SELECT_IMPORT_OFFSET = (f"SELECT offset FROM {DB_IMPORT_TABLE} "
+                         "WHERE source = ? AND size = ? AND mtime_ns = ?")
+_SAVE_IMPORT_OFFSET = (f"INSERT OR REPLACE INTO {DB_IMPORT_TABLE} "
+                       "(source, size, mtime_ns, offset) VALUES (?, ?, ?, ?)")
+_DELETE_IMPORT_OFFSET = f"DELETE FROM {DB_IMPORT_TABLE} WHERE source = ?"
+_SELECT_TASK_EVENTS = (f"SELECT id, ts, task, uid FROM {DB_TASK_TABLE} "
+                       "WHERE ts BETWEEN ? AND ? ORDER BY ts ASC")
+_SELECT_RECURRENCE_EVENTS = (f"SELECT id, ts, task, rule, uid "
+                             f"FROM {DB_RECURRENCE_TABLE} "
+                             "WHERE ts <= ? "
+                             "AND (until_ts IS NULL OR until_ts >= ?) "
+                             "ORDER BY ts, id")
+_SELECT_EXCEPTIONS = (f"SELECT ts, new_ts, new_task FROM {DB_EXCEPTION_TABLE} "
+                      "WHERE recurrence_id = ? ORDER BY ts")
+_LOG_CHANGE = (f"INSERT INTO {DB_CHANGE_TABLE} (month, version) "
+               "SELECT ?, coalesce(max(version), 0) + 1 "
+               f"FROM {DB_CHANGE_TABLE} WHERE true ON CONFLICT (month) "
+               "DO UPDATE SET version = excluded.version")
+_SELECT_CHANGES_SINCE = (f"SELECT month, version FROM {DB_CHANGE_TABLE} "
+                         "WHERE version > ?")
+_MAX_CHANGE_VERSION = ("SELECT coalesce(max(version), 0) "
+                       f"FROM {DB_CHANGE_TABLE}")
+_DATA_VERSION = "PRAGMA data_version"
+# Logged by writes that may touch any month.
+_ANY_MONTH = "*"
+# Stays well below SQLITE_MAX_VARIABLE_NUMBER on every sqlite version.
+_MAX_IN_PARAMS = 500
+_MIN_TS = -(2 ** 63)
+_MAX_TS = 2 ** 63 - 1
+
+_CONFIG_COLUMNS = ("bg_color", "task_color", "task_title",
+                   "calendar_color", "cursor_color")
+
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF == sqlite3.SQLITE_BUSY
+    return "locked" in str(error) or "busy" in str(error)
+
+
+def _retry_on_busy(method: _F) -> _F:
+    # busy_timeout already makes sqlite wait for the lock, but some
+    # conflicts (a reader upgrading to a writer in WAL mode, a checkpoint
+    # racing a new connection) fail with SQLITE_BUSY straight away. Those
+    # are retried with jittered exponential backoff.
+    @functools.wraps(method)
+    def wrapper(self: "TaskRepository", *args: Any, **kwargs: Any) -> Any:
+        attempt = 0
+        while True:
+            try:
+                return method(self, *args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not _is_busy(e) or attempt >= self._busy_retries:
+                    raise
+                import random  # Only needed once contention happens.
+                time.sleep(BUSY_BACKOFF_S * 2 ** attempt
+                           * random.uniform(0.5, 1.5))
+                attempt += 1
+    return wrapper  # type: ignore[return-value]
+
+
+def _match_expression(query: str) -> str:
+    # Every word is quoted so user input never hits the FTS5 query syntax,
+    # a trailing * still asks for a prefix match.
+    return " ".join('"' + term.rstrip("*").replace('"', '""') + '"'
+                    + ("*" if term.endswith("*") else "")
+                    for term in query.split() if term.rstrip("*"))
+
+
+def _like_pattern(query: str) -> str:
+    words = query.replace("*", " ").split()
+    terms = (word.replace("\\", "\\\\").replace("%", "\\%")
+             .replace("_", "\\_") for word in words)
+    return "%" + "%".join(terms) + "%"
+
+
+# (uid, date, description, rule, cancelled dates, replaced date), the
+# fields of an iCalendar event.
+CalendarEvent = tuple[str, str, str, Optional[str], tuple[str, ...],
+                      Optional[str]]
+
+
+def _config(row: Optional[tuple[Any, ...]]) -> dict[str, int]:
+    # The colours only count once every one of them is set.
+    colors = row[:len(_CONFIG_COLUMNS)] if row else (None,)
+    if None in colors:
+        return {}
+    return dict(zip(_CONFIG_COLUMNS, colors))
+
+
+def _log_settings(row: Optional[tuple[Any, ...]]) -> dict[str, str]:
+    if row is None:
+        return {}
+    return {key: value for key, value
+            in zip(("path", "level"), row[len(_CONFIG_COLUMNS):])
+            if value is not None}
+
+
+def _batched(rows: Iterable[tuple[str, str]],
+             size: int) -> Iterator[list[tuple[str, str]]]:
+    it = iter(rows)
+    while batch := list(islice(it, size)):
+        yield batch
 
 
 class TaskRepository:
 
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str,
+                 cached_statements: int = STATEMENT_CACHE_SIZE,
+                 journal_mode: Optional[str] = DEFAULT_JOURNAL_MODE,
+                 synchronous: Optional[str] = DEFAULT_SYNCHRONOUS,
+                 busy_timeout: int = BUSY_TIMEOUT_MS,
+                 busy_retries: int = BUSY_RETRIES,
+                 snapshot: bool = False):
+        if journal_mode is not None and journal_mode not in JOURNAL_MODES:
+            raise ValueError(f"Unknown journal mode {journal_mode!r}")
+        if synchronous is not None and synchronous not in SYNCHRONOUS_LEVELS:
+            raise ValueError(f"Unknown synchronous level {synchronous!r}")
         self._db_path = db_path
+        self._cached_statements = cached_statements
+        self._journal_mode = journal_mode
+        self._synchronous = synchronous
+        self._busy_timeout = busy_timeout
+        self._busy_retries = busy_retries
+        # A snapshot is a read-only copy of the database in memory, shared
+        # by the connections of every thread and filled by the first one.
+        self._snapshot = snapshot
+        self._snapshot_ready = False
+        # One long lived connection per calling thread, all of them tracked
+        # in the pool so close() can shut every one down.
+        self._local = threading.local()
+        self._pool: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._listeners: list[Callable[[Optional[str]], None]] = []
+        self._fts: Optional[bool] = None
+        # (PRAGMA data_version, change version) seen by the last poll.
+        self._seen: Optional[tuple[int, int]] = None
+
+    def __enter__(self) -> "TaskRepository":
+        return self
+
+    def __exit__(self,
+                 exc_type: Optional[type[BaseException]],
+                 exc: Optional[BaseException],
+                 tb: Optional[TracebackType]) -> None:
+        self.close()
 
     def _connect(self) -> sqlite3.Connection:
-        return sqlite3.connect(self._db_path)
+        con = getattr(self._local, "con", None)
+        if con is None:
+            if self._snapshot:
+                con = sqlite3.connect(
+                    f"file:cli_calender_snapshot_{id(self)}"
+                    "?mode=memory&cache=shared", uri=True,
+                    cached_statements=self._cached_statements,
+                    check_same_thread=False)
+            else:
+                con = sqlite3.connect(
+                    self._db_path, timeout=self._busy_timeout / 1000,
+                    cached_statements=self._cached_statements,
+                    check_same_thread=False)
+            try:
+                self._configure(con)
+            except BaseException:
+                con.close()
+                raise
+            with self._lock:
+                self._pool.append(con)
+            self._local.con = con
+        return con
 
-    def init_db(self) -> None:
+    def _configure(self, con: sqlite3.Connection) -> None:
+        if self._snapshot:
+            self._load_snapshot(con)
+            return
+        if self._journal_mode is not None:
+            # The journal mode is stored in the database file, switching is
+            # only attempted when it differs because it needs a lock.
+            current = con.execute("PRAGMA journal_mode").fetchone()[0]
+            if current != self._journal_mode:
+                con.execute(f"PRAGMA journal_mode = {self._journal_mode}")
+        if self._synchronous is not None:
+            con.execute(f"PRAGMA synchronous = {self._synchronous}")
+
+    def _load_snapshot(self, con: sqlite3.Connection) -> None:
+        # The file is only read once, by the backup API, and opened
+        # read-only for it. Browsing the copy never touches the disk or
+        # takes a file lock, and nothing written elsewhere shows up.
+        with self._lock:
+            if not self._snapshot_ready:
+                from urllib.parse import quote
+                source = sqlite3.connect(
+                    f"file:{quote(os.path.abspath(self._db_path))}?mode=ro",
+                    uri=True)
+                try:
+                    source.backup(con)
+                finally:
+                    source.close()
+                # An archive with an older schema is upgraded in memory,
+                # the file itself stays as it is.
+                migrations.migrate(con)
+                self._snapshot_ready = True
+        con.execute("PRAGMA query_only = ON")
+
+    def close(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, []
+            self._local = threading.local()
+            # The in-memory copy is gone with its last connection.
+            self._snapshot_ready = False
+        for con in pool:
+            con.close()
+
+    def subscribe(self, listener: Callable[[Optional[str]], None]) -> None:
+        # Listeners are called with the date of a changed task after every
+        # successful write, or with None when any date may have changed.
+        self._listeners.append(listener)
+
+    def _notify(self, date: Optional[str]) -> None:
+        for listener in self._listeners:
+            listener(date)
+
+    @staticmethod
+    def _log_change(cur: sqlite3.Cursor, date: Optional[str]) -> None:
+        # Part of the writing transaction, so other processes see the change
+        # and its log entry together.
+        cur.execute(_LOG_CHANGE, (_ANY_MONTH if date is None else date[0:7],))
+
+    def watch(self) -> None:
+        # poll_changes reports what other connections commit after this.
+        con = self._connect()
+        self._seen = (con.execute(_DATA_VERSION).fetchone()[0],
+                      con.execute(_MAX_CHANGE_VERSION).fetchone()[0])
+
+    @_retry_on_busy
+    def poll_changes(self) -> bool:
+        # Cheap enough for every idle moment: data_version only moves when
+        # another connection committed. Listeners are told about every
+        # month written since the last poll, or about all of them when the
+        # writer did not log its changes (the sqlite3 shell, say). Returns
+        # whether anything changed.
+        if self._seen is None:
+            self.watch()
+            return False
         con = self._connect()
         cur = con.cursor()
         try:
-            cur.execute(f"CREATE TABLE IF NOT EXISTS {DB_TASK_TABLE} ("
-                        " date TEXT UNIQUE NOT NULL, task TEXT NOT NULL)")
-            cur.execute(f"CREATE TABLE IF NOT EXISTS {DB_CONFIG_TABLE} ("
-                        " id INTEGER PRIMARY KEY CHECK (id = 1),"
-                        " bg_color INTEGER,"
-                        " task_color INTEGER,"
-                        " task_title INTEGER,"
-                        " calendar_color INTEGER,"
-                        " cursor_color INTEGER)")
-            con.commit()
+            # One read transaction, so the version and the log agree.
+            cur.execute("BEGIN")
+            data_version = cur.execute(_DATA_VERSION).fetchone()[0]
+            rows = [] if data_version == self._seen[0] else cur.execute(
+                _SELECT_CHANGES_SINCE, (self._seen[1],)).fetchall()
         finally:
+            con.commit()
             cur.close()
-            con.close()
+        if data_version == self._seen[0]:
+            return False
+        self._seen = (data_version,
+                      max((version for _, version in rows),
+                          default=self._seen[1]))
+        months = {month for month, _ in rows}
+        if not months or _ANY_MONTH in months:
+            self._notify(None)
+        else:
+            for month in sorted(months):
+                self._notify(f"{month}-01 00:00:00")
+        return True
 
-    def load_config(self) -> dict[str, int]:
-        conf: dict[str, int] = {}
-        query = (f"SELECT * FROM {DB_CONFIG_TABLE} "
-                 "WHERE id = 1 "
-                 "AND bg_color IS NOT NULL "
-                 "AND task_color IS NOT NULL "
-                 "AND task_title IS NOT NULL "
-                 "AND calendar_color IS NOT NULL "
-                 "AND cursor_color IS NOT NULL")
+    @_retry_on_busy
+    def init_db(self) -> None:
+        migrations.migrate(self._connect())
+
+    @_retry_on_busy
+    def bootstrap(self, start: str, end: str) -> Bootstrap:
+        # Everything the calender needs for its first frame, read in one
+        # transaction: the schema check, the config row and the entries
+        # between start and end. On a network filesystem every transaction
+        # costs a round trip for its locks, separate queries paid one each.
+        # Only an out of date schema takes the write lock to migrate.
         con = self._connect()
         cur = con.cursor()
         try:
-            res = cur.execute(query).fetchone()
-            if res:
-                columns = ["bg_color", "task_color", "task_title",
-                           "calendar_color", "cursor_color"]
-                conf = {column: res[i] for i, column in enumerate(columns, start=1)
-                        if res[i] is not None}
+            cur.execute("BEGIN")
+            if migrations.schema_version(con) < migrations.SCHEMA_VERSION:
+                con.commit()
+                migrations.migrate(con)
+                cur.execute("BEGIN")
+            data_version = cur.execute(_DATA_VERSION).fetchone()[0]
+            row = cur.execute(_SELECT_CONFIG_ROW).fetchone()
+            self._seen = (data_version,
+                          cur.execute(_MAX_CHANGE_VERSION).fetchone()[0])
+            # Same connection, so still the same transaction.
+            entries = self.entries(start, end)
         finally:
+            con.commit()
             cur.close()
-            con.close()
-        return conf
+        return Bootstrap(_config(row), _log_settings(row), entries)
+
+    def _config_row(self) -> Optional[tuple[Any, ...]]:
+        cur = self._connect().cursor()
+        try:
+            return cur.execute(_SELECT_CONFIG_ROW).fetchone()
+        finally:
+            cur.close()
+
+    @_retry_on_busy
+    def load_config(self) -> dict[str, int]:
+        return _config(self._config_row())
+
+    @_retry_on_busy
+    def load_log_settings(self) -> dict[str, str]:
+        return _log_settings(self._config_row())
 
-    def save_config(self, updates: dict[str, int]) -> None:
+    @_retry_on_busy
+    def save_config(self, updates: dict[str, int | str]) -> None:
         con = self._connect()
         cur = con.cursor()
         try:
-            cur.execute(f"INSERT OR IGNORE INTO {DB_CONFIG_TABLE} "
-                        "(id) VALUES (1);")
+            cur.execute(_INSERT_CONFIG_ROW)
             if updates:
                 set_clause = ", ".join(f"{key} = ?" for key in updates.keys())
                 values = list(updates.values())
@@ -70,45 +471,514 @@ class TaskRepository:
                 """
                 cur.execute(query, values)
             con.commit()
+        except BaseException:
+            con.rollback()
+            raise
         finally:
             cur.close()
-            con.close()
 
-    def add_task(self, date: str, task_desc: str) -> None:
+    @_retry_on_busy
+    def add_task(self, date: str, task_desc: str) -> int:
         con = self._connect()
         cur = con.cursor()
         try:
-            cur.execute(f"INSERT INTO {DB_TASK_TABLE} values(?, ?)",
-                        (date, task_desc))
+            cur.execute(_INSERT_TASK, (to_minutes(date), task_desc))
+            task_id = cur.lastrowid
+            assert task_id is not None  # set by every INSERT
+            self._log_change(cur, date)
             con.commit()
+        except BaseException:
+            con.rollback()
+            raise
         finally:
             cur.close()
-            con.close()
+        self._notify(date)
+        return task_id
+
+    def add_tasks(self, rows: Iterable[tuple[str, str]],
+                  batch_size: int = DEFAULT_BATCH_SIZE
+                  ) -> tuple[int, list[tuple[str, str]]]:
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+        inserted = 0
+        conflicts: list[tuple[str, str]] = []
+        months: set[str] = set()
+        con = self._connect()
+        cur = con.cursor()
+        try:
+            self._begin_immediate(cur)
+            last_id = self._defer_fts(cur)
+            for batch in _batched(rows, batch_size):
+                # Any number of tasks may share a minute, only an exact
+                # repeat of a task that is already there is a conflict.
+                fresh: dict[tuple[int, str], str] = {}
+                for date, task_desc in batch:
+                    key = (to_minutes(date), task_desc)
+                    if key in fresh:
+                        conflicts.append((date, task_desc))
+                    else:
+                        fresh[key] = date
+                minutes = list({ts for ts, _ in fresh})
+                for key in self._existing_tasks(cur, minutes):
+                    if key in fresh:
+                        conflicts.append((fresh.pop(key), key[1]))
+                cur.executemany(_INSERT_TASK, fresh)
+                inserted += len(fresh)
+                months.update(date[0:7] for date in fresh.values())
+            self._index_deferred(cur, last_id)
+            cur.executemany(_LOG_CHANGE, ((month,) for month in months))
+            con.commit()
+        except BaseException:
+            con.rollback()
+            raise
+        finally:
+            cur.close()
+        if inserted:
+            self._notify(None)
+        return inserted, conflicts
+
+    def _defer_fts(self, cur: sqlite3.Cursor) -> Optional[int]:
+        # Fired once per row the insert trigger flushes the full text index
+        # every time, bulk inserts index their rows in one statement at the
+        # end instead. New ids are always above the current maximum, which
+        # is returned. None without a full text index.
+        if not self._has_fts(cur.connection):
+            return None
+        cur.execute(_DEFER_FTS, (1,))
+        return cur.execute(_MAX_TASK_ID).fetchone()[0]
+
+    @staticmethod
+    def _index_deferred(cur: sqlite3.Cursor, last_id: Optional[int]) -> None:
+        if last_id is not None:
+            cur.execute(_INDEX_TASKS_AFTER, (last_id,))
+            cur.execute(_DEFER_FTS, (0,))
+
+    def import_events(self, events: Iterable[CalendarEvent],
+                      checkpoint: Optional[tuple[str, int, int, int]] = None
+                      ) -> int:
+        # One transaction per call. Events whose uid is already there are
+        # skipped, so an import can be repeated. checkpoint is (source,
+        # size, mtime_ns, offset) and is saved with the events, a retry
+        # after a failure continues from there. Returns the number of
+        # events added.
+        added = 0
+        con = self._connect()
+        cur = con.cursor()
+        try:
+            self._begin_immediate(cur)
+            last_id = self._defer_fts(cur)
+            for uid, date, task_desc, rule, exdates, replaced in events:
+                if replaced is not None:
+                    added += self._import_override(cur, uid, date, task_desc,
+                                                   replaced)
+                elif rule is not None:
+                    added += self._import_recurrence(cur, uid, date,
+                                                     task_desc, rule, exdates)
+                else:
+                    cur.execute(_INSERT_TASK_WITH_UID,
+                                (to_minutes(date), task_desc, uid))
+                    added += cur.rowcount
+            self._index_deferred(cur, last_id)
+            if added:
+                self._log_change(cur, None)
+            if checkpoint is not None:
+                cur.execute(_SAVE_IMPORT_OFFSET, checkpoint)
+            con.commit()
+        except BaseException:
+            con.rollback()
+            raise
+        finally:
+            cur.close()
+        if added:
+            self._notify(None)
+        return added
+
+    @staticmethod
+    def _import_recurrence(cur: sqlite3.Cursor, uid: str, date: str,
+                           task_desc: str, rule: str,
+                           exdates: tuple[str, ...]) -> int:
+        parsed = parse_rule(rule)
+        last = last_occurrence(datetime.fromisoformat(date), parsed)
+        cur.execute(_INSERT_RECURRENCE_WITH_UID,
+                    (to_minutes(date), task_desc, format_rule(parsed),
+                     None if last is None else to_minutes(last), uid))
+        if not cur.rowcount:
+            return 0
+        rule_id = cur.lastrowid
+        cur.executemany(_INSERT_EXCEPTION,
+                        ((rule_id, to_minutes(exdate), None, None)
+                         for exdate in exdates))
+        return 1
+
+    @staticmethod
+    def _import_override(cur: sqlite3.Cursor, uid: str, date: str,
+                         task_desc: str, replaced: str) -> int:
+        # Replaces one occurrence of an already imported recurring event.
+        row = cur.execute(_SELECT_RECURRENCE_BY_UID, (uid,)).fetchone()
+        if row is None:
+            return 0
+        cur.execute(_INSERT_EXCEPTION, (row[0], to_minutes(replaced),
+                                        to_minutes(date), task_desc))
+        return cur.rowcount
+
+    @_retry_on_busy
+    def import_offset(self, source: str, size: int, mtime_ns: int) -> int:
+        # Where an interrupted import of this exact file stopped, 0 when
+        # the file changed since or was never imported.
+        row = self._connect().execute(_SELECT_IMPORT_OFFSET,
+                                      (source, size, mtime_ns)).fetchone()
+        return 0 if row is None else row[0]
+
+    @_retry_on_busy
+    def finish_import(self, source: str) -> None:
+        con = self._connect()
+        try:
+            con.execute(_DELETE_IMPORT_OFFSET, (source,))
+            con.commit()
+        except BaseException:
+            con.rollback()
+            raise
+
+    def iter_calendar(self, start: Optional[str] = None,
+                      end: Optional[str] = None
+                      ) -> Iterator[CalendarEvent]:
+        # Tasks stream off the cursor in date order, followed by the
+        # recurring tasks that have occurrences in the range.
+        bounds = (_MIN_TS if start is None else to_minutes(start),
+                  _MAX_TS if end is None else to_minutes(end))
+        con = self._connect()
+        cur = con.cursor()
+        try:
+            cur.execute(_SELECT_TASK_EVENTS, bounds)
+            for task_id, ts, task_desc, uid in cur:
+                yield (uid or f"task-{task_id}@cli_calender",
+                       from_minutes(ts), task_desc, None, (), None)
+            rules = cur.execute(_SELECT_RECURRENCE_EVENTS,
+                                bounds[::-1]).fetchall()
+            for rule_id, ts, task_desc, rule, uid in rules:
+                uid = uid or f"rule-{rule_id}@cli_calender"
+                changed = cur.execute(_SELECT_EXCEPTIONS,
+                                      (rule_id,)).fetchall()
+                cancelled = tuple(from_minutes(row[0]) for row in changed
+                                  if row[1] is None and row[2] is None)
+                yield (uid, from_minutes(ts), task_desc, rule, cancelled,
+                       None)
+                for original, new_ts, new_task in changed:
+                    if new_ts is not None or new_task is not None:
+                        yield (uid, from_minutes(original if new_ts is None
+                                                 else new_ts),
+                               new_task or task_desc, None, (),
+                               from_minutes(original))
+        finally:
+            cur.close()
+
+    @_retry_on_busy
+    def _begin_immediate(self, cur: sqlite3.Cursor) -> None:
+        # Taking the write lock before any row is read means a streamed
+        # import never has to be retried half way through.
+        cur.execute("BEGIN IMMEDIATE")
 
+    @staticmethod
+    def _existing_tasks(cur: sqlite3.Cursor,
+                        minutes: list[int]) -> list[tuple[int, str]]:
+        found: list[tuple[int, str]] = []
+        for i in range(0, len(minutes), _MAX_IN_PARAMS):
+            chunk = minutes[i:i + _MAX_IN_PARAMS]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = cur.execute(f"SELECT ts, task FROM {DB_TASK_TABLE} "
+                               f"WHERE ts IN ({placeholders})", chunk)
+            found.extend((row[0], row[1]) for row in rows)
+        return found
+
+    @_retry_on_busy
     def delete_task(self, date: str) -> int:
         con = self._connect()
         cur = con.cursor()
         try:
-            cur.execute(f"DELETE FROM {DB_TASK_TABLE} WHERE date == ?",
-                        (date,))
+            cur.execute(_DELETE_TASK, (to_minutes(date),))
+            rowcount = cur.rowcount
+            if rowcount:
+                self._log_change(cur, date)
             con.commit()
-            return cur.rowcount
+        except BaseException:
+            con.rollback()
+            raise
         finally:
             cur.close()
-            con.close()
+        if rowcount:
+            self._notify(date)
+        return rowcount
+
+    @_retry_on_busy
+    def delete_task_by_id(self, task_id: int) -> int:
+        con = self._connect()
+        cur = con.cursor()
+        try:
+            rows = cur.execute(_DELETE_TASK_BY_ID, (task_id,)).fetchall()
+            if rows:
+                self._log_change(cur, from_minutes(rows[0][0]))
+            con.commit()
+        except BaseException:
+            con.rollback()
+            raise
+        finally:
+            cur.close()
+        if not rows:
+            return 0
+        self._notify(from_minutes(rows[0][0]))
+        return 1
+
+    @_retry_on_busy
+    def delete_tasks_in_range(self, start: str, end: str) -> int:
+        con = self._connect()
+        cur = con.cursor()
+        try:
+            cur.execute(_DELETE_TASKS_IN_RANGE,
+                        (to_minutes(start), to_minutes(end)))
+            rowcount = cur.rowcount
+            if rowcount:
+                self._log_change(cur, None)
+            con.commit()
+        except BaseException:
+            con.rollback()
+            raise
+        finally:
+            cur.close()
+        if rowcount:
+            self._notify(None)
+        return rowcount
+
+    @_retry_on_busy
+    def add_recurrence(self, date: str, task_desc: str, rule: str) -> int:
+        parsed = parse_rule(rule)
+        first = datetime.fromisoformat(date)
+        last = last_occurrence(first, parsed)
+        con = self._connect()
+        cur = con.cursor()
+        try:
+            cur.execute(_INSERT_RECURRENCE,
+                        (to_minutes(first), task_desc, format_rule(parsed),
+                         None if last is None else to_minutes(last)))
+            rule_id = cur.lastrowid
+            assert rule_id is not None  # set by every INSERT
+            self._log_change(cur, None)
+            con.commit()
+        except BaseException:
+            con.rollback()
+            raise
+        finally:
+            cur.close()
+        self._notify(None)
+        return rule_id
 
+    @_retry_on_busy
+    def delete_recurrence(self, rule_id: int) -> int:
+        con = self._connect()
+        cur = con.cursor()
+        try:
+            cur.execute(_DELETE_EXCEPTIONS, (rule_id,))
+            cur.execute(_DELETE_RECURRENCE, (rule_id,))
+            rowcount = cur.rowcount
+            if rowcount:
+                self._log_change(cur, None)
+            con.commit()
+        except BaseException:
+            con.rollback()
+            raise
+        finally:
+            cur.close()
+        if rowcount:
+            self._notify(None)
+        return rowcount
+
+    @_retry_on_busy
+    def add_exception(self, rule_id: int, date: str,
+                      new_date: Optional[str] = None,
+                      new_task: Optional[str] = None) -> int:
+        # Without new_date and new_task the occurrence at date is cancelled.
+        # Returns 0 when the rule has no occurrence at date.
+        when = datetime.fromisoformat(date)
+        con = self._connect()
+        cur = con.cursor()
+        try:
+            row = cur.execute(_SELECT_RECURRENCE, (rule_id,)).fetchone()
+            if row is None or not any(occurrences(
+                    datetime.fromisoformat(from_minutes(row[0])),
+                    parse_rule(row[1]), when, when)):
+                return 0
+            cur.execute(_UPSERT_EXCEPTION,
+                        (rule_id, to_minutes(when),
+                         None if new_date is None else to_minutes(new_date),
+                         new_task))
+            self._log_change(cur, None)
+            con.commit()
+        except BaseException:
+            con.rollback()
+            raise
+        finally:
+            cur.close()
+        self._notify(None)
+        return 1
+
+    def iter_recurrences(self) -> Iterator[tuple[int, str, str, str]]:
+        cur = self._connect().cursor()
+        try:
+            cur.execute(_SELECT_RECURRENCES)
+            for row in cur:
+                yield row[0], from_minutes(row[1]), row[2], row[3]
+        finally:
+            cur.close()
+
+    def _occurrence_minutes(self, low: int,
+                            high: int) -> list[tuple[int, int, str]]:
+        # Expands the rules for this range only, nothing per occurrence is
+        # ever stored. (minute, rule id, description), sorted.
+        cur = self._connect().cursor()
+        try:
+            rules = cur.execute(_SELECT_RECURRENCES_IN_RANGE,
+                                (high, low)).fetchall()
+            changed = cur.execute(_SELECT_EXCEPTIONS_IN_RANGE,
+                                  (low, high, low, high)).fetchall()
+        finally:
+            cur.close()
+        hidden = {(rule_id, ts) for rule_id, ts, *_ in changed}
+        found: list[tuple[int, int, str]] = []
+        window = (datetime.fromisoformat(from_minutes(low)),
+                  datetime.fromisoformat(from_minutes(high)))
+        for rule_id, ts, task_desc, rule in rules:
+            first = datetime.fromisoformat(from_minutes(ts))
+            for when in occurrences(first, parse_rule(rule), *window):
+                minute = to_minutes(when)
+                if (rule_id, minute) not in hidden:
+                    found.append((minute, rule_id, task_desc))
+        for rule_id, ts, new_ts, task_desc, cancelled in changed:
+            minute = ts if new_ts is None else new_ts
+            if not cancelled and low <= minute <= high:
+                found.append((minute, rule_id, task_desc))
+        found.sort()
+        return found
+
+    @_retry_on_busy
+    def occurrences(self, start: str,
+                    end: str) -> list[tuple[int, str, str]]:
+        # Sorted by date, then by rule.
+        return [(rule_id, from_minutes(minute), task_desc)
+                for minute, rule_id, task_desc in self._occurrence_minutes(
+                    to_minutes(start), to_minutes(end))]
+
+    @_retry_on_busy
+    def entries(self, start: str, end: str) -> list[tuple[int, str]]:
+        # Tasks and occurrences between start and end as (minute,
+        # description) in date order, tasks first within a minute. Dates
+        # stay integers, MonthCache never needs them as text.
+        low, high = to_minutes(start), to_minutes(end)
+        cur = self._connect().cursor()
+        try:
+            tasks = [(ts, task_desc) for _, ts, task_desc in cur.execute(
+                _SELECT_TASKS_IN_RANGE, (low, high))]
+        finally:
+            cur.close()
+        expanded = self._occurrence_minutes(low, high)
+        if not expanded:
+            return tasks
+        return list(heapq.merge(
+            tasks, ((minute, task_desc) for minute, _, task_desc in expanded),
+            key=lambda entry: entry[0]))
+
+    def iter_occurrences(self, start: str, end: str,
+                         days: int = OCCURRENCE_WINDOW_DAYS
+                         ) -> Iterator[tuple[int, str, str]]:
+        # Expanded one window at a time, memory follows the window and not
+        # the length of the range.
+        low, high = to_minutes(start), to_minutes(end)
+        step = days * MINUTES_PER_DAY
+        while low <= high:
+            yield from self.occurrences(
+                from_minutes(low), from_minutes(min(high, low + step - 1)))
+            low += step
+
+    @_retry_on_busy
     def tasks_for_day(self, date: datetime) -> list[tuple[str, str]]:
-        day_begin = date.strftime("%Y-%m-%d") + " 00:00:00"
-        day_end = date.strftime("%Y-%m-%d") + " 23:59:00"
         con = self._connect()
         cur = con.cursor()
         try:
-            rows = cur.execute(
-                f"SELECT date, task from {DB_TASK_TABLE} "
-                "WHERE date > ? AND date < ? ORDER BY date ASC",
-                (day_begin, day_end)
-            ).fetchall()
-            return [(row[0], row[1]) for row in rows]
+            rows = cur.execute(_SELECT_TASKS_IN_RANGE,
+                               day_range(date)).fetchall()
+            return [(from_minutes(row[1]), row[2]) for row in rows]
         finally:
             cur.close()
-            con.close()
+
+    def iter_tasks(self, start: Optional[str] = None,
+                   end: Optional[str] = None
+                   ) -> Iterator[tuple[int, str, str]]:
+        con = self._connect()
+        cur = con.cursor()
+        try:
+            cur.execute(_SELECT_TASKS_IN_RANGE,
+                        (_MIN_TS if start is None else to_minutes(start),
+                         _MAX_TS if end is None else to_minutes(end)))
+            for row in cur:
+                yield row[0], from_minutes(row[1]), row[2]
+        finally:
+            cur.close()
+
+    def _has_fts(self, con: sqlite3.Connection) -> bool:
+        if self._fts is None:
+            self._fts = con.execute(_HAS_FTS).fetchone() is not None
+        return self._fts
+
+    @staticmethod
+    def _dense(con: sqlite3.Connection, match: str, wanted: int) -> bool:
+        rows = con.execute(_MAX_TASK_ID).fetchone()[0]
+        cap = math.isqrt(_PROBE_COST * rows * wanted) + 1
+        return con.execute(_COUNT_MATCHES, (match, cap)).fetchone()[0] >= cap
+
+    def search(self, query: str, start: Optional[str] = None,
+               end: Optional[str] = None, limit: Optional[int] = None,
+               offset: int = 0, order: str = "date",
+               reverse: bool = False) -> Iterator[tuple[int, str, str]]:
+        # Rows stream like iter_tasks, a busy error surfaces while they are
+        # iterated and is not retried.
+        if order not in SEARCH_ORDERS:
+            raise ValueError(f"Unknown search order {order!r}")
+        if reverse and order == "rank":
+            raise ValueError("Matches by rank can not be listed in reverse")
+        if not query.replace("*", " ").split():
+            return
+        con = self._connect()
+        bounds = (_MIN_TS if start is None else to_minutes(start),
+                  _MAX_TS if end is None else to_minutes(end))
+        page = (-1 if limit is None else limit, offset)
+        direction = "DESC" if reverse else "ASC"
+        if not self._has_fts(con):
+            sql = _SEARCH_BY_SCAN.format(order=direction)
+            params: tuple[Any, ...] = (*bounds, _like_pattern(query), *page)
+        elif order == "rank":
+            sql = _SEARCH_BY_RANK
+            params = (_match_expression(query), *bounds, *page)
+        else:
+            match = _match_expression(query)
+            dense = limit is not None and self._dense(con, match,
+                                                      limit + offset)
+            sql = (_SEARCH_BY_DATE_PROBE if dense
+                   else _SEARCH_BY_DATE).format(order=direction)
+            params = (*bounds, match, *page)
+        cur = con.cursor()
+        try:
+            cur.execute(sql, params)
+            for row in cur:
+                yield row[0], from_minutes(row[1]), row[2]
+        finally:
+            cur.close()
+
+    @_retry_on_busy
+    def task_counts(self, start: str, end: str) -> list[tuple[str, int]]:
+        first = to_minutes(start)
+        cur = self._connect().cursor()
+        try:
+            rows = cur.execute(_COUNT_TASKS_PER_DAY,
+                               (first, first, to_minutes(end))).fetchall()
+        finally:
+            cur.close()
+        return [(from_minutes(first + day * MINUTES_PER_DAY)[:10], count)
+                for day, count in rows]
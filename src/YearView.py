@@ -0,0 +1,165 @@
+import calendar
+import logging
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any
+from typing import Mapping
+from typing import Optional
+
+from constants import HEAT_THRESHOLDS
+from constants import YEAR_CACHE_SIZE
+from MonthGrid import month_grid
+from storage import Storage
+
+logger = logging.getLogger(__name__)
+
+Day = tuple[int, int]  # (month, day)
+
+# Every month block is 7 cells of 2 digits plus a space wide, and a title,
+# the weekday header and up to 6 weeks high.
+_BLOCK_WIDTH = 22
+_BLOCK_HEIGHT = 9
+_TOP = 2
+_LEFT = 4
+
+
+class YearView:
+
+    def __init__(self, repo: Storage, curses_api: Any,
+                 firstweekday: int = 0, capacity: int = YEAR_CACHE_SIZE):
+        self._repo = repo
+        self._curses = curses_api
+        self._text_cal = calendar.TextCalendar(firstweekday)
+        self._capacity = capacity
+        self._years: OrderedDict[int, dict[Day, int]] = OrderedDict()
+        # (year, screen size) painted last and the cell under the cursor.
+        self._layout: Optional[tuple[int, tuple[int, int]]] = None
+        self._cursor: Optional[Day] = None
+        self.loads = 0
+        repo.subscribe(self._on_change)
+
+    def counts(self, year: int) -> dict[Day, int]:
+        if year not in self._years:
+            # One aggregate query for the whole year instead of a lookup
+            # per day.
+            start = f"{year:04d}-01-01 00:00:00"
+            end = f"{year:04d}-12-31 23:59:59"
+            counts = {(int(day[5:7]), int(day[8:10])): count
+                      for day, count in self._repo.task_counts(start, end)}
+            for _, date, _ in self._repo.occurrences(start, end):
+                key = (int(date[5:7]), int(date[8:10]))
+                counts[key] = counts.get(key, 0) + 1
+            self._years[year] = counts
+            self.loads += 1
+            logger.debug("Loaded task counts for %d", year)
+            while len(self._years) > self._capacity:
+                self._years.popitem(last=False)
+        self._years.move_to_end(year)
+        return self._years[year]
+
+    def _on_change(self, date: Optional[str]) -> None:
+        if date is None:
+            self._years.clear()
+        else:
+            self._years.pop(int(date[0:4]), None)
+        self._layout = None
+
+    def invalidate(self) -> None:
+        self._layout = None
+
+    def columns(self, width: int) -> int:
+        return max(1, min(6, (width - _LEFT) // _BLOCK_WIDTH))
+
+    def cell(self, year: int, month: int, day: int,
+             width: int) -> tuple[int, int]:
+        columns = self.columns(width)
+        top = _TOP + (month - 1) // columns * _BLOCK_HEIGHT + 2
+        left = _LEFT + (month - 1) % columns * _BLOCK_WIDTH
+        row, col = month_grid(year, month,
+                              self._text_cal.firstweekday).cell_of(day)
+        return top + row, left + col * 3
+
+    def shade(self, count: int, config: Mapping[str, int]) -> int:
+        level = bisect_right(HEAT_THRESHOLDS, count)
+        if level == 0:
+            return self._curses.color_pair(config["calendar_color"])
+        attrs = self._curses.color_pair(config["task_color"])
+        if level >= 2:
+            attrs |= self._curses.A_BOLD
+        if level >= 3:
+            attrs |= self._curses.A_UNDERLINE
+        if level >= 4:
+            attrs |= self._curses.A_REVERSE
+        return attrs
+
+    def draw(self, stdscr: Any, date: datetime,
+             config: Mapping[str, int]) -> None:
+        size = stdscr.getmaxyx()
+        counts = self.counts(date.year)
+        layout = (date.year, size)
+        if self._layout != layout:
+            self._draw_year(stdscr, date.year, size, counts, config)
+            self._layout = layout
+        elif self._cursor is not None:
+            self._draw_day(stdscr, date.year, self._cursor, size, counts,
+                           config, selected=False)
+        self._cursor = (date.month, date.day)
+        self._draw_day(stdscr, date.year, self._cursor, size, counts, config,
+                       selected=True)
+        stdscr.noutrefresh()
+
+    def _draw_year(self, stdscr: Any, year: int, size: tuple[int, int],
+                   counts: dict[Day, int], config: Mapping[str, int]) -> None:
+        stdscr.erase()
+        max_y, max_x = size
+        columns = self.columns(max_x)
+        title_attrs = self._curses.color_pair(config["task_title"])
+        attrs = self._curses.color_pair(config["calendar_color"])
+        stdscr.addstr(0, _LEFT, str(year), title_attrs)
+        header = self._text_cal.formatweekheader(2)
+        for month in range(1, 13):
+            top = _TOP + (month - 1) // columns * _BLOCK_HEIGHT
+            left = _LEFT + (month - 1) % columns * _BLOCK_WIDTH
+            if top + 1 >= max_y - 1 or left + len(header) >= max_x:
+                continue
+            title = self._text_cal.formatmonthname(year, month, len(header),
+                                                   withyear=False)
+            stdscr.addstr(top, left, title, title_attrs)
+            stdscr.addstr(top + 1, left, header, attrs)
+            grid = month_grid(year, month, self._text_cal.firstweekday)
+            for day in range(1, grid.last_day + 1):
+                self._draw_day(stdscr, year, (month, day), size, counts,
+                               config, selected=False)
+        self._draw_legend(stdscr, columns, size, config)
+
+    def _draw_day(self, stdscr: Any, year: int, day: Day,
+                  size: tuple[int, int], counts: dict[Day, int],
+                  config: Mapping[str, int], selected: bool) -> None:
+        max_y, max_x = size
+        y, x = self.cell(year, day[0], day[1], max_x)
+        if y >= max_y - 1 or x + 2 >= max_x:
+            return
+        if selected:
+            attrs = self._curses.color_pair(config["cursor_color"]) \
+                | self._curses.A_STANDOUT
+        else:
+            attrs = self.shade(counts.get(day, 0), config)
+        stdscr.addstr(y, x, f"{day[1]:>2}", attrs)
+
+    def _draw_legend(self, stdscr: Any, columns: int, size: tuple[int, int],
+                     config: Mapping[str, int]) -> None:
+        max_y, max_x = size
+        y = min(_TOP + -(-12 // columns) * _BLOCK_HEIGHT, max_y - 1)
+        bounds = (0,) + HEAT_THRESHOLDS
+        labels = [f"{low}" if high - low == 1 else f"{low}-{high - 1}"
+                  for low, high in zip(bounds, bounds[1:])]
+        labels.append(f"{bounds[-1]}+")
+        x = _LEFT
+        stdscr.addstr(y, x, "tasks:")
+        x += 7
+        for count, label in zip(bounds, labels):
+            if x + len(label) >= max_x:
+                break
+            stdscr.addstr(y, x, label, self.shade(count, config))
+            x += len(label) + 1
@@ -0,0 +1,48 @@
+import csv
+import heapq
+import json
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import TextIO
+
+from storage import Storage
+
+CSV_FIELDS = ("date", "task", "id", "rule")
+
+# (date, task, task id, recurrence id), one of the ids is always None.
+Entry = tuple[str, str, Optional[int], Optional[int]]
+
+
+def iter_agenda(repo: Storage, start: str,
+                end: str) -> Iterator[Entry]:
+    # Both sources come sorted by date, the merge only ever holds the next
+    # row of each, so a range of any length streams in constant memory.
+    tasks = ((date, task, task_id, None)
+             for task_id, date, task in repo.iter_tasks(start, end))
+    repeats = ((date, task, None, rule_id)
+               for rule_id, date, task in repo.iter_occurrences(start, end))
+    return heapq.merge(tasks, repeats, key=lambda entry: entry[0])
+
+
+def write_agenda(stream: TextIO, entries: Iterable[Entry], fmt: str) -> int:
+    count = 0
+    if fmt == "text":
+        for date, task, _, _ in entries:
+            stream.write(f"{date[:-3]}  {task}\n")
+            count += 1
+    elif fmt == "json":
+        # One object per line, jq reads them as a stream.
+        for date, task, task_id, rule_id in entries:
+            stream.write(json.dumps({"date": date[:-3], "task": task,
+                                     "id": task_id, "rule": rule_id}) + "\n")
+            count += 1
+    elif fmt == "csv":
+        writer = csv.writer(stream)
+        writer.writerow(CSV_FIELDS)
+        for date, task, task_id, rule_id in entries:
+            writer.writerow((date[:-3], task, task_id, rule_id))
+            count += 1
+    else:
+        raise ValueError(f"Unknown agenda format {fmt!r}")
+    return count
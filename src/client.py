@@ -0,0 +1,64 @@
+# The client exists to start fast: _socket rather than socket, which
+# imports enum and selectors, no typing, and nothing else of the calender
+# unless no daemon answers.
+import _socket
+import os
+import sys
+
+from constants import BACKEND_ENV
+from constants import DAEMON_COMMANDS
+from constants import DAEMON_PROTOCOL
+from constants import DAEMON_SOCKET
+
+
+def request(argv: list[str], path: str = DAEMON_SOCKET
+            ) -> tuple[int, bytes, bytes] | None:
+    # (exit code, stdout, stderr) of the command run by the daemon, None
+    # when no daemon listens or it asks for the command to run here.
+    sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(path)
+        except OSError:
+            return None
+        sock.sendall("\0".join([DAEMON_PROTOCOL,
+                                os.environ.get(BACKEND_ENV, ""),
+                                *argv]).encode())
+        sock.shutdown(_socket.SHUT_WR)
+        chunks = []
+        while chunk := sock.recv(65536):
+            chunks.append(chunk)
+    finally:
+        sock.close()
+    header, newline, body = b"".join(chunks).partition(b"\n")
+    if header == b"fallback":
+        return None
+    if not newline:
+        # The command may have run, running it again could repeat it.
+        return 1, b"", b"cli_calender daemon stopped before answering\n"
+    code, length = map(int, header.split())
+    return code, body[:length], body[length:]
+
+
+def main_entry(argv: list[str] | None = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] and argv[0] in DAEMON_COMMANDS:
+        reply = request(argv)
+        if reply is not None:
+            code, out, err = reply
+            sys.stderr.buffer.write(err)
+            try:
+                sys.stdout.buffer.write(out)
+                sys.stdout.flush()
+            except BrokenPipeError:
+                # Like agenda run directly: the reader has seen enough.
+                devnull = os.open(os.devnull, os.O_WRONLY)
+                os.dup2(devnull, sys.stdout.fileno())
+            return code
+    import main
+    return main.main_entry(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main_entry())
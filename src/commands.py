@@ -0,0 +1,493 @@
+import logging
+import os
+import sys
+import time
+from argparse import Namespace
+from datetime import datetime
+from datetime import timedelta
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import TextIO
+from typing import TYPE_CHECKING
+
+from constants import AGENDA_DAYS
+from constants import DEFAULT_BACKEND
+from constants import PROGRESS_INTERVAL_S
+from logsetup import configure_logging
+from recurrence import RuleError
+from storage import open_storage
+from storage import Storage
+
+if TYPE_CHECKING:
+    # Only the sqlite backend loads sqlite3 and the repository.
+    from TaskRepository import CalendarEvent
+    from TaskRepository import TaskRepository
+
+logger = logging.getLogger(__name__)
+
+# Dates are typed as YYYY-MM-DD HH:mm, strptime also takes them unpadded,
+# they are stored padded and with seconds.
+_STORED = "%Y-%m-%d %H:%M:00"
+
+# Subcommands that only touch the database and never need a terminal.
+HEADLESS_COMMANDS = ("task", "config", "agenda")
+
+color_to_curses_color_pair = {
+    "black": 0,
+    "red": 1,
+    "green": 2,
+    "yellow": 3,
+    "blue": 4,
+    "magenta": 5,
+    "cyan": 6,
+    "white": 7
+}
+
+
+def add_task(repo: Storage, date: str, task_desc: str) -> None:
+    try:
+        parsed = datetime.strptime(date, "%Y-%m-%d %H:%M")
+    except ValueError as e:
+        logger.error("Got error parsing date to add: %s", e)
+        raise SystemExit(2)
+    task_id = repo.add_task(parsed.strftime(_STORED), task_desc)
+    logger.info("Added task %d '%s', to date %s.", task_id, task_desc, date)
+
+
+def add_recurring_task(repo: "TaskRepository", date: str, task_desc: str,
+                       rule: str) -> None:
+    try:
+        rule_id = repo.add_recurrence(_minute(date), task_desc, rule)
+    except RuleError as e:
+        logger.error("Invalid recurrence rule %r: %s", rule, e)
+        raise SystemExit(2)
+    logger.info("Added recurring task %d '%s' from %s, %s.", rule_id,
+                task_desc, date, rule)
+
+
+def delete_task(repo: Storage, date: str) -> None:
+    try:
+        parsed = datetime.strptime(date, "%Y-%m-%d %H:%M")
+    except ValueError as e:
+        logger.error("Got error deleting date: %s", e)
+        raise SystemExit(2)
+    rowcount = repo.delete_task(parsed.strftime(_STORED))
+    if rowcount == 0:
+        logger.info("No task found for date %s to delete.", date)
+    else:
+        logger.info("%d task(s) for date %s deleted.", rowcount, date)
+
+
+def _minute(date: str) -> str:
+    try:
+        parsed = datetime.strptime(date, "%Y-%m-%d %H:%M")
+    except ValueError as e:
+        logger.error("Got error parsing date: %s", e)
+        raise SystemExit(2)
+    return parsed.strftime(_STORED)
+
+
+def delete_task_by_id(repo: Storage, task_id: int) -> None:
+    if repo.delete_task_by_id(task_id) == 0:
+        logger.info("No task with id %d to delete.", task_id)
+    else:
+        logger.info("Task %d deleted.", task_id)
+
+
+def delete_tasks_in_range(repo: Storage, date_from: str,
+                          date_to: str | None) -> None:
+    if date_to is None:
+        logger.error("Deleting a range needs both --from and --to.")
+        raise SystemExit(2)
+    rowcount = repo.delete_tasks_in_range(_minute(date_from),
+                                          _minute(date_to))
+    logger.info("%d task(s) from %s to %s deleted.", rowcount, date_from,
+                date_to)
+
+
+def _valid_rows(rows: Iterator[tuple[int, str, str]],
+                err: TextIO) -> Iterator[tuple[str, str]]:
+    for line_num, date, task_desc in rows:
+        try:
+            parsed = datetime.strptime(date, "%Y-%m-%d %H:%M")
+        except ValueError:
+            print(f"line {line_num}: invalid date {date!r}, skipped",
+                  file=err)
+            continue
+        yield parsed.strftime(_STORED), task_desc
+
+
+def _open_input(path: str) -> TextIO:
+    if path == "-":
+        return sys.stdin
+    try:
+        return open(path, newline="")
+    except OSError as e:
+        logger.error("Could not open %s for import: %s", path, e)
+        raise SystemExit(2)
+
+
+class _Progress:
+    # Prints a progress line at most every PROGRESS_INTERVAL_S seconds.
+
+    def __init__(self, verb: str, out: TextIO, total: Optional[int] = None,
+                 start: int = 0):
+        self._verb = verb
+        self._out = out
+        self._total = total
+        self._start = start
+        self._started = self._last = time.monotonic()
+
+    def update(self, events: int, position: Optional[int] = None,
+               final: bool = False) -> None:
+        now = time.monotonic()
+        if not final and now - self._last < PROGRESS_INTERVAL_S:
+            return
+        self._last = now
+        elapsed = max(now - self._started, 1e-6)
+        line = f"{self._verb} {events} events"
+        if position is not None:
+            line += f", {position / 1e6:.1f} MB"
+            if self._total:
+                line += (f" of {self._total / 1e6:.1f} MB "
+                         f"({100 * position // self._total}%)")
+        line += f", {events / elapsed:.0f} events/s"
+        if position is not None:
+            line += f", {(position - self._start) / 1e6 / elapsed:.1f} MB/s"
+        print(line, file=self._out)
+
+
+def import_calendar(repo: "TaskRepository", args: Namespace,
+                    err: TextIO | None = None) -> None:
+    import ics
+    err = err or sys.stderr
+    source = None
+    offset = mtime_ns = 0
+    if args.file == "-":
+        stream = sys.stdin.buffer
+        size = None
+    else:
+        try:
+            stream = open(args.file, "rb")
+        except OSError as e:
+            logger.error("Could not open %s for import: %s", args.file, e)
+            raise SystemExit(2)
+        stat = os.fstat(stream.fileno())
+        source = os.path.abspath(args.file)
+        size, mtime_ns = stat.st_size, stat.st_mtime_ns
+        # Only a file that is unchanged since the interrupted run resumes.
+        offset = repo.import_offset(source, size, mtime_ns)
+        if offset:
+            stream.seek(offset)
+            print(f"resuming at byte {offset} of {size}", file=err)
+    progress = _Progress("read", err, size, offset)
+    events = added = skipped = 0
+    position = offset
+    batch: list[ics.Event] = []
+    try:
+        for line_num, position, props in ics.read_events(stream, offset):
+            events += 1
+            try:
+                batch.append(ics.to_event(props))
+            except ics.IcsFormatError as e:
+                print(f"line {line_num}: {e}, skipped", file=err)
+                skipped += 1
+            if len(batch) >= args.batch_size:
+                # size is only None for stdin, which has no source.
+                checkpoint = None if source is None or size is None else (
+                    source, size, mtime_ns, position)
+                added += repo.import_events(batch, checkpoint)
+                batch = []
+                progress.update(events, position)
+        added += repo.import_events(batch)
+        if source is not None:
+            repo.finish_import(source)
+    except ics.IcsFormatError as e:
+        logger.error("Import of %s stopped: %s", args.file, e)
+        print(f"import stopped: {e}. {added} events were imported, fix the "
+              "file and import it again to continue", file=err)
+        raise SystemExit(2)
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+    progress.update(events, position, final=True)
+    logger.info("Imported %d of %d events from %s, %d skipped.", added,
+                events, args.file, skipped)
+    print(f"imported {added} events, {events - added - skipped} already "
+          f"there, {skipped} skipped", file=err)
+
+
+def _counted(events: Iterable["CalendarEvent"], progress: _Progress
+             ) -> Iterator["CalendarEvent"]:
+    count = 0
+    for count, event in enumerate(events, start=1):
+        yield event
+        progress.update(count)
+    progress.update(count, final=True)
+
+
+def export_calendar(repo: "TaskRepository", args: Namespace,
+                    err: TextIO | None = None) -> None:
+    import ics
+    err = err or sys.stderr
+    events = _counted(repo.iter_calendar(_bound(args.date_from),
+                                         _bound(args.date_to)),
+                      _Progress("wrote", err))
+    if args.file == "-":
+        count = ics.write_calendar(sys.stdout, events)
+    else:
+        with open(args.file, "w", newline="") as stream:
+            count = ics.write_calendar(stream, events)
+    logger.info("Exported %d events to %s.", count, args.file)
+
+
+def import_tasks(repo: Storage, args: Namespace,
+                 err: TextIO | None = None) -> None:
+    import task_io  # csv and json are only needed here and in export.
+    err = err or sys.stderr
+    fmt = args.format or task_io.guess_format(args.file)
+    if fmt == "ics":
+        return import_calendar(_sqlite(repo), args, err)
+    stream = _open_input(args.file)
+    try:
+        rows = _valid_rows(task_io.read_tasks(stream, fmt), err)
+        inserted, conflicts = repo.add_tasks(rows, args.batch_size)
+    except task_io.TaskFormatError as e:
+        logger.error("Import of %s aborted: %s", args.file, e)
+        print(f"import aborted, nothing was imported: {e}", file=err)
+        raise SystemExit(2)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    for date, task_desc in conflicts:
+        print(f"conflict: {task_desc!r} at {date[:-3]} already exists, "
+              "skipped", file=err)
+    logger.info("Imported %d tasks from %s, %d conflicts.", inserted,
+                args.file, len(conflicts))
+    print(f"imported {inserted} tasks, {len(conflicts)} conflicts",
+          file=err)
+
+
+def _bound(date: str | None) -> str | None:
+    return None if date is None else _minute(date)
+
+
+def export_tasks(repo: Storage, args: Namespace) -> None:
+    import task_io
+    fmt = args.format or task_io.guess_format(args.file)
+    if fmt == "ics":
+        return export_calendar(_sqlite(repo), args)
+    rows = ((task_id, date[:-3], task_desc) for task_id, date, task_desc
+            in repo.iter_tasks(_bound(args.date_from), _bound(args.date_to)))
+    if args.file == "-":
+        count = task_io.write_tasks(sys.stdout, rows, fmt)
+    else:
+        with open(args.file, "w", newline="") as stream:
+            count = task_io.write_tasks(stream, rows, fmt)
+    logger.info("Exported %d tasks to %s.", count, args.file)
+
+
+def delete_recurring_task(repo: "TaskRepository", rule_id: int) -> None:
+    if repo.delete_recurrence(rule_id) == 0:
+        logger.info("No recurring task with id %d to delete.", rule_id)
+    else:
+        logger.info("Recurring task %d deleted.", rule_id)
+
+
+def change_occurrence(repo: "TaskRepository", args: Namespace) -> None:
+    new_date = getattr(args, "new_date", None)
+    new_task = getattr(args, "description", None)
+    if args.task_command == "move" and new_date is None and new_task is None:
+        logger.error("Moving an occurrence needs --to or --description.")
+        raise SystemExit(2)
+    if not repo.add_exception(args.rule, _minute(args.date), _bound(new_date),
+                              new_task):
+        logger.error("Recurring task %d has no occurrence at %s.", args.rule,
+                     args.date)
+        raise SystemExit(1)
+    logger.info("Occurrence of %d at %s %s.", args.rule, args.date,
+                "skipped" if args.task_command == "skip" else "moved")
+
+
+def list_recurring_tasks(repo: "TaskRepository",
+                         out: TextIO | None = None) -> None:
+    out = out or sys.stdout
+    for rule_id, date, task_desc, rule in repo.iter_recurrences():
+        print(f"{rule_id}\t{date[:-3]}\t{rule}\t{task_desc}", file=out)
+
+
+def search_tasks(repo: Storage, args: Namespace,
+                 out: TextIO | None = None) -> None:
+    out = out or sys.stdout
+    if args.limit < 1 or args.page < 1:
+        logger.error("--limit and --page must be positive.")
+        raise SystemExit(2)
+    query = " ".join(args.query)
+    found = 0
+    for task_id, date, task_desc in repo.search(
+            query, _bound(args.date_from), _bound(args.date_to),
+            limit=args.limit, offset=(args.page - 1) * args.limit,
+            order=args.order):
+        print(f"{task_id}\t{date[:-3]}\t{task_desc}", file=out)
+        found += 1
+    logger.info("Search for %r returned %d tasks.", query, found)
+    if not found:
+        print(f"no tasks matching {query!r}", file=sys.stderr)
+
+
+def _agenda_date(date: str, end: bool) -> datetime:
+    try:
+        return datetime.strptime(date, "%Y-%m-%d %H:%M")
+    except ValueError:
+        pass
+    try:
+        day = datetime.strptime(date, "%Y-%m-%d")
+    except ValueError as e:
+        logger.error("Got error parsing agenda date: %s", e)
+        raise SystemExit(2)
+    # A day on its own covers all of it.
+    return day.replace(hour=23, minute=59) if end else day
+
+
+def _agenda_range(args: Namespace) -> tuple[str, str]:
+    if args.date_from is None:
+        start = datetime.now().replace(hour=0, minute=0, second=0,
+                                       microsecond=0)
+    else:
+        start = _agenda_date(args.date_from, end=False)
+    if args.date_to is None:
+        end = start + timedelta(days=AGENDA_DAYS, minutes=-1)
+    else:
+        end = _agenda_date(args.date_to, end=True)
+    if end < start:
+        logger.error("Agenda ends at %s, before it starts at %s.", end, start)
+        raise SystemExit(2)
+    return start.isoformat(" "), end.isoformat(" ")
+
+
+def show_agenda(repo: Storage, args: Namespace,
+                out: TextIO | None = None) -> None:
+    import agenda
+    out = out or sys.stdout
+    start, end = _agenda_range(args)
+    try:
+        count = agenda.write_agenda(out, agenda.iter_agenda(repo, start, end),
+                                    args.format)
+        out.flush()
+    except BrokenPipeError:
+        # The reader (head, grep -m) has seen enough. Point stdout at
+        # /dev/null so the flush at exit does not fail again.
+        if out is sys.stdout:
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+        logger.info("Agenda reader closed the pipe.")
+        return
+    logger.info("Agenda from %s to %s listed %d tasks.", start, end, count)
+
+
+def handle_task(repo: Storage, args: Namespace) -> None:
+    if args.task_command == "add":
+        rule = getattr(args, "rrule", None)
+        if getattr(args, "repeat", None):
+            rule = f"FREQ={args.repeat.upper()}"
+        if rule:
+            add_recurring_task(_sqlite(repo), args.date, args.description,
+                               rule)
+        else:
+            add_task(repo, args.date, args.description)
+    elif args.task_command == "delete":
+        if getattr(args, "id", None) is not None:
+            delete_task_by_id(repo, args.id)
+        elif getattr(args, "rule", None) is not None:
+            delete_recurring_task(_sqlite(repo), args.rule)
+        elif getattr(args, "date_from", None) is not None:
+            delete_tasks_in_range(repo, args.date_from, args.date_to)
+        else:
+            delete_task(repo, args.date)
+    elif args.task_command == "import":
+        import_tasks(repo, args)
+    elif args.task_command == "export":
+        export_tasks(repo, args)
+    elif args.task_command == "search":
+        search_tasks(repo, args)
+    elif args.task_command in ("skip", "move"):
+        change_occurrence(_sqlite(repo), args)
+    elif args.task_command == "rules":
+        list_recurring_tasks(_sqlite(repo))
+
+
+def save_user_config(repo: Storage, args: Namespace) -> None:
+    updates: dict[str, int | str] = {}
+    for key in ("bg_color", "cursor_color", "task_color",
+                "task_title", "calendar_color"):
+        color = getattr(args, key)
+        if color:
+            updates[key] = color_to_curses_color_pair[color]
+    if getattr(args, "log_path", None):
+        updates["log_path"] = os.path.abspath(args.log_path)
+    if getattr(args, "log_level", None):
+        updates["log_level"] = args.log_level
+    repo.save_config(updates)
+
+
+def apply_log_settings(repo: Storage,
+                       settings: Optional[dict[str, str]] = None) -> None:
+    # The calender hands over the settings it read at startup.
+    if settings is None:
+        settings = repo.load_log_settings()
+    configure_logging(**settings)
+
+
+def _sqlite_only(args: Namespace) -> Optional[str]:
+    # What the command needs that only the sqlite backend stores.
+    if args.command != "task":
+        return None
+    if args.task_command in ("skip", "move", "rules") or getattr(
+            args, "rrule", None) or getattr(args, "repeat", None) \
+            or getattr(args, "rule", None) is not None:
+        return "Recurring tasks"
+    if args.task_command in ("import", "export"):
+        import task_io
+        if (args.format or task_io.guess_format(args.file)) == "ics":
+            return "iCalendar files"
+    return None
+
+
+def check_backend(args: Namespace, backend: str) -> None:
+    feature = _sqlite_only(args)
+    if backend != "sqlite" and feature is not None:
+        logger.error("%s need the sqlite backend, not %s.", feature, backend)
+        raise SystemExit(2)
+
+
+def _sqlite(repo: Storage) -> "TaskRepository":
+    # Recurring tasks and iCalendar files are only stored by sqlite,
+    # check_backend turned these commands away on the other backends.
+    from TaskRepository import TaskRepository
+    if not isinstance(repo, TaskRepository):
+        raise TypeError(f"{type(repo).__name__} does not store recurring "
+                        "tasks or iCalendar files")
+    return repo
+
+
+def dispatch(repo: Storage, args: Namespace) -> int:
+    # Runs a headless subcommand against an open repository, the daemon
+    # calls this with the one it keeps open.
+    if args.command == "task":
+        handle_task(repo, args)
+    elif args.command == "config":
+        save_user_config(repo, args)
+    elif args.command == "agenda":
+        show_agenda(repo, args)
+    return 0
+
+
+def run_command(args: Namespace, db_path: Optional[str] = None) -> int:
+    backend = getattr(args, "backend", None) or DEFAULT_BACKEND
+    check_backend(args, backend)
+    with open_storage(backend, db_path,
+                      snapshot=getattr(args, "snapshot", False)) as repo:
+        repo.init_db()
+        apply_log_settings(repo)
+        return dispatch(repo, args)
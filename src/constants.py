@@ -9,8 +9,64 @@ _DAYS = (1, 2, 3, 4, 5, 6, 7, 8, 9, 10,
 _COLORS = ("red", "green", "blue", "cyan",
            "black", "yellow", "white", "magenta")
 DB_NAME = "cli_calender.db"
+STORAGE_BACKENDS = ("sqlite", "memory", "log")
+DEFAULT_BACKEND = "sqlite"
+LOG_DB_NAME = "cli_calender.jsonl"
+BACKEND_ENV = "CLI_CALENDER_BACKEND"
+# `cli_calender daemon` listens next to the database, clients in the same
+# directory hand it these subcommands. Replies are sent once the command
+# is done, agenda and task import and export stream and run in the client.
+DAEMON_SOCKET = "cli_calender.sock"
+DAEMON_COMMANDS = ("task",)
+DAEMON_PROTOCOL = "1"
+# Seconds a client may take to send its request, the daemon serves one
+# at a time.
+DAEMON_TIMEOUT_S = 5
+# The log backend folds its log into the index once it holds this many
+# records, or as many as there are tasks if that is more.
+LOG_COMPACT_RECORDS = 10000
 DB_TASK_TABLE = "tasks"
 DB_CONFIG_TABLE = "config"
+DB_FTS_TABLE = "tasks_fts"
+DB_FTS_SYNC_TABLE = "fts_sync"
+DB_RECURRENCE_TABLE = "recurrences"
+DB_EXCEPTION_TABLE = "recurrence_exceptions"
+DB_IMPORT_TABLE = "import_progress"
+DB_CHANGE_TABLE = "changes"
+SEARCH_ORDERS = ("date", "rank")
+SEARCH_PAGE_SIZE = 50
+DEFAULT_BATCH_SIZE = 500
+TASK_FORMATS = ("csv", "jsonl", "ics")
+# Seconds between progress lines of a long import or export.
+PROGRESS_INTERVAL_S = 1.0
+REPEAT_CHOICES = ("daily", "weekly", "monthly", "yearly")
+# Recurring tasks are expanded this many days at a time when a long range
+# is streamed.
+OCCURRENCE_WINDOW_DAYS = 31
+AGENDA_FORMATS = ("text", "json", "csv")
+AGENDA_DAYS = 7
+MONTH_CACHE_SIZE = 6
+JOURNAL_MODES = ("delete", "truncate", "persist", "memory", "wal", "off")
+SYNCHRONOUS_LEVELS = ("off", "normal", "full", "extra")
+DEFAULT_JOURNAL_MODE = "wal"
+DEFAULT_SYNCHRONOUS = "normal"
+BUSY_TIMEOUT_MS = 5000
+BUSY_RETRIES = 5
+BUSY_BACKOFF_S = 0.01
+MONTH_GRID_CACHE_SIZE = 48
+YEAR_CACHE_SIZE = 3
+# A day is shaded one step darker for every threshold its task count reaches.
+HEAT_THRESHOLDS = (1, 2, 4, 8)
+# Keys arriving faster than this are applied together in the next frame.
+MAX_FPS = 60
+# How often an idle calender checks the database for writes by other
+# processes.
+REFRESH_INTERVAL_MS = 1000
+LOG_FILE_NAME = "cli-calender.log"
+LOG_LEVELS = ("debug", "info", "warning", "error", "critical", "off")
+DEFAULT_LOG_LEVEL = "info"
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
 
 DEFAULT_CONFIG = {
     "bg_color": 0,
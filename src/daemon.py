@@ -0,0 +1,174 @@
+import io
+import logging
+import os
+import signal
+import socket
+import socketserver
+import sys
+from argparse import ArgumentParser
+from argparse import Namespace
+from contextlib import redirect_stderr
+from contextlib import redirect_stdout
+from contextlib import suppress
+from datetime import date
+from typing import Any
+
+import commands
+from ArgParser import build_parser
+from ArgParser import get_args
+from constants import DAEMON_COMMANDS
+from constants import DAEMON_PROTOCOL
+from constants import DAEMON_SOCKET
+from constants import DAEMON_TIMEOUT_S
+from constants import DB_NAME
+from constants import DEFAULT_BACKEND
+from constants import LOG_DB_NAME
+from storage import open_storage
+from storage import Storage
+
+logger = logging.getLogger(__name__)
+
+# Tells the client to run the command itself.
+FALLBACK = b"fallback\n"
+
+
+# Long running, or reading stdin, they would hold up every other client.
+_STREAMING_TASKS = ("import", "export")
+
+
+def _streams(args: Namespace) -> bool:
+    return args.command == "task" and args.task_command in _STREAMING_TASKS
+
+
+def _exit_code(exit: SystemExit) -> int:
+    if exit.code is None or isinstance(exit.code, int):
+        return exit.code or 0
+    print(exit.code, file=sys.stderr)
+    return 1
+
+
+def _reply(code: int, out: str, err: str) -> bytes:
+    stdout = out.encode()
+    return f"{code} {len(stdout)}\n".encode() + stdout + err.encode()
+
+
+def handle_request(repo: Storage, backend: str, data: bytes,
+                   parser: ArgumentParser | None = None) -> bytes:
+    # A request is DAEMON_PROTOCOL, the client's CLI_CALENDER_BACKEND and
+    # its arguments, separated by NUL bytes. The reply is "<exit code>
+    # <stdout length>\n" followed by what the command wrote to stdout and
+    # stderr, or FALLBACK.
+    try:
+        version, client_backend, *argv = data.decode().split("\0")
+    except ValueError:
+        # Not a client of this version: undecodable, or without the NUL
+        # separated header (the probe of a starting daemon sends nothing).
+        return _reply(2, "", "cli_calender daemon: malformed request\n")
+    if version != DAEMON_PROTOCOL or not argv \
+            or argv[0] not in DAEMON_COMMANDS \
+            or (client_backend or DEFAULT_BACKEND) != backend:
+        return FALLBACK
+    out, err = io.StringIO(), io.StringIO()
+    with redirect_stdout(out), redirect_stderr(err):
+        try:
+            args = get_args(argv, parser)
+            if _streams(args):
+                return FALLBACK
+            commands.check_backend(args, backend)
+            # The log backend only sees other writers when it looks.
+            repo.poll_changes()
+            code = commands.dispatch(repo, args)
+        except SystemExit as e:
+            code = _exit_code(e)
+        except Exception:
+            logger.exception("Request %r failed", argv)
+            print("cli_calender daemon: the command failed, see the log",
+                  file=sys.stderr)
+            code = 1
+    return _reply(code, out.getvalue(), err.getvalue())
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "DaemonServer"
+
+    timeout = DAEMON_TIMEOUT_S
+
+    def handle(self) -> None:
+        # The client shuts down its side once the request is sent.
+        try:
+            data = self.rfile.read()
+        except OSError:
+            logger.warning("Dropped a client that sent no request.")
+            return
+        reply = handle_request(self.server.repo, self.server.backend, data,
+                               self.server.parser())
+        # A client that gave up is not an error of the daemon.
+        with suppress(OSError):
+            self.wfile.write(reply)
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    # One request at a time: every command runs on the one connection the
+    # daemon keeps, and requests are over in a millisecond or two.
+
+    def __init__(self, path: str, repo: Storage, backend: str):
+        self.repo = repo
+        self.backend = backend
+        self._parser: ArgumentParser | None = None
+        self._parser_day: date | None = None
+        # Only the owner may connect, the socket can change every task.
+        umask = os.umask(0o177)
+        try:
+            super().__init__(path, _Handler)
+        finally:
+            os.umask(umask)
+
+    def parser(self) -> ArgumentParser:
+        # Building the parser takes most of a request. It is kept for the
+        # day, the --year, --month and --day defaults are today's.
+        today = date.today()
+        if self._parser is None or self._parser_day != today:
+            self._parser = build_parser()
+            self._parser_day = today
+        return self._parser
+
+
+def _answers(path: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            return False
+    return True
+
+
+def _stop(signum: int, frame: Any) -> None:
+    raise KeyboardInterrupt
+
+
+def serve(backend: str = DEFAULT_BACKEND, path: str = DAEMON_SOCKET) -> int:
+    if _answers(path):
+        logger.error("A daemon already listens on %s.", path)
+        return 1
+    # Left behind by a daemon that was killed.
+    with suppress(FileNotFoundError):
+        os.unlink(path)
+    db_path = os.path.abspath(LOG_DB_NAME if backend == "log" else DB_NAME)
+    with open_storage(backend, db_path) as repo:
+        repo.init_db()
+        commands.apply_log_settings(repo)
+        server = DaemonServer(path, repo, backend)
+        signal.signal(signal.SIGTERM, _stop)
+        logger.info("Serving %s from %s on %s.", backend, db_path, path)
+        print(f"serving {db_path} on {path}, Ctrl-C stops",
+              file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            with suppress(FileNotFoundError):
+                os.unlink(path)
+    logger.info("Daemon on %s stopped.", path)
+    return 0
@@ -0,0 +1,240 @@
+import hashlib
+import re
+from datetime import datetime
+from datetime import timezone
+from typing import BinaryIO
+from typing import Iterable
+from typing import Iterator
+from typing import NamedTuple
+from typing import Optional
+from typing import TextIO
+
+from recurrence import parse_rule
+from recurrence import RuleError
+
+PRODID = "-//cli_calender//EN"
+# RFC 5545 lines are folded after 75 octets.
+_LINE_OCTETS = 75
+_ESCAPES = str.maketrans({"\\": "\\\\", ";": "\\;", ",": "\\,",
+                          "\n": "\\n"})
+_UNESCAPES = {"n": "\n", "N": "\n"}
+_ESCAPED = re.compile(r"\\(.?)")
+
+Property = tuple[dict[str, str], str]  # (parameters, value)
+Component = dict[str, list[Property]]
+
+
+class IcsFormatError(ValueError):
+    pass
+
+
+class Event(NamedTuple):
+    uid: str
+    date: str  # YYYY-MM-DD HH:MM:00, local time
+    summary: str
+    rule: Optional[str] = None
+    exdates: tuple[str, ...] = ()
+    # Set on an event replacing one occurrence of a recurring event.
+    recurrence_id: Optional[str] = None
+
+
+def _lines(stream: BinaryIO,
+           offset: int) -> Iterator[tuple[int, int, str]]:
+    # Yields (line number, offset just past the line, unfolded line).
+    # Continuations are joined as bytes, a fold may split a UTF-8 sequence.
+    pending: Optional[bytes] = None
+    line_num = start = 0
+    end = offset
+    for line_num, raw in enumerate(stream, start=1):
+        line = raw.rstrip(b"\r\n")
+        if pending is not None and line[:1] in (b" ", b"\t"):
+            pending += line[1:]
+        else:
+            if pending is not None:
+                yield start, end, pending.decode("utf-8", "replace")
+            pending, start = line, line_num
+        end += len(raw)
+    if pending is not None:
+        yield start, end, pending.decode("utf-8", "replace")
+
+
+def _split(line: str) -> tuple[str, Property]:
+    # NAME;PARAM=value;PARAM="quoted:value":value
+    colon = line.find(":")
+    if colon < 0:
+        raise IcsFormatError(f"no value in {line[:40]!r}")
+    if line.find(";", 0, colon) < 0:
+        return line[:colon].upper(), ({}, line[colon + 1:])
+    if line.find('"', 0, colon) >= 0:
+        # Only quoted parameters can hide a colon, scan them properly.
+        quoted = False
+        for colon, char in enumerate(line):
+            if char == '"':
+                quoted = not quoted
+            elif char == ":" and not quoted:
+                break
+        else:
+            raise IcsFormatError(f"no value in {line[:40]!r}")
+    name, *parts = line[:colon].split(";")
+    params = {}
+    for part in parts:
+        key, _, param = part.partition("=")
+        params[key.upper()] = param.strip('"')
+    return name.upper(), (params, line[colon + 1:])
+
+
+def read_events(stream: BinaryIO,
+                offset: int = 0) -> Iterator[tuple[int, int, Component]]:
+    # Yields (line number, offset just past END:VEVENT, properties) for
+    # every VEVENT, one at a time, so files of any size are read with
+    # constant memory. Nested components like VALARM are skipped. The
+    # stream may start anywhere between two events.
+    event: Optional[Component] = None
+    depth = 0
+    begin = 0
+    for line_num, end, line in _lines(stream, offset):
+        if not line:
+            continue
+        try:
+            name, prop = _split(line)
+        except IcsFormatError as e:
+            raise IcsFormatError(f"line {line_num}: {e}") from None
+        if event is None:
+            if name == "BEGIN" and prop[1].upper() == "VEVENT":
+                event, depth, begin = {}, 0, line_num
+        elif name == "BEGIN":
+            depth += 1
+        elif name == "END" and depth:
+            depth -= 1
+        elif name == "END" and prop[1].upper() == "VEVENT":
+            yield begin, end, event
+            event = None
+        elif not depth:
+            event.setdefault(name, []).append(prop)
+    if event is not None:
+        raise IcsFormatError(f"line {begin}: event is never closed")
+
+
+def _unescape(text: str) -> str:
+    if "\\" not in text:
+        return text
+    return _ESCAPED.sub(lambda m: _UNESCAPES.get(m[1], m[1] or "\\"), text)
+
+
+def _local(params: dict[str, str], value: str) -> datetime:
+    # Sliced by hand, strptime would be the slowest step of an import.
+    try:
+        if params.get("VALUE") == "DATE" or len(value) == 8:
+            if len(value) != 8:
+                raise ValueError
+            return datetime(int(value[0:4]), int(value[4:6]),
+                            int(value[6:8]))
+        if len(value) not in (15, 16) or value[8] != "T":
+            raise ValueError
+        when = datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]),
+                        int(value[9:11]), int(value[11:13]))
+    except ValueError:
+        raise IcsFormatError(f"invalid date {value!r}") from None
+    if value.endswith("Z"):
+        return when.replace(tzinfo=timezone.utc).astimezone() \
+            .replace(tzinfo=None)
+    if "TZID" in params:
+        # zoneinfo reads the tz database, only needed for zoned times.
+        from zoneinfo import ZoneInfo
+        from zoneinfo import ZoneInfoNotFoundError
+        try:
+            zone = ZoneInfo(params["TZID"])
+        except (ZoneInfoNotFoundError, ValueError):
+            # Unknown zones are taken as floating local time.
+            return when
+        return when.replace(tzinfo=zone).astimezone().replace(tzinfo=None)
+    return when
+
+
+def _minute(when: datetime) -> str:
+    return when.isoformat(" ")
+
+
+def to_event(props: Component) -> Event:
+    if "DTSTART" not in props:
+        raise IcsFormatError("event has no DTSTART")
+    if "STATUS" in props and props["STATUS"][0][1].upper() == "CANCELLED":
+        raise IcsFormatError("event is cancelled")
+    date = _minute(_local(*props["DTSTART"][0]))
+    summary = _unescape(props["SUMMARY"][0][1]) if "SUMMARY" in props else ""
+    rule = None
+    if "RRULE" in props:
+        # WKST only matters for BYDAY rules with an interval, which the
+        # calender always counts from Monday.
+        rule = ";".join(part for part in props["RRULE"][0][1].split(";")
+                        if not part.upper().startswith("WKST="))
+        try:
+            parse_rule(rule)
+        except RuleError as e:
+            raise IcsFormatError(f"unsupported RRULE: {e}") from None
+    exdates: tuple[str, ...] = ()
+    if "EXDATE" in props:
+        exdates = tuple(_minute(_local(params, value))
+                        for params, values in props["EXDATE"]
+                        for value in values.split(","))
+    recurrence_id = None
+    if "RECURRENCE-ID" in props:
+        recurrence_id = _minute(_local(*props["RECURRENCE-ID"][0]))
+    if "UID" in props:
+        uid = props["UID"][0][1]
+    else:
+        # Events without a UID get one from their content, importing the
+        # same file again still skips them.
+        digest = hashlib.sha1(f"{date}\n{rule}\n{summary}".encode())
+        uid = f"{digest.hexdigest()}@cli_calender"
+    return Event(uid, date, summary, rule, exdates, recurrence_id)
+
+
+def _escape(text: str) -> str:
+    return text.translate(_ESCAPES)
+
+
+def _fold(line: str) -> str:
+    data = line.encode()
+    if len(data) <= _LINE_OCTETS:
+        return line + "\r\n"
+    parts = []
+    start, limit = 0, _LINE_OCTETS
+    while start < len(data):
+        end = min(start + limit, len(data))
+        while end < len(data) and data[end] & 0xC0 == 0x80:
+            end -= 1  # Never split a UTF-8 sequence.
+        parts.append(data[start:end].decode())
+        # The leading space of a continuation counts towards its length.
+        start, limit = end, _LINE_OCTETS - 1
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _stamp(date: str) -> str:
+    return datetime.fromisoformat(date).strftime("%Y%m%dT%H%M%S")
+
+
+def write_calendar(stream: TextIO,
+                   events: Iterable[tuple[str, str, str, Optional[str],
+                                          tuple[str, ...], Optional[str]]]
+                   ) -> int:
+    # Takes Event fields as plain tuples, as TaskRepository.iter_calendar
+    # yields them. Times are written as floating local time, like they are
+    # stored.
+    dtstamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    stream.write(f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:{PRODID}\r\n")
+    count = 0
+    for uid, date, summary, rule, exdates, recurrence_id in events:
+        lines = ["BEGIN:VEVENT", f"UID:{uid}", f"DTSTAMP:{dtstamp}"]
+        if recurrence_id is not None:
+            lines.append(f"RECURRENCE-ID:{_stamp(recurrence_id)}")
+        lines.append(f"DTSTART:{_stamp(date)}")
+        if rule is not None:
+            lines.append(f"RRULE:{rule}")
+        lines.extend(f"EXDATE:{_stamp(exdate)}" for exdate in exdates)
+        lines.append(f"SUMMARY:{_escape(summary)}")
+        lines.append("END:VEVENT")
+        stream.write("".join(_fold(line) for line in lines))
+        count += 1
+    stream.write("END:VCALENDAR\r\n")
+    return count
@@ -0,0 +1,79 @@
+import atexit
+import logging
+import os
+from typing import Any
+from typing import Optional
+
+from constants import DEFAULT_LOG_LEVEL
+from constants import LOG_BACKUP_COUNT
+from constants import LOG_FILE_NAME
+from constants import LOG_MAX_BYTES
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+# The listener thread owning the file handler and the (path, level) it was
+# started for. None while logging is not configured or turned off.
+_listener: Optional[Any] = None
+_settings: Optional[tuple[str, str]] = None
+_queue_handler: Optional[logging.Handler] = None
+
+
+def default_log_path() -> str:
+    state_home = (os.environ.get("XDG_STATE_HOME")
+                  or os.path.join(os.path.expanduser("~"), ".local", "state"))
+    return os.path.join(state_home, "cli_calender", LOG_FILE_NAME)
+
+
+def configure_logging(path: Optional[str] = None,
+                      level: Optional[str] = None) -> None:
+    global _listener, _settings, _queue_handler
+    path = path or default_log_path()
+    level = level or DEFAULT_LOG_LEVEL
+    if _settings == (path, level):
+        return
+    shutdown_logging()
+    root = logging.getLogger()
+    if level == "off":
+        # Every logger call returns after a single level check.
+        root.setLevel(logging.CRITICAL + 1)
+        _settings = (path, level)
+        return
+    # logging.handlers pulls in socket, pickle and queue, keep it off the
+    # import path of the modules.
+    import queue
+    from logging.handlers import QueueHandler
+    from logging.handlers import QueueListener
+    from logging.handlers import RotatingFileHandler
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    file_handler = RotatingFileHandler(
+        path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+        delay=True)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    # Records are put on an unbounded queue, the file is written and rotated
+    # by the listener thread so a slow disk never holds up a frame.
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    _queue_handler = QueueHandler(log_queue)
+    _listener = QueueListener(log_queue, file_handler)
+    _listener.start()
+    root.addHandler(_queue_handler)
+    root.setLevel(level.upper())
+    _settings = (path, level)
+
+
+def shutdown_logging() -> None:
+    global _listener, _settings, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        # Flushes whatever is still queued before the file is closed.
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+    _settings = None
+
+
+atexit.register(shutdown_logging)
@@ -1,21 +1,33 @@
-import curses
 import logging
 import os
-from _curses import window
 from argparse import Namespace
 from typing import Any
 from typing import Callable
+from typing import Optional
+from typing import TYPE_CHECKING
 
 from ArgParser import get_args
-from CliCalendar import CliCalender
+from commands import HEADLESS_COMMANDS
+from commands import run_command
+from constants import BACKEND_ENV
+from constants import DB_NAME
+from constants import DEFAULT_BACKEND
+from constants import STORAGE_BACKENDS
+from logsetup import configure_logging
+
+if TYPE_CHECKING:
+    from _curses import window
+    from Profiler import Profiler
 
 _CUR_DIR = os.path.dirname(os.path.abspath(__file__))
 
+PROFILE_ENV = "CLI_CALENDER_PROFILE"
+
 logger = logging.getLogger(__name__)
-logging.basicConfig(filename="cli-calender.log", level=logging.INFO)
 
 
 def init_colors() -> None:
+    import curses
     colors = [
         (curses.COLOR_RED, curses.COLOR_BLACK),
         (curses.COLOR_GREEN, curses.COLOR_BLACK),
@@ -29,20 +41,74 @@ def init_colors() -> None:
         curses.init_pair(i, fg, bg)
 
 
-def main(stdscr: window, args: Namespace) -> int:
+def _profiler(args: Namespace) -> Optional["Profiler"]:
+    pstats_path = getattr(args, "profile_output", None)
+    if not (getattr(args, "profile", False) or pstats_path
+            or os.environ.get(PROFILE_ENV)):
+        return None
+    import atexit
+    from Profiler import Profiler
+    profiler = Profiler(pstats_path)
+    profiler.start()
+    # The calender leaves through sys.exit on SIGINT, the summary is
+    # printed once curses has given the terminal back.
+    atexit.register(profiler.report)
+    return profiler
+
+
+def main(stdscr: "window", args: Namespace) -> int:
+    # curses and the UI are only imported once we know a terminal is needed,
+    # the headless subcommands never pay for them.
+    import curses
+    from CliCalendar import CliCalender
     curses.start_color()
     init_colors()
-    cal = CliCalender()
+    profiler = _profiler(args)
+    # Namespaces built without main_entry (the benchmarks) carry no backend.
+    cal = CliCalender(backend=getattr(args, "backend", None)
+                      or DEFAULT_BACKEND,
+                      snapshot=getattr(args, "snapshot", False),
+                      profiler=profiler)
+    cal.apply_log_settings()
     cal.handle_args(args)
     curses.curs_set(0)
+    if profiler is not None:
+        stdscr = profiler.wrap_window(stdscr)
     cal.draw(stdscr)
-    while True:
-        cal.move(stdscr)
+    cal.run(stdscr, None if profiler is None else profiler.frame_done)
+    return 0
 
 
 def main_entry(argv: list[str] | None = None,
-               wrapper: Callable[[Callable[..., Any], Namespace], Any] = curses.wrapper) -> int:
+               wrapper: Optional[Callable[[Callable[..., Any], Namespace],
+                                          Any]] = None) -> int:
     args = get_args(argv)
+    # Done on entry rather than at import time, so importing the modules
+    # (tests, benchmarks) never creates a log file. The settings stored with
+    # `config` replace these defaults once the database is open.
+    configure_logging()
+    args.backend = getattr(args, "backend", None) \
+        or os.environ.get(BACKEND_ENV) or DEFAULT_BACKEND
+    if args.backend not in STORAGE_BACKENDS:
+        logger.error("Unknown storage backend %r in %s, use one of %s",
+                     args.backend, BACKEND_ENV, ", ".join(STORAGE_BACKENDS))
+        return 2
+    snapshot = getattr(args, "snapshot", False)
+    if snapshot and args.backend != "sqlite":
+        logger.error("--snapshot only works with the sqlite backend")
+        return 2
+    if snapshot and not os.path.exists(DB_NAME):
+        logger.error("No calender database %s to take a snapshot of",
+                     DB_NAME)
+        return 2
+    if args.command == "daemon":
+        import daemon
+        return daemon.serve(args.backend)
+    if args.command in HEADLESS_COMMANDS:
+        return run_command(args)
+    if wrapper is None:
+        import curses
+        wrapper = curses.wrapper
     wrapper(main, args)
     return 0
 
@@ -0,0 +1,226 @@
+import logging
+import sqlite3
+from datetime import datetime
+from typing import Callable
+from typing import Optional
+
+from constants import DB_CHANGE_TABLE
+from constants import DB_CONFIG_TABLE
+from constants import DB_EXCEPTION_TABLE
+from constants import DB_FTS_SYNC_TABLE
+from constants import DB_FTS_TABLE
+from constants import DB_IMPORT_TABLE
+from constants import DB_RECURRENCE_TABLE
+from constants import DB_TASK_TABLE
+from timestamps import to_minutes
+
+logger = logging.getLogger(__name__)
+
+
+def _table_columns(cur: sqlite3.Cursor, table: str) -> list[str]:
+    return [row[1] for row in cur.execute(f"PRAGMA table_info({table})")]
+
+
+def _legacy_minutes(date: str) -> Optional[int]:
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
+        try:
+            return to_minutes(datetime.strptime(date, fmt))
+        except ValueError:
+            pass
+    return None
+
+
+def _to_v1(cur: sqlite3.Cursor) -> None:
+    # Dates move from "YYYY-mm-DD HH:MM:SS" text to integer minutes since
+    # the epoch, with a covering index so day and month lookups are pure
+    # index range scans.
+    cur.execute(f"CREATE TABLE IF NOT EXISTS {DB_CONFIG_TABLE} ("
+                " id INTEGER PRIMARY KEY CHECK (id = 1),"
+                " bg_color INTEGER,"
+                " task_color INTEGER,"
+                " task_title INTEGER,"
+                " calendar_color INTEGER,"
+                " cursor_color INTEGER)")
+    legacy = "date" in _table_columns(cur, DB_TASK_TABLE)
+    if legacy:
+        cur.execute(f"ALTER TABLE {DB_TASK_TABLE} "
+                    f"RENAME TO {DB_TASK_TABLE}_v0")
+    cur.execute(f"CREATE TABLE {DB_TASK_TABLE} ("
+                " ts INTEGER UNIQUE NOT NULL, task TEXT NOT NULL)")
+    cur.execute(f"CREATE INDEX {DB_TASK_TABLE}_ts_task "
+                f"ON {DB_TASK_TABLE} (ts, task)")
+    if legacy:
+        cur.execute(f"INSERT INTO {DB_TASK_TABLE} (ts, task) "
+                    "SELECT CAST(strftime('%s', date) AS INTEGER) / 60, task "
+                    f"FROM {DB_TASK_TABLE}_v0 "
+                    "WHERE strftime('%s', date) IS NOT NULL")
+        # Old versions stored dates as typed, unpadded ones included, which
+        # sqlite does not read.
+        rows = cur.execute(f"SELECT date, task FROM {DB_TASK_TABLE}_v0 "
+                           "WHERE strftime('%s', date) IS NULL").fetchall()
+        for date, task in rows:
+            ts = _legacy_minutes(date)
+            if ts is None:
+                logger.warning("Dropped task %r, its date %r can not be "
+                               "read.", task, date)
+                continue
+            cur.execute(f"INSERT OR IGNORE INTO {DB_TASK_TABLE} (ts, task) "
+                        "VALUES (?, ?)", (ts, task))
+            if not cur.rowcount:
+                logger.warning("Dropped task %r at %s, the minute already "
+                               "has a task.", task, date)
+        cur.execute(f"DROP TABLE {DB_TASK_TABLE}_v0")
+
+
+def _to_v2(cur: sqlite3.Cursor) -> None:
+    # Drops the one-task-per-minute constraint. Every task gets its own id,
+    # existing rowids are kept so ids stay stable across the migration.
+    cur.execute(f"ALTER TABLE {DB_TASK_TABLE} RENAME TO {DB_TASK_TABLE}_v1")
+    cur.execute(f"DROP INDEX {DB_TASK_TABLE}_ts_task")
+    cur.execute(f"CREATE TABLE {DB_TASK_TABLE} ("
+                " id INTEGER PRIMARY KEY,"
+                " ts INTEGER NOT NULL,"
+                " task TEXT NOT NULL)")
+    cur.execute(f"INSERT INTO {DB_TASK_TABLE} (id, ts, task) "
+                f"SELECT rowid, ts, task FROM {DB_TASK_TABLE}_v1")
+    cur.execute(f"DROP TABLE {DB_TASK_TABLE}_v1")
+    cur.execute(f"CREATE INDEX {DB_TASK_TABLE}_ts_task "
+                f"ON {DB_TASK_TABLE} (ts, task)")
+
+
+def _to_v3(cur: sqlite3.Cursor) -> None:
+    # Where the log goes and how much of it, set through `config`.
+    cur.execute(f"ALTER TABLE {DB_CONFIG_TABLE} ADD COLUMN log_path TEXT")
+    cur.execute(f"ALTER TABLE {DB_CONFIG_TABLE} ADD COLUMN log_level TEXT")
+
+
+def _to_v4(cur: sqlite3.Cursor) -> None:
+    # Full text index over the task descriptions. The index holds no copy
+    # of the text (external content) and triggers keep it in sync. Words
+    # are stemmed, so "meet" also finds "meeting" without a prefix query.
+    try:
+        cur.execute(f"CREATE VIRTUAL TABLE {DB_FTS_TABLE} USING fts5("
+                    f"task, content='{DB_TASK_TABLE}', content_rowid='id', "
+                    "tokenize='porter unicode61')")
+    except sqlite3.OperationalError as e:
+        if "fts5" not in str(e):
+            raise
+        logger.warning("SQLite was built without FTS5, task search falls "
+                       "back to a table scan.")
+        return
+    # Bulk imports switch the insert trigger off inside their transaction
+    # and index all new rows in one statement, see TaskRepository.add_tasks.
+    cur.execute(f"CREATE TABLE {DB_FTS_SYNC_TABLE} ("
+                " id INTEGER PRIMARY KEY CHECK (id = 1),"
+                " deferred INTEGER NOT NULL)")
+    cur.execute(f"INSERT INTO {DB_FTS_SYNC_TABLE} VALUES (1, 0)")
+    cur.execute(f"CREATE TRIGGER {DB_FTS_TABLE}_insert "
+                f"AFTER INSERT ON {DB_TASK_TABLE} WHEN (SELECT deferred "
+                f"FROM {DB_FTS_SYNC_TABLE} WHERE id = 1) = 0 BEGIN "
+                f"INSERT INTO {DB_FTS_TABLE} (rowid, task) "
+                "VALUES (new.id, new.task); END")
+    cur.execute(f"CREATE TRIGGER {DB_FTS_TABLE}_delete "
+                f"AFTER DELETE ON {DB_TASK_TABLE} BEGIN "
+                f"INSERT INTO {DB_FTS_TABLE} ({DB_FTS_TABLE}, rowid, task) "
+                "VALUES ('delete', old.id, old.task); END")
+    cur.execute(f"CREATE TRIGGER {DB_FTS_TABLE}_update "
+                f"AFTER UPDATE OF task ON {DB_TASK_TABLE} BEGIN "
+                f"INSERT INTO {DB_FTS_TABLE} ({DB_FTS_TABLE}, rowid, task) "
+                "VALUES ('delete', old.id, old.task); "
+                f"INSERT INTO {DB_FTS_TABLE} (rowid, task) "
+                "VALUES (new.id, new.task); END")
+    cur.execute(f"INSERT INTO {DB_FTS_TABLE} ({DB_FTS_TABLE}) "
+                "VALUES ('rebuild')")
+
+
+def _to_v5(cur: sqlite3.Cursor) -> None:
+    # Recurring tasks are stored once as a rule and expanded when a range
+    # is read. until_ts is the last possible occurrence, NULL for rules
+    # without an end, so rules that ended are skipped by the range query.
+    # An exception with neither new_ts nor new_task cancels the occurrence
+    # at ts, otherwise it moves or renames it.
+    cur.execute(f"CREATE TABLE {DB_RECURRENCE_TABLE} ("
+                " id INTEGER PRIMARY KEY,"
+                " ts INTEGER NOT NULL,"
+                " task TEXT NOT NULL,"
+                " rule TEXT NOT NULL,"
+                " until_ts INTEGER)")
+    cur.execute(f"CREATE INDEX {DB_RECURRENCE_TABLE}_ts "
+                f"ON {DB_RECURRENCE_TABLE} (ts)")
+    cur.execute(f"CREATE TABLE {DB_EXCEPTION_TABLE} ("
+                " recurrence_id INTEGER NOT NULL "
+                f"REFERENCES {DB_RECURRENCE_TABLE} (id),"
+                " ts INTEGER NOT NULL,"
+                " new_ts INTEGER,"
+                " new_task TEXT,"
+                " PRIMARY KEY (recurrence_id, ts))")
+    cur.execute(f"CREATE INDEX {DB_EXCEPTION_TABLE}_ts "
+                f"ON {DB_EXCEPTION_TABLE} (ts)")
+    cur.execute(f"CREATE INDEX {DB_EXCEPTION_TABLE}_new_ts "
+                f"ON {DB_EXCEPTION_TABLE} (new_ts)")
+
+
+def _to_v6(cur: sqlite3.Cursor) -> None:
+    # iCalendar UIDs make imports idempotent, only imported rows carry one
+    # so the indexes stay small. import_progress remembers how far into a
+    # file an interrupted import got.
+    for table in (DB_TASK_TABLE, DB_RECURRENCE_TABLE):
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN uid TEXT")
+        cur.execute(f"CREATE UNIQUE INDEX {table}_uid ON {table} (uid) "
+                    "WHERE uid IS NOT NULL")
+    cur.execute(f"CREATE TABLE {DB_IMPORT_TABLE} ("
+                " source TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " mtime_ns INTEGER NOT NULL,"
+                " offset INTEGER NOT NULL)")
+
+
+def _to_v7(cur: sqlite3.Cursor) -> None:
+    # Every write stamps the months it touched with a new version, "*" when
+    # any month may have changed. An open calender compares versions to
+    # reload only those months after another process wrote. One row per
+    # month, the table never grows beyond the months that were written to.
+    cur.execute(f"CREATE TABLE {DB_CHANGE_TABLE} ("
+                " month TEXT PRIMARY KEY,"
+                " version INTEGER NOT NULL)")
+    cur.execute(f"CREATE INDEX {DB_CHANGE_TABLE}_version "
+                f"ON {DB_CHANGE_TABLE} (version)")
+
+
+# MIGRATIONS[n] upgrades a database from user_version n to n + 1.
+MIGRATIONS: tuple[Callable[[sqlite3.Cursor], None], ...] = (
+    _to_v1,
+    _to_v2,
+    _to_v3,
+    _to_v4,
+    _to_v5,
+    _to_v6,
+    _to_v7,
+)
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(con: sqlite3.Connection) -> int:
+    return con.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(con: sqlite3.Connection) -> int:
+    if schema_version(con) >= SCHEMA_VERSION:
+        return 0
+    cur = con.cursor()
+    try:
+        # Take the write lock up front and re-read the version, another
+        # process may have migrated while we were waiting for it.
+        cur.execute("BEGIN IMMEDIATE")
+        version = schema_version(con)
+        for step in MIGRATIONS[version:]:
+            step(cur)
+        if version < SCHEMA_VERSION:
+            cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        con.commit()
+    except BaseException:
+        con.rollback()
+        raise
+    finally:
+        cur.close()
+    return max(SCHEMA_VERSION - version, 0)
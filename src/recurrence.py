@@ -0,0 +1,171 @@
+from datetime import datetime
+from datetime import timedelta
+from functools import lru_cache
+from typing import Iterator
+from typing import NamedTuple
+from typing import Optional
+
+from timestamps import add_months
+from timestamps import days_in_month
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+
+class RuleError(ValueError):
+    pass
+
+
+class Rule(NamedTuple):
+    freq: str
+    interval: int = 1
+    limit: Optional[int] = None  # COUNT, occurrences in all
+    until: Optional[datetime] = None
+    byday: tuple[int, ...] = ()  # weekdays, Monday is 0
+
+
+def _parse_until(value: str) -> datetime:
+    value = value.rstrip("Z")
+    try:
+        if len(value) == 8:
+            # A date alone includes the whole day.
+            return datetime.strptime(value, "%Y%m%d").replace(
+                hour=23, minute=59)
+        return datetime.strptime(value, "%Y%m%dT%H%M%S")
+    except ValueError:
+        raise RuleError(f"Invalid UNTIL {value!r}") from None
+
+
+def _positive(name: str, value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise RuleError(f"{name} must be a positive number, got {value!r}")
+    return number
+
+
+@lru_cache(maxsize=256)
+def parse_rule(text: str) -> Rule:
+    # The subset of RFC 5545 RRULE needed for calender entries: FREQ,
+    # INTERVAL, COUNT, UNTIL and BYDAY on weekly rules.
+    parts: dict[str, str] = {}
+    for part in text.strip().upper().removeprefix("RRULE:").split(";"):
+        name, sep, value = part.partition("=")
+        if not sep or not value:
+            raise RuleError(f"Invalid rule part {part!r}")
+        parts[name.strip()] = value.strip()
+    freq = parts.pop("FREQ", None)
+    if freq not in FREQUENCIES:
+        raise RuleError(f"FREQ must be one of {', '.join(FREQUENCIES)}")
+    interval = _positive("INTERVAL", parts.pop("INTERVAL", "1"))
+    count = parts.pop("COUNT", None)
+    until = parts.pop("UNTIL", None)
+    if count is not None and until is not None:
+        raise RuleError("COUNT and UNTIL can not be used together")
+    byday: tuple[int, ...] = ()
+    if "BYDAY" in parts:
+        if freq != "WEEKLY":
+            raise RuleError("BYDAY is only supported on weekly rules")
+        days = parts.pop("BYDAY").split(",")
+        if not set(days) <= set(WEEKDAYS):
+            raise RuleError(f"BYDAY takes weekdays from {','.join(WEEKDAYS)}")
+        byday = tuple(sorted({WEEKDAYS.index(day) for day in days}))
+    if parts:
+        raise RuleError(f"Unsupported rule parts: {', '.join(sorted(parts))}")
+    return Rule(freq, interval,
+                None if count is None else _positive("COUNT", count),
+                None if until is None else _parse_until(until), byday)
+
+
+def format_rule(rule: Rule) -> str:
+    parts = [f"FREQ={rule.freq}"]
+    if rule.interval != 1:
+        parts.append(f"INTERVAL={rule.interval}")
+    if rule.limit is not None:
+        parts.append(f"COUNT={rule.limit}")
+    if rule.until is not None:
+        parts.append(f"UNTIL={rule.until:%Y%m%dT%H%M%S}")
+    if rule.byday:
+        parts.append("BYDAY=" + ",".join(WEEKDAYS[day] for day in rule.byday))
+    return ";".join(parts)
+
+
+def _every(first: datetime, step: timedelta,
+           start: datetime) -> Iterator[tuple[int, datetime]]:
+    # Jumps straight to the first occurrence at or after start.
+    index = max(0, -((first - start) // step))
+    while True:
+        yield index, first + index * step
+        index += 1
+
+
+def _weekly_by_day(first: datetime, rule: Rule,
+                   start: datetime) -> Iterator[tuple[int, datetime]]:
+    monday = first - timedelta(days=first.weekday())
+    in_first_week = sum(1 for day in rule.byday if day >= first.weekday())
+    period = timedelta(weeks=rule.interval)
+    week = max(0, (start - monday) // period)
+    index = 0 if week == 0 else \
+        in_first_week + (week - 1) * len(rule.byday)
+    while True:
+        week_start = monday + week * period
+        for day in rule.byday:
+            when = week_start + timedelta(days=day)
+            if when >= first:
+                yield index, when
+                index += 1
+        week += 1
+
+
+def _by_month(first: datetime, months: int) -> Iterator[tuple[int, datetime]]:
+    # Months (or years) without the day of the first occurrence, like the
+    # 31st or February 29th, are skipped rather than clamped.
+    index = 0
+    step = 0
+    while True:
+        target = add_months(first.replace(day=1), step * months)
+        if first.day <= days_in_month(target.year, target.month):
+            yield index, target.replace(day=first.day)
+            index += 1
+        step += 1
+
+
+def _candidates(first: datetime, rule: Rule,
+                start: datetime) -> Iterator[tuple[int, datetime]]:
+    if rule.freq == "DAILY":
+        return _every(first, timedelta(days=rule.interval), start)
+    if rule.freq == "WEEKLY":
+        if rule.byday:
+            return _weekly_by_day(first, rule, start)
+        return _every(first, timedelta(weeks=rule.interval), start)
+    if rule.freq == "MONTHLY":
+        return _by_month(first, rule.interval)
+    return _by_month(first, 12 * rule.interval)
+
+
+def occurrences(first: datetime, rule: Rule, start: datetime,
+                end: datetime) -> Iterator[datetime]:
+    # Every occurrence between start and end, both inclusive.
+    for index, when in _candidates(first, rule, start):
+        if rule.limit is not None and index >= rule.limit:
+            return
+        if when > end or (rule.until is not None and when > rule.until):
+            return
+        if when >= start:
+            yield when
+
+
+def last_occurrence(first: datetime, rule: Rule) -> Optional[datetime]:
+    # None for rules that never end.
+    if rule.until is not None:
+        return rule.until
+    if rule.limit is None:
+        return None
+    last = first
+    for index, when in _candidates(first, rule, first):
+        if index >= rule.limit:
+            break
+        last = when
+    return last
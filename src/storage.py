@@ -0,0 +1,126 @@
+from datetime import datetime
+from types import TracebackType
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+from typing import NamedTuple
+from typing import Optional
+from typing import Protocol
+
+from constants import DB_NAME
+from constants import DEFAULT_BACKEND
+from constants import DEFAULT_BATCH_SIZE
+from constants import LOG_DB_NAME
+
+
+class Bootstrap(NamedTuple):
+    config: dict[str, int]
+    log_settings: dict[str, str]
+    # The entries of the range asked for, see Storage.entries.
+    entries: list[tuple[int, str]]
+
+
+class Storage(Protocol):
+    # What the calender, its caches, the agenda and the task commands need
+    # from a backend. Dates are "YYYY-MM-DD HH:MM:SS" strings, entries
+    # carry minutes since the epoch. TaskRepository (sqlite) also stores
+    # recurring tasks and imports iCalendar files, the other backends do
+    # not and report no occurrences.
+
+    def __enter__(self) -> "Storage":
+        ...
+
+    def __exit__(self,
+                 exc_type: Optional[type[BaseException]],
+                 exc: Optional[BaseException],
+                 tb: Optional[TracebackType]) -> None:
+        ...
+
+    def close(self) -> None:
+        ...
+
+    def subscribe(self, listener: Callable[[Optional[str]], None]) -> None:
+        ...
+
+    def watch(self) -> None:
+        ...
+
+    def poll_changes(self) -> bool:
+        ...
+
+    def init_db(self) -> None:
+        ...
+
+    def bootstrap(self, start: str, end: str) -> Bootstrap:
+        ...
+
+    def load_config(self) -> dict[str, int]:
+        ...
+
+    def load_log_settings(self) -> dict[str, str]:
+        ...
+
+    def save_config(self, updates: dict[str, int | str]) -> None:
+        ...
+
+    def add_task(self, date: str, task_desc: str) -> int:
+        ...
+
+    def add_tasks(self, rows: Iterable[tuple[str, str]],
+                  batch_size: int = DEFAULT_BATCH_SIZE
+                  ) -> tuple[int, list[tuple[str, str]]]:
+        ...
+
+    def delete_task(self, date: str) -> int:
+        ...
+
+    def delete_task_by_id(self, task_id: int) -> int:
+        ...
+
+    def delete_tasks_in_range(self, start: str, end: str) -> int:
+        ...
+
+    def entries(self, start: str, end: str) -> list[tuple[int, str]]:
+        ...
+
+    def occurrences(self, start: str,
+                    end: str) -> list[tuple[int, str, str]]:
+        ...
+
+    def iter_occurrences(self, start: str,
+                         end: str) -> Iterator[tuple[int, str, str]]:
+        ...
+
+    def tasks_for_day(self, date: datetime) -> list[tuple[str, str]]:
+        ...
+
+    def iter_tasks(self, start: Optional[str] = None,
+                   end: Optional[str] = None
+                   ) -> Iterator[tuple[int, str, str]]:
+        ...
+
+    def search(self, query: str, start: Optional[str] = None,
+               end: Optional[str] = None, limit: Optional[int] = None,
+               offset: int = 0, order: str = "date",
+               reverse: bool = False) -> Iterator[tuple[int, str, str]]:
+        ...
+
+    def task_counts(self, start: str, end: str) -> list[tuple[str, int]]:
+        ...
+
+
+def open_storage(backend: str = DEFAULT_BACKEND, path: Optional[str] = None,
+                 snapshot: bool = False) -> Storage:
+    # Every engine is imported on demand, the others never load sqlite3.
+    if backend == "sqlite":
+        from TaskRepository import TaskRepository
+        return TaskRepository(path or DB_NAME, snapshot=snapshot)
+    if snapshot:
+        raise ValueError("Only the sqlite backend can open a snapshot")
+    if backend == "memory":
+        from MemoryStorage import MemoryStorage
+        return MemoryStorage()
+    if backend == "log":
+        from LogStorage import LogStorage
+        return LogStorage(path or LOG_DB_NAME)
+    raise ValueError(f"Unknown storage backend {backend!r}")
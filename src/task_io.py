@@ -0,0 +1,67 @@
+import csv
+import json
+import os
+from typing import Iterable
+from typing import Iterator
+from typing import TextIO
+
+from constants import TASK_FORMATS
+
+CSV_FIELDS = ("date", "task")
+EXPORT_FIELDS = ("id", "date", "task")
+
+
+class TaskFormatError(ValueError):
+    pass
+
+
+def guess_format(path: str, default: str = "csv") -> str:
+    ext = os.path.splitext(path)[1].lstrip(".").lower()
+    if ext == "json":
+        ext = "jsonl"
+    return ext if ext in TASK_FORMATS else default
+
+
+def read_tasks(stream: TextIO, fmt: str) -> Iterator[tuple[int, str, str]]:
+    # Yields (line number, date, task) lazily so a file of any size is read
+    # with constant memory. Rows missing a field raise TaskFormatError.
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            date, task = row.get("date"), row.get("task")
+            if date is None or task is None:
+                raise TaskFormatError(f"line {reader.line_num}: expected "
+                                      f"columns {', '.join(CSV_FIELDS)}")
+            yield reader.line_num, date.strip(), task
+    elif fmt == "jsonl":
+        for line_num, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                obj = json.loads(line)
+                yield line_num, str(obj["date"]).strip(), str(obj["task"])
+            except (ValueError, KeyError, TypeError) as e:
+                raise TaskFormatError(f"line {line_num}: {e!r}") from e
+    else:
+        raise TaskFormatError(f"Unknown task format {fmt!r}")
+
+
+def write_tasks(stream: TextIO, rows: Iterable[tuple[int, str, str]],
+                fmt: str) -> int:
+    # The id column is informational, read_tasks ignores it so exports can
+    # be imported again.
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(stream)
+        writer.writerow(EXPORT_FIELDS)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    elif fmt == "jsonl":
+        for task_id, date, task in rows:
+            stream.write(json.dumps({"id": task_id, "date": date,
+                                     "task": task}) + "\n")
+            count += 1
+    else:
+        raise TaskFormatError(f"Unknown task format {fmt!r}")
+    return count
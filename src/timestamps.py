@@ -0,0 +1,41 @@
+from datetime import datetime
+from datetime import timedelta
+
+# Tasks are stored as whole minutes since the epoch. Dates are naive local
+# times, so the epoch is naive as well and no timezone conversion happens.
+_EPOCH = datetime(1970, 1, 1)
+_MINUTE = timedelta(minutes=1)
+MINUTES_PER_DAY = 24 * 60
+
+
+def to_minutes(date: str | datetime) -> int:
+    if isinstance(date, str):
+        date = datetime.fromisoformat(date)
+    return (date - _EPOCH) // _MINUTE
+
+
+def from_minutes(ts: int) -> str:
+    return (_EPOCH + ts * _MINUTE).isoformat(" ")
+
+
+def day_range(date: datetime) -> tuple[int, int]:
+    # Inclusive bounds of every minute of the given day.
+    start = to_minutes(date.replace(hour=0, minute=0, second=0,
+                                    microsecond=0))
+    return start, start + MINUTES_PER_DAY - 1
+
+
+def add_months(date: datetime, months: int) -> datetime:
+    # Same as adding a dateutil relativedelta(months=...): the day is
+    # clamped to the last day of the target month, Jan 31 + 1 is Feb 29.
+    year, month = divmod(date.year * 12 + date.month - 1 + months, 12)
+    month += 1
+    return date.replace(year=year, month=month,
+                        day=min(date.day, days_in_month(year, month)))
+
+
+def days_in_month(year: int, month: int) -> int:
+    # Avoids importing calendar, which is slow to import, on the headless
+    # code paths.
+    following = datetime(year + month // 12, month % 12 + 1, 1)
+    return (following - timedelta(days=1)).day
@@ -0,0 +1,107 @@
+import io
+import json
+
+import pytest
+
+import agenda
+from TaskRepository import TaskRepository
+
+
+def make_repo(tmp_path) -> TaskRepository:
+    repo = TaskRepository(str(tmp_path / "agenda.db"))
+    repo.init_db()
+    return repo
+
+
+def test_iter_agenda_merges_tasks_and_occurrences_by_date(tmp_path) -> None:
+    repo = make_repo(tmp_path)
+    repo.add_task("2025-01-07 09:00:00", "Dentist")
+    repo.add_task("2025-01-06 12:00:00", "Lunch")
+    repo.add_recurrence("2025-01-06 09:00:00", "Standup", "FREQ=DAILY")
+
+    entries = list(agenda.iter_agenda(repo, "2025-01-06 00:00:00",
+                                      "2025-01-07 23:59:00"))
+
+    assert entries == [
+        ("2025-01-06 09:00:00", "Standup", None, 1),
+        ("2025-01-06 12:00:00", "Lunch", 2, None),
+        ("2025-01-07 09:00:00", "Dentist", 1, None),
+        ("2025-01-07 09:00:00", "Standup", None, 1),
+    ]
+
+
+def test_iter_agenda_is_lazy(tmp_path) -> None:
+    repo = make_repo(tmp_path)
+    repo.add_tasks((f"2025-01-{day:02d} 09:00:00", f"task {day}")
+                   for day in range(1, 32))
+
+    entries = agenda.iter_agenda(repo, "2025-01-01 00:00:00",
+                                 "2025-01-31 23:59:00")
+
+    assert next(entries)[1] == "task 1"
+    assert next(entries)[1] == "task 2"
+
+
+def test_occurrences_are_expanded_one_window_at_a_time(tmp_path) -> None:
+    repo = make_repo(tmp_path)
+    repo.add_recurrence("2025-01-01 09:00:00", "Standup", "FREQ=DAILY")
+    windows = []
+    expand = repo.occurrences
+
+    def occurrences(start, end):
+        windows.append((start, end))
+        return expand(start, end)
+
+    repo.occurrences = occurrences
+
+    found = list(repo.iter_occurrences("2025-01-01 00:00:00",
+                                       "2025-03-31 23:59:00", days=31))
+
+    assert len(found) == 90
+    assert len(windows) == 3
+    assert windows[0] == ("2025-01-01 00:00:00", "2025-01-31 23:59:00")
+    assert windows[-1][1] == "2025-03-31 23:59:00"
+
+
+ENTRIES = [
+    ("2025-01-06 09:00:00", "Standup", None, 1),
+    ("2025-01-06 12:00:00", "Lunch, with team", 2, None),
+]
+
+
+def test_write_agenda_text() -> None:
+    out = io.StringIO()
+
+    assert agenda.write_agenda(out, ENTRIES, "text") == 2
+    assert out.getvalue() == ("2025-01-06 09:00  Standup\n"
+                              "2025-01-06 12:00  Lunch, with team\n")
+
+
+def test_write_agenda_json_lines() -> None:
+    out = io.StringIO()
+
+    agenda.write_agenda(out, ENTRIES, "json")
+
+    assert [json.loads(line) for line in out.getvalue().splitlines()] == [
+        {"date": "2025-01-06 09:00", "task": "Standup", "id": None,
+         "rule": 1},
+        {"date": "2025-01-06 12:00", "task": "Lunch, with team", "id": 2,
+         "rule": None},
+    ]
+
+
+def test_write_agenda_csv() -> None:
+    out = io.StringIO()
+
+    agenda.write_agenda(out, ENTRIES, "csv")
+
+    assert out.getvalue().splitlines() == [
+        "date,task,id,rule",
+        "2025-01-06 09:00,Standup,,1",
+        '2025-01-06 12:00,"Lunch, with team",2,',
+    ]
+
+
+def test_write_agenda_unknown_format() -> None:
+    with pytest.raises(ValueError):
+        agenda.write_agenda(io.StringIO(), ENTRIES, "xml")
@@ -84,3 +84,88 @@ def test_config_accepts_valid_colors() -> None:
     assert args.task_color == "green"
     assert args.task_title == "yellow"
     assert args.calendar_color == "white"
+
+
+def test_task_import_defaults_to_stdin() -> None:
+    args = get_args(["task", "import"])
+
+    assert args.task_command == "import"
+    assert args.file == "-"
+    assert args.format is None
+    assert args.batch_size > 0
+
+
+def test_task_export_parses_range_and_format() -> None:
+    args = get_args(["task", "export", "--format", "jsonl",
+                     "--from", "2025-01-01 00:00", "--to", "2025-02-01 00:00",
+                     "out.jsonl"])
+
+    assert args.task_command == "export"
+    assert args.format == "jsonl"
+    assert args.date_from == "2025-01-01 00:00"
+    assert args.date_to == "2025-02-01 00:00"
+    assert args.file == "out.jsonl"
+
+
+def test_task_delete_accepts_id_or_range() -> None:
+    by_id = get_args(["task", "delete", "--id", "7"])
+    by_range = get_args(["task", "delete", "--from", "2025-01-17 00:00",
+                         "--to", "2025-01-17 23:59"])
+
+    assert by_id.id == 7
+    assert by_range.date_from == "2025-01-17 00:00"
+    assert by_range.date_to == "2025-01-17 23:59"
+
+
+def test_task_delete_rejects_date_and_id_together() -> None:
+    with pytest.raises(SystemExit) as exc:
+        get_args(["task", "delete", "--id", "7", "--date", "2025-01-17 12:00"])
+
+    assert exc.value.code == 2
+
+
+def test_fast_path_defaults_match_full_parser() -> None:
+    from ArgParser import build_parser
+
+    assert get_args([]) == build_parser().parse_args([])
+
+
+def test_task_search_joins_words_and_pages() -> None:
+    args = get_args(["task", "search", "team", "meeting", "--order", "rank",
+                     "--page", "3"])
+
+    assert args.task_command == "search"
+    assert args.query == ["team", "meeting"]
+    assert args.order == "rank"
+    assert args.page == 3
+    assert args.limit > 0
+
+
+def test_agenda_range_and_format() -> None:
+    args = get_args(["agenda", "--from", "2025-01-01", "--to",
+                     "2025-12-31 18:00", "--format", "json"])
+
+    assert args.command == "agenda"
+    assert args.date_from == "2025-01-01"
+    assert args.date_to == "2025-12-31 18:00"
+    assert args.format == "json"
+    assert get_args(["agenda"]).format == "text"
+
+
+def test_snapshot_is_rejected_for_writing_commands() -> None:
+    assert get_args(["--snapshot"]).snapshot is True
+    assert get_args(["--snapshot", "task", "search", "x"]).snapshot is True
+    with pytest.raises(SystemExit) as exc:
+        get_args(["--snapshot", "task", "add", "--date", "2025-01-17 12:00",
+                  "Lunch"])
+
+    assert exc.value.code == 2
+
+
+def test_backend_choice() -> None:
+    assert get_args([]).backend is None
+    assert get_args(["--backend", "log", "agenda"]).backend == "log"
+    with pytest.raises(SystemExit):
+        get_args(["--backend", "csv"])
+    with pytest.raises(SystemExit):
+        get_args(["--snapshot", "--backend", "log"])
@@ -1,5 +1,7 @@
 from datetime import datetime
 
+import pytest
+
 from CliCalendar import CliCalender
 
 
@@ -33,6 +35,9 @@ class FakeCurses:
     def endwin(self) -> None:
         self.ended = True
 
+    def doupdate(self) -> None:
+        pass
+
 
 def test_constructor_supports_dependency_injection(tmp_path) -> None:
     fake_curses = FakeCurses()
@@ -65,3 +70,47 @@ def test_constructor_uses_default_config_values_when_db_empty(tmp_path) -> None:
     assert cal._config["task_color"] == 1
     assert cal._config["task_title"] == 3
     assert cal._config["calendar_color"] == 0
+
+
+def test_handle_signal_closes_repository_and_ends_curses(tmp_path) -> None:
+    fake_curses = FakeCurses()
+    cal = CliCalender(
+        db_path=str(tmp_path / "calendar_test.db"),
+        curses_api=fake_curses,
+    )
+
+    with pytest.raises(SystemExit) as exc:
+        cal._handle_signal(2, None)
+
+    assert exc.value.code == 0
+    assert fake_curses.ended is True
+    assert cal._repo._pool == []
+
+
+def test_constructor_opens_the_chosen_backend(tmp_path) -> None:
+    log_path = str(tmp_path / "calendar_test.jsonl")
+    from LogStorage import LogStorage
+    LogStorage(log_path).add_task("2024-02-29 12:00:00", "Leap lunch")
+
+    cal = CliCalender(db_path=log_path,
+                      now_fn=lambda: datetime(2024, 2, 29, 10, 30, 0),
+                      curses_api=FakeCurses(), backend="log")
+
+    assert [task.task for task in cal._tasks.tasks_for_day(
+        datetime(2024, 2, 29))] == ["Leap lunch"]
+
+
+def test_profiler_times_the_bootstrap_and_month_loads(tmp_path) -> None:
+    from Profiler import Profiler
+    profiler = Profiler()
+    cal = CliCalender(
+        db_path=str(tmp_path / "calendar_test.db"),
+        now_fn=lambda: datetime(2024, 2, 29, 10, 30, 0),
+        curses_api=FakeCurses(),
+        profiler=profiler,
+    )
+
+    cal._tasks.tasks_for_day(datetime(2024, 9, 1))
+
+    assert len(profiler.timings["db.bootstrap"]) == 1
+    assert len(profiler.timings["db.entries"]) >= 1
@@ -0,0 +1,428 @@
+import io
+from argparse import Namespace
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+
+import commands
+import logsetup
+from TaskRepository import TaskRepository
+
+
+def make_repo(tmp_path) -> TaskRepository:
+    repo = TaskRepository(str(tmp_path / "commands.db"))
+    repo.init_db()
+    return repo
+
+
+def test_add_task_appends_seconds_and_stores_task(tmp_path) -> None:
+    repo = make_repo(tmp_path)
+
+    commands.add_task(repo, "2025-01-17 12:00", "Lunch")
+
+    assert repo.tasks_for_day(datetime(2025, 1, 17)) == [
+        ("2025-01-17 12:00:00", "Lunch"),
+    ]
+
+
+def test_add_task_pads_unpadded_dates(tmp_path) -> None:
+    repo = make_repo(tmp_path)
+
+    commands.add_task(repo, "2024-1-5 9:00", "Breakfast")
+
+    assert repo.tasks_for_day(datetime(2024, 1, 5)) == [
+        ("2024-01-05 09:00:00", "Breakfast"),
+    ]
+
+
+def test_add_task_invalid_date_exits_with_code_2(tmp_path) -> None:
+    repo = make_repo(tmp_path)
+
+    with pytest.raises(SystemExit) as exc:
+        commands.add_task(repo, "17.01.2025", "Lunch")
+
+    assert exc.value.code == 2
+
+
+def test_delete_task_removes_task(tmp_path) -> None:
+    repo = make_repo(tmp_path)
+    commands.add_task(repo, "2025-01-17 12:00", "Lunch")
+
+    commands.delete_task(repo, "2025-01-17 12:00")
+
+    assert repo.tasks_for_day(datetime(2025, 1, 17)) == []
+
+
+def test_save_user_config_maps_colors(tmp_path) -> None:
+    repo = make_repo(tmp_path)
+    args = Namespace(bg_color="black", cursor_color="red",
+                     task_color="green", task_title="yellow",
+                     calendar_color="white")
+
+    commands.save_user_config(repo, args)
+
+    assert repo.load_config() == {
+        "bg_color": 0,
+        "cursor_color": 1,
+        "task_color": 2,
+        "task_title": 3,
+        "calendar_color": 7,
+    }
+
+
+def test_save_user_config_stores_absolute_log_path(tmp_path,
+                                                   monkeypatch) -> None:
+    repo = make_repo(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    args = Namespace(bg_color=None, cursor_color=None, task_color=None,
+                     task_title=None, calendar_color=None,
+                     log_path="calender.log", log_level="debug")
+
+    commands.save_user_config(repo, args)
+
+    assert repo.load_log_settings() == {
+        "path": str(tmp_path / "calender.log"),
+        "level": "debug",
+    }
+
+
+def test_run_command_creates_db_and_adds_task(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path))
+    db_path = str(tmp_path / "headless.db")
+    args = Namespace(command="task", task_command="add",
+                     date="2025-01-17 12:00", description="Lunch")
+
+    try:
+        assert commands.run_command(args, db_path=db_path) == 0
+    finally:
+        logsetup.shutdown_logging()
+
+    with TaskRepository(db_path) as repo:
+        assert repo.tasks_for_day(datetime(2025, 1, 17)) == [
+            ("2025-01-17 12:00:00", "Lunch"),
+        ]
+
+
+def test_import_tasks_reports_invalid_rows_and_conflicts(tmp_path, capsys) -> None:
+    repo = make_repo(tmp_path)
+    repo.add_task("2025-01-17 12:00:00", "Existing")
+    src = tmp_path / "tasks.csv"
+    src.write_text("date,task\n"
+                   "2025-01-17 09:00,Standup\n"
+                   "yesterday,Broken\n"
+                   "2025-01-17 12:00,Existing\n"
+                   "2025-01-17 12:00,Same slot\n")
+    args = Namespace(file=str(src), format=None, batch_size=10)
+
+    commands.import_tasks(repo, args)
+
+    err = capsys.readouterr().err
+    assert "line 3: invalid date 'yesterday'" in err
+    assert "conflict: 'Existing' at 2025-01-17 12:00 already exists" in err
+    assert "imported 2 tasks, 1 conflicts" in err
+    assert repo.tasks_for_day(datetime(2025, 1, 17)) == [
+        ("2025-01-17 09:00:00", "Standup"),
+        ("2025-01-17 12:00:00", "Existing"),
+        ("2025-01-17 12:00:00", "Same slot"),
+    ]
+
+
+def test_import_tasks_pads_unpadded_dates(tmp_path, capsys) -> None:
+    repo = make_repo(tmp_path)
+    src = tmp_path / "tasks.csv"
+    src.write_text("date,task\n"
+                   "2024-1-5 9:00,Breakfast\n"
+                   "2024-01-05 12:00,Lunch\n")
+    args = Namespace(file=str(src), format=None, batch_size=10)
+
+    commands.import_tasks(repo, args)
+
+    assert "imported 2 tasks, 0 conflicts" in capsys.readouterr().err
+    assert repo.tasks_for_day(datetime(2024, 1, 5)) == [
+        ("2024-01-05 09:00:00", "Breakfast"),
+        ("2024-01-05 12:00:00", "Lunch"),
+    ]
+
+
+def test_import_tasks_malformed_file_imports_nothing(tmp_path) -> None:
+    repo = make_repo(tmp_path)
+    src = tmp_path / "tasks.jsonl"
+    src.write_text('{"date": "2025-01-17 09:00", "task": "Standup"}\n'
+                   "not json\n")
+    args = Namespace(file=str(src), format=None, batch_size=1)
+
+    with pytest.raises(SystemExit) as exc:
+        commands.import_tasks(repo, args)
+
+    assert exc.value.code == 2
+    assert repo.tasks_for_day(datetime(2025, 1, 17)) == []
+
+
+def test_export_tasks_writes_range_as_jsonl(tmp_path) -> None:
+    repo = make_repo(tmp_path)
+    repo.add_task("2025-01-16 09:00:00", "Before")
+    task_id = repo.add_task("2025-01-17 09:00:00", "Standup")
+    dest = tmp_path / "out.jsonl"
+    args = Namespace(file=str(dest), format=None,
+                     date_from="2025-01-17 00:00", date_to=None)
+
+    commands.export_tasks(repo, args)
+
+    assert dest.read_text() == (
+        f'{{"id": {task_id}, "date": "2025-01-17 09:00", "task": "Standup"}}\n'
+    )
+
+
+def test_delete_by_id_and_by_range(tmp_path) -> None:
+    repo = make_repo(tmp_path)
+    first = repo.add_task("2025-01-17 09:00:00", "Standup")
+    repo.add_task("2025-01-17 09:00:00", "Coffee")
+    repo.add_task("2025-01-18 09:00:00", "Standup")
+    repo.add_task("2025-01-19 09:00:00", "Standup")
+
+    commands.handle_task(repo, Namespace(task_command="delete", id=first,
+                                         date=None, date_from=None,
+                                         date_to=None))
+    assert repo.tasks_for_day(datetime(2025, 1, 17)) == [
+        ("2025-01-17 09:00:00", "Coffee"),
+    ]
+
+    commands.handle_task(repo, Namespace(task_command="delete", id=None,
+                                         date=None,
+                                         date_from="2025-01-17 00:00",
+                                         date_to="2025-01-18 23:59"))
+    assert [row[1:] for row in repo.iter_tasks()] == [
+        ("2025-01-19 09:00:00", "Standup"),
+    ]
+
+
+def test_delete_range_without_end_exits_with_code_2(tmp_path) -> None:
+    repo = make_repo(tmp_path)
+    args = Namespace(task_command="delete", id=None, date=None,
+                     date_from="2025-01-17 00:00", date_to=None)
+
+    with pytest.raises(SystemExit) as exc:
+        commands.handle_task(repo, args)
+
+    assert exc.value.code == 2
+
+
+def test_search_tasks_prints_one_page_tab_separated(tmp_path, capsys) -> None:
+    repo = make_repo(tmp_path)
+    for day in range(1, 6):
+        commands.add_task(repo, f"2025-01-0{day} 10:00", f"Gym day {day}")
+    args = Namespace(task_command="search", query=["gym", "day"],
+                     date_from=None, date_to=None, limit=2, page=2,
+                     order="date")
+
+    commands.handle_task(repo, args)
+
+    assert capsys.readouterr().out.splitlines() == [
+        "3\t2025-01-03 10:00\tGym day 3",
+        "4\t2025-01-04 10:00\tGym day 4",
+    ]
+
+
+def test_search_tasks_reports_no_matches_and_bad_pages(tmp_path,
+                                                       capsys) -> None:
+    repo = make_repo(tmp_path)
+    args = Namespace(query=["nothing"], date_from=None, date_to=None,
+                     limit=10, page=1, order="date")
+
+    commands.search_tasks(repo, args)
+    assert "no tasks matching 'nothing'" in capsys.readouterr().err
+
+    args.page = 0
+    with pytest.raises(SystemExit) as exc:
+        commands.search_tasks(repo, args)
+    assert exc.value.code == 2
+
+
+def test_recurring_tasks_from_the_command_line(tmp_path, capsys) -> None:
+    repo = make_repo(tmp_path)
+
+    commands.handle_task(repo, Namespace(
+        task_command="add", date="2025-01-06 09:00", description="Standup",
+        repeat="weekly", rrule=None))
+    commands.handle_task(repo, Namespace(
+        task_command="add", date="2025-01-31 10:00", description="Report",
+        repeat=None, rrule="FREQ=MONTHLY;COUNT=3"))
+    commands.handle_task(repo, Namespace(
+        task_command="skip", rule=1, date="2025-01-13 09:00"))
+    commands.handle_task(repo, Namespace(
+        task_command="move", rule=1, date="2025-01-20 09:00",
+        new_date="2025-01-21 11:00", description=None))
+    commands.handle_task(repo, Namespace(task_command="rules"))
+
+    assert capsys.readouterr().out.splitlines() == [
+        "1\t2025-01-06 09:00\tFREQ=WEEKLY\tStandup",
+        "2\t2025-01-31 10:00\tFREQ=MONTHLY;COUNT=3\tReport",
+    ]
+    assert [row[1][:10] for row in repo.occurrences(
+        "2025-01-01 00:00:00", "2025-12-31 23:59:00")
+        if row[0] == 2] == ["2025-01-31", "2025-03-31", "2025-05-31"]
+    assert [row[1] for row in repo.occurrences(
+        "2025-01-13 00:00:00", "2025-01-21 23:59:00")] == [
+        "2025-01-21 11:00:00"]
+
+
+def test_recurring_task_errors_exit_with_an_error_code(tmp_path) -> None:
+    repo = make_repo(tmp_path)
+    commands.add_recurring_task(repo, "2025-01-06 09:00", "Standup",
+                                "FREQ=DAILY")
+
+    with pytest.raises(SystemExit) as exc:
+        commands.add_recurring_task(repo, "2025-01-06 09:00", "Standup",
+                                    "FREQ=HOURLY")
+    assert exc.value.code == 2
+    with pytest.raises(SystemExit) as exc:
+        commands.handle_task(repo, Namespace(
+            task_command="skip", rule=1, date="2025-01-06 10:00"))
+    assert exc.value.code == 1
+    with pytest.raises(SystemExit) as exc:
+        commands.handle_task(repo, Namespace(
+            task_command="move", rule=1, date="2025-01-06 09:00",
+            new_date=None, description=None))
+    assert exc.value.code == 2
+
+
+def test_show_agenda_covers_whole_days(tmp_path) -> None:
+    repo = make_repo(tmp_path)
+    repo.add_task("2025-01-06 00:00:00", "Midnight")
+    repo.add_task("2025-01-07 23:59:00", "Last minute")
+    repo.add_task("2025-01-08 00:00:00", "Next day")
+    out = io.StringIO()
+
+    commands.show_agenda(repo, Namespace(date_from="2025-01-06",
+                                         date_to="2025-01-07",
+                                         format="text"), out)
+
+    assert out.getvalue().splitlines() == [
+        "2025-01-06 00:00  Midnight",
+        "2025-01-07 23:59  Last minute",
+    ]
+
+
+def test_show_agenda_defaults_to_a_week_from_today(tmp_path) -> None:
+    repo = make_repo(tmp_path)
+    today = datetime.now().replace(hour=8, minute=0, second=0,
+                                   microsecond=0)
+    for days in (0, 6, 7):
+        repo.add_task((today + timedelta(days=days)).isoformat(" "),
+                      f"in {days} days")
+    out = io.StringIO()
+
+    commands.show_agenda(repo, Namespace(date_from=None, date_to=None,
+                                         format="text"), out)
+
+    assert [line.split("  ")[1] for line in out.getvalue().splitlines()] == [
+        "in 0 days", "in 6 days"]
+
+
+@pytest.mark.parametrize("date_from, date_to", [
+    ("2025-01-08", "2025-01-07"),
+    ("17.01.2025", None),
+])
+def test_show_agenda_rejects_bad_ranges(tmp_path, date_from,
+                                        date_to) -> None:
+    repo = make_repo(tmp_path)
+
+    with pytest.raises(SystemExit) as exc:
+        commands.show_agenda(repo, Namespace(date_from=date_from,
+                                             date_to=date_to, format="text"),
+                             io.StringIO())
+
+    assert exc.value.code == 2
+
+
+ICS = ("BEGIN:VCALENDAR\r\n"
+       + "".join(f"BEGIN:VEVENT\r\nUID:{i}@x\r\n"
+                 f"DTSTART:202501{i + 1:02d}T090000\r\n"
+                 f"SUMMARY:event {i}\r\nEND:VEVENT\r\n" for i in range(5))
+       + "BEGIN:VEVENT\r\nUID:bad@x\r\nEND:VEVENT\r\n"
+       + "END:VCALENDAR\r\n")
+
+
+def test_import_calendar_resumes_after_a_failure(tmp_path, monkeypatch,
+                                                 capsys) -> None:
+    repo = make_repo(tmp_path)
+    path = tmp_path / "cal.ics"
+    path.write_bytes(ICS.encode())
+    args = Namespace(file=str(path), format=None, batch_size=2)
+    import_events = repo.import_events
+    calls = []
+
+    def failing(events, checkpoint=None):
+        calls.append(len(events))
+        if len(calls) == 2:
+            raise OSError("disk full")
+        return import_events(events, checkpoint)
+
+    monkeypatch.setattr(repo, "import_events", failing)
+    with pytest.raises(OSError):
+        commands.import_tasks(repo, args)
+    monkeypatch.setattr(repo, "import_events", import_events)
+    capsys.readouterr()
+
+    commands.import_tasks(repo, args)
+
+    err = capsys.readouterr().err
+    assert "resuming at byte" in err
+    assert "imported 3 events, 0 already there, 1 skipped" in err
+    assert [row[2] for row in repo.iter_tasks()] == [
+        f"event {i}" for i in range(5)]
+    commands.import_tasks(repo, args)
+    assert "imported 0 events, 5 already there, 1 skipped" in \
+        capsys.readouterr().err
+
+
+def test_export_calendar_round_trips(tmp_path, capsys) -> None:
+    repo = make_repo(tmp_path)
+    repo.add_task("2025-01-07 12:00:00", "Lunch, with team")
+    repo.add_recurrence("2025-01-06 09:00:00", "Standup", "FREQ=DAILY")
+    path = tmp_path / "out.ics"
+
+    commands.export_tasks(repo, Namespace(file=str(path), format=None,
+                                          date_from=None, date_to=None))
+    other = TaskRepository(str(tmp_path / "other.db"))
+    other.init_db()
+    commands.import_tasks(other, Namespace(file=str(path), format=None,
+                                           batch_size=500))
+
+    assert path.read_bytes().startswith(b"BEGIN:VCALENDAR\r\n")
+    assert [row[1:] for row in other.iter_tasks()] == [
+        ("2025-01-07 12:00:00", "Lunch, with team")]
+    assert [row[1:] for row in other.iter_recurrences()] == [
+        ("2025-01-06 09:00:00", "Standup", "FREQ=DAILY")]
+    assert "imported 2 events" in capsys.readouterr().err
+
+
+def test_run_command_stores_tasks_in_the_chosen_backend(tmp_path,
+                                                        monkeypatch) -> None:
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path))
+    log_path = str(tmp_path / "tasks.jsonl")
+    args = Namespace(command="task", task_command="add", backend="log",
+                     date="2025-01-17 12:00", description="Lunch")
+
+    try:
+        assert commands.run_command(args, db_path=log_path) == 0
+        args.rrule = "FREQ=DAILY"
+        with pytest.raises(SystemExit) as exc:
+            commands.run_command(args, db_path=log_path)
+    finally:
+        logsetup.shutdown_logging()
+
+    assert exc.value.code == 2
+    from LogStorage import LogStorage
+    assert LogStorage(log_path).tasks_for_day(datetime(2025, 1, 17)) == [
+        ("2025-01-17 12:00:00", "Lunch"),
+    ]
+
+
+def test_recurring_tasks_refuse_other_backends_without_the_check() -> None:
+    from MemoryStorage import MemoryStorage
+    args = Namespace(command="task", task_command="rules")
+
+    with pytest.raises(TypeError):
+        commands.handle_task(MemoryStorage(), args)
@@ -0,0 +1,124 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import pytest
+
+import TaskRepository as task_repository_module
+from MonthCache import MonthCache
+from TaskRepository import TaskRepository
+
+SRC_DIR = os.path.dirname(os.path.abspath(task_repository_module.__file__))
+
+WRITERS = 4
+TASKS_PER_WRITER = 150
+MIN_WRITES_PER_SECOND = 50
+
+WRITER = """
+import sys
+from TaskRepository import TaskRepository
+
+writer, count = int(sys.argv[1]), int(sys.argv[2])
+with TaskRepository(sys.argv[3]) as repo:
+    for i in range(count):
+        repo.add_task(f"2025-01-{i % 28 + 1:02d} {writer:02d}:{i % 60:02d}:00",
+                      f"writer {writer} task {i}")
+"""
+
+
+def test_journal_and_synchronous_pragmas_are_applied(tmp_path) -> None:
+    repo = TaskRepository(str(tmp_path / "pragmas.db"), busy_timeout=1234)
+    con = repo._connect()
+
+    assert con.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert con.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert con.execute("PRAGMA busy_timeout").fetchone()[0] == 1234
+
+
+def test_journal_mode_can_be_left_alone(tmp_path) -> None:
+    repo = TaskRepository(str(tmp_path / "pragmas.db"), journal_mode=None)
+
+    assert repo._connect().execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+
+
+def test_unknown_pragma_values_are_rejected(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        TaskRepository(str(tmp_path / "x.db"), journal_mode="fast")
+    with pytest.raises(ValueError):
+        TaskRepository(str(tmp_path / "x.db"), synchronous="sometimes")
+
+
+def test_busy_errors_are_retried_with_backoff(tmp_path, monkeypatch) -> None:
+    repo = TaskRepository(str(tmp_path / "busy.db"), busy_retries=3)
+    repo.init_db()
+    sleeps: list[float] = []
+    monkeypatch.setattr(task_repository_module.time, "sleep", sleeps.append)
+    real_connect = repo._connect
+    failures = {"left": 2}
+
+    class FlakyConnection:
+        def __init__(self, con):
+            self._con = con
+
+        def cursor(self):
+            if failures["left"]:
+                failures["left"] -= 1
+                raise sqlite3.OperationalError("database is locked")
+            return self._con.cursor()
+
+        def __getattr__(self, name):
+            return getattr(self._con, name)
+
+    monkeypatch.setattr(repo, "_connect", lambda: FlakyConnection(real_connect()))
+
+    repo.add_task("2025-01-17 12:00:00", "Lunch")
+
+    assert len(sleeps) == 2
+    assert sleeps[1] > sleeps[0] * 0.5
+    assert repo.tasks_for_day(datetime(2025, 1, 17)) == [
+        ("2025-01-17 12:00:00", "Lunch"),
+    ]
+
+
+def test_busy_errors_give_up_after_retries(tmp_path, monkeypatch) -> None:
+    repo = TaskRepository(str(tmp_path / "busy.db"), busy_retries=1)
+    monkeypatch.setattr(task_repository_module.time, "sleep", lambda _s: None)
+
+    def always_locked():
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(repo, "_connect", always_locked)
+
+    with pytest.raises(sqlite3.OperationalError):
+        repo.add_task("2025-01-17 12:00:00", "Lunch")
+
+
+def test_concurrent_writers_and_interactive_reader_lose_nothing(tmp_path) -> None:
+    db_path = str(tmp_path / "shared.db")
+    reader = TaskRepository(db_path)
+    reader.init_db()
+    cache = MonthCache(reader)
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+
+    start = time.perf_counter()
+    writers = [subprocess.Popen([sys.executable, "-c", WRITER, str(n),
+                                 str(TASKS_PER_WRITER), db_path],
+                                env=env, stderr=subprocess.PIPE)
+               for n in range(WRITERS)]
+    reads = 0
+    while any(w.poll() is None for w in writers):
+        # What the calender does on every keypress and month change.
+        cache.clear()
+        cache.tasks_for_day(datetime(2025, 1, reads % 28 + 1))
+        reads += 1
+    elapsed = time.perf_counter() - start
+
+    for w in writers:
+        assert w.returncode == 0, w.stderr.read().decode()
+    total = WRITERS * TASKS_PER_WRITER
+    assert len(list(reader.iter_tasks())) == total
+    assert reads > 0
+    assert total / elapsed > MIN_WRITES_PER_SECOND
@@ -0,0 +1,195 @@
+import os
+import stat
+import threading
+from datetime import datetime
+
+import pytest
+
+import client
+import daemon
+from constants import DAEMON_PROTOCOL
+from TaskRepository import TaskRepository
+
+
+def make_repo(tmp_path) -> TaskRepository:
+    repo = TaskRepository(str(tmp_path / "daemon.db"))
+    repo.init_db()
+    return repo
+
+
+def request(*argv: str, backend: str = "") -> bytes:
+    return "\0".join([DAEMON_PROTOCOL, backend, *argv]).encode()
+
+
+def split_reply(reply: bytes) -> tuple[int, bytes, bytes]:
+    header, _, body = reply.partition(b"\n")
+    code, length = map(int, header.split())
+    return code, body[:length], body[length:]
+
+
+def test_handle_request_runs_task_add(tmp_path) -> None:
+    repo = make_repo(tmp_path)
+
+    reply = daemon.handle_request(repo, "sqlite", request(
+        "task", "add", "--date", "2025-01-17 12:00", "Lunch"))
+
+    assert split_reply(reply) == (0, b"", b"")
+    assert repo.tasks_for_day(datetime(2025, 1, 17)) == [
+        ("2025-01-17 12:00:00", "Lunch"),
+    ]
+
+
+def test_handle_request_lists_rules(tmp_path) -> None:
+    repo = make_repo(tmp_path)
+    repo.add_recurrence("2025-01-17 12:00:00", "Lunch", "FREQ=DAILY")
+
+    code, out, err = split_reply(daemon.handle_request(
+        repo, "sqlite", request("task", "rules")))
+
+    assert (code, err) == (0, b"")
+    assert b"Lunch" in out
+
+
+def test_handle_request_returns_usage_on_parse_error(tmp_path) -> None:
+    repo = make_repo(tmp_path)
+
+    code, out, err = split_reply(daemon.handle_request(
+        repo, "sqlite", request("task", "add", "Lunch")))
+
+    assert code == 2
+    assert out == b""
+    assert b"usage:" in err
+
+
+def test_handle_request_reuses_the_parser(tmp_path) -> None:
+    repo = make_repo(tmp_path)
+    parser = daemon.build_parser()
+
+    for minute in ("00", "30"):
+        reply = daemon.handle_request(repo, "sqlite", request(
+            "task", "add", "--date", f"2025-01-17 12:{minute}", "Lunch"),
+            parser)
+        assert split_reply(reply)[0] == 0
+
+    assert len(repo.tasks_for_day(datetime(2025, 1, 17))) == 2
+
+
+@pytest.mark.parametrize("data", [
+    request("task", "add", "--date", "2025-01-17 12:00", "Lunch",
+            backend="log"),
+    request("config", "--log-level", "off"),
+    request("task", "import"),
+    request("task", "export", "tasks.csv"),
+    request("agenda"),
+    "0\0\0task\0rules".encode(),
+])
+def test_handle_request_falls_back(tmp_path, data) -> None:
+    repo = make_repo(tmp_path)
+
+    assert daemon.handle_request(repo, "sqlite", data) == daemon.FALLBACK
+    assert repo.tasks_for_day(datetime(2025, 1, 17)) == []
+
+
+@pytest.mark.parametrize("data", [b"", b"agenda", b"\xff\0\0agenda"])
+def test_handle_request_rejects_malformed_requests(tmp_path, data) -> None:
+    code, out, err = split_reply(daemon.handle_request(
+        make_repo(tmp_path), "sqlite", data))
+
+    assert (code, out) == (2, b"")
+    assert b"malformed request" in err
+
+
+def test_handle_request_rejects_sqlite_only_commands(tmp_path) -> None:
+    from MemoryStorage import MemoryStorage
+
+    code, _, _ = split_reply(daemon.handle_request(
+        MemoryStorage(), "memory", request(
+            "task", "add", "--date", "2025-01-17 12:00", "--repeat",
+            "daily", "Standup", backend="memory")))
+
+    assert code == 2
+
+
+def test_handle_request_reports_failures(tmp_path, monkeypatch) -> None:
+    repo = make_repo(tmp_path)
+
+    def broken(repo, args) -> int:
+        raise RuntimeError("disk on fire")
+
+    monkeypatch.setattr(daemon.commands, "dispatch", broken)
+    code, _, err = split_reply(daemon.handle_request(
+        repo, "sqlite", request("task", "rules")))
+
+    assert code == 1
+    assert b"see the log" in err
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    # Unix socket paths are short, the socket is made relative to tmp_path.
+    monkeypatch.chdir(tmp_path)
+    repo = make_repo(tmp_path)
+    server = daemon.DaemonServer("test.sock", repo, "sqlite")
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join()
+    server.server_close()
+    repo.close()
+
+
+def test_socket_is_private(server) -> None:
+    assert stat.S_IMODE(os.stat("test.sock").st_mode) == 0o600
+
+
+def test_client_request_round_trip(server, monkeypatch) -> None:
+    monkeypatch.delenv("CLI_CALENDER_BACKEND", raising=False)
+
+    reply = client.request(["task", "add", "--date", "2025-01-17 12:00",
+                            "Lunch"], "test.sock")
+
+    assert reply == (0, b"", b"")
+    assert server.repo.tasks_for_day(datetime(2025, 1, 17)) == [
+        ("2025-01-17 12:00:00", "Lunch"),
+    ]
+
+
+def test_client_request_falls_back_for_other_backend(
+        server, monkeypatch) -> None:
+    monkeypatch.setenv("CLI_CALENDER_BACKEND", "log")
+
+    assert client.request(["task", "rules"], "test.sock") is None
+
+
+def test_silent_client_does_not_block_the_daemon(server, monkeypatch) -> None:
+    import socket
+    monkeypatch.setattr(daemon._Handler, "timeout", 0.1)
+    monkeypatch.delenv("CLI_CALENDER_BACKEND", raising=False)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as silent:
+        silent.connect("test.sock")
+        assert client.request(["task", "rules"], "test.sock") == (
+            0, b"", b"")
+
+
+def test_client_request_without_daemon(tmp_path) -> None:
+    assert client.request(["agenda"], str(tmp_path / "none.sock")) is None
+
+
+def test_client_main_entry_runs_command_without_daemon(
+        tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    calls = []
+    import main
+    monkeypatch.setattr(main, "main_entry", calls.append)
+
+    client.main_entry(["agenda"])
+
+    assert calls == [["agenda"]]
+
+
+def test_serve_refuses_second_daemon(server, capsys) -> None:
+    assert daemon.serve("sqlite", "test.sock") == 1
+    # The probe is answered, not a traceback from the handler.
+    assert "Traceback" not in capsys.readouterr().err
@@ -0,0 +1,128 @@
+import io
+from datetime import datetime
+from datetime import timezone
+
+import pytest
+
+import ics
+
+CALENDAR = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:standup@example.com\r\n"
+    "DTSTART:20250106T090000\r\n"
+    "RRULE:FREQ=WEEKLY;WKST=SU;BYDAY=MO,WE\r\n"
+    "EXDATE:20250108T090000,20250115T090000\r\n"
+    "SUMMARY:Daily \\, weekly standup\r\n"
+    "BEGIN:VALARM\r\n"
+    "ACTION:DISPLAY\r\n"
+    "SUMMARY:Not the event summary\r\n"
+    "END:VALARM\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:lunch@example.com\r\n"
+    'DTSTART;X-NOTE="at: noon";VALUE=DATE-TIME:20250107T120000\r\n'
+    "SUMMARY:A long lunch description that is folded over more than one\r\n"
+    "  line\r\n"
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+
+def events(text: str, offset: int = 0) -> list:
+    stream = io.BytesIO(text.encode()[offset:])
+    return [ics.to_event(props) for _, _, props in
+            ics.read_events(stream, offset)]
+
+
+def test_read_events_parses_rules_params_and_folds() -> None:
+    assert events(CALENDAR) == [
+        ics.Event("standup@example.com", "2025-01-06 09:00:00",
+                  "Daily , weekly standup", "FREQ=WEEKLY;BYDAY=MO,WE",
+                  ("2025-01-08 09:00:00", "2025-01-15 09:00:00")),
+        ics.Event("lunch@example.com", "2025-01-07 12:00:00",
+                  "A long lunch description that is folded over more than "
+                  "one line"),
+    ]
+
+
+def test_offsets_point_past_each_event() -> None:
+    data = CALENDAR.encode()
+    found = list(ics.read_events(io.BytesIO(data)))
+
+    assert [line_num for line_num, _, _ in found] == [3, 14]
+    first_end = found[0][1]
+    assert data[:first_end].endswith(b"END:VEVENT\r\n")
+    # Reading again from the offset finds only the events after it.
+    assert [e.uid for e in events(CALENDAR, first_end)] == [
+        "lunch@example.com"]
+
+
+def test_dates_in_utc_zones_and_whole_days() -> None:
+    text = ("BEGIN:VEVENT\r\nUID:a\r\nDTSTART:20250107T120000Z\r\n"
+            "END:VEVENT\r\n"
+            "BEGIN:VEVENT\r\nUID:b\r\nDTSTART;VALUE=DATE:20250107\r\n"
+            "END:VEVENT\r\n"
+            "BEGIN:VEVENT\r\nUID:c\r\n"
+            "DTSTART;TZID=Nowhere/Special:20250107T120000\r\nEND:VEVENT\r\n")
+    utc = datetime(2025, 1, 7, 12, tzinfo=timezone.utc).astimezone()
+
+    assert [e.date for e in events(text)] == [
+        utc.replace(tzinfo=None).isoformat(" "),
+        "2025-01-07 00:00:00",
+        "2025-01-07 12:00:00",
+    ]
+
+
+@pytest.mark.parametrize("body, message", [
+    ("SUMMARY:No start\r\n", "no DTSTART"),
+    ("DTSTART:tomorrow\r\n", "invalid date"),
+    ("DTSTART:20250107T120000\r\nRRULE:FREQ=HOURLY\r\n", "RRULE"),
+    ("DTSTART:20250107T120000\r\nSTATUS:CANCELLED\r\n", "cancelled"),
+])
+def test_to_event_rejects_unusable_events(body, message) -> None:
+    text = f"BEGIN:VEVENT\r\nUID:x\r\n{body}END:VEVENT\r\n"
+
+    with pytest.raises(ics.IcsFormatError, match=message):
+        events(text)
+
+
+def test_events_without_uid_get_a_stable_one() -> None:
+    text = ("BEGIN:VEVENT\r\nDTSTART:20250107T120000\r\nSUMMARY:Lunch\r\n"
+            "END:VEVENT\r\n")
+
+    assert events(text)[0].uid == events(text)[0].uid
+
+
+def test_unclosed_event_and_garbage_lines_raise() -> None:
+    with pytest.raises(ics.IcsFormatError, match="never closed"):
+        events("BEGIN:VEVENT\r\nUID:x\r\n")
+    with pytest.raises(ics.IcsFormatError, match="line 2"):
+        events("BEGIN:VEVENT\r\ngarbage\r\nEND:VEVENT\r\n")
+
+
+def test_write_calendar_escapes_folds_and_reads_back() -> None:
+    summary = "Lunch; with team, and\na very long description " + "é" * 40
+    out = io.StringIO()
+
+    count = ics.write_calendar(out, [
+        ("lunch@example.com", "2025-01-07 12:00:00", summary, None, (),
+         None),
+        ("standup@example.com", "2025-01-06 09:00:00", "Standup",
+         "FREQ=DAILY", ("2025-01-07 09:00:00",), None),
+        ("standup@example.com", "2025-01-08 10:00:00", "Late standup",
+         None, (), "2025-01-08 09:00:00"),
+    ])
+
+    text = out.getvalue()
+    assert count == 3
+    assert all(len(line.encode()) <= 75 for line in text.split("\r\n"))
+    assert [tuple(e) for e in events(text)] == [
+        ("lunch@example.com", "2025-01-07 12:00:00", summary, None, (),
+         None),
+        ("standup@example.com", "2025-01-06 09:00:00", "Standup",
+         "FREQ=DAILY", ("2025-01-07 09:00:00",), None),
+        ("standup@example.com", "2025-01-08 10:00:00", "Late standup",
+         None, (), "2025-01-08 09:00:00"),
+    ]
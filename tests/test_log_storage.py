@@ -0,0 +1,92 @@
+import json
+from datetime import datetime
+
+from LogStorage import LogStorage
+
+LUNCH = datetime(2025, 1, 17)
+
+
+def test_tasks_survive_a_reopen(tmp_path) -> None:
+    path = str(tmp_path / "tasks.jsonl")
+    storage = LogStorage(path)
+    storage.add_task("2025-01-17 12:00:00", "Lunch")
+    storage.save_config({"log_level": "debug"})
+
+    reopened = LogStorage(path)
+
+    assert reopened.tasks_for_day(LUNCH) == [("2025-01-17 12:00:00", "Lunch")]
+    assert reopened.load_log_settings() == {"level": "debug"}
+    assert reopened.add_task("2025-01-17 13:00:00", "Coffee") == 2
+
+
+def test_poll_changes_reads_what_other_processes_appended(tmp_path) -> None:
+    path = str(tmp_path / "tasks.jsonl")
+    writer = LogStorage(path)
+    writer.init_db()
+    reader = LogStorage(path)
+    seen = []
+    reader.subscribe(seen.append)
+
+    writer.add_task("2025-01-17 12:00:00", "Lunch")
+
+    assert reader.tasks_for_day(LUNCH) == []
+    assert reader.poll_changes() is True
+    assert seen == ["2025-01-01 00:00:00"]
+    assert reader.tasks_for_day(LUNCH) == [("2025-01-17 12:00:00", "Lunch")]
+    assert reader.poll_changes() is False
+    # Writers read on before they write, ids never collide.
+    assert reader.add_task("2025-01-17 13:00:00", "Coffee") == 2
+
+
+def test_compaction_folds_the_log_into_the_index(tmp_path) -> None:
+    path = str(tmp_path / "tasks.jsonl")
+    storage = LogStorage(path, compact_records=3)
+    other = LogStorage(path)
+    storage.add_task("2025-01-17 12:00:00", "Lunch")
+    other.poll_changes()
+    seen = []
+    other.subscribe(seen.append)
+
+    storage.add_tasks([(f"2025-01-0{day} 12:00:00", "Standup")
+                       for day in range(1, 4)])
+    storage.delete_task("2025-01-01 12:00:00")
+
+    with open(path) as log:
+        assert [json.loads(line)[0] for line in log] == ["clear"]
+    with open(path + ".index") as index:
+        assert len(json.load(index)["tasks"]) == 4
+    assert other.poll_changes() is True
+    assert seen == [None]
+    assert [date for _, date, _ in other.iter_tasks()] == [
+        "2025-01-02 12:00:00", "2025-01-03 12:00:00", "2025-01-17 12:00:00"]
+
+
+def test_log_replayed_over_a_newer_index_ends_the_same(tmp_path) -> None:
+    path = str(tmp_path / "tasks.jsonl")
+    storage = LogStorage(path, compact_records=10 ** 6)
+    storage.add_task("2025-01-17 12:00:00", "Lunch")
+    storage.delete_task("2025-01-17 12:00:00")
+    storage.add_task("2025-01-17 12:00:00", "Dinner")
+    with open(path, "rb") as log:
+        records = log.read()
+    # A compaction stopped between writing the index and the new log.
+    storage._compact()
+    with open(path, "wb") as log:
+        log.write(records)
+
+    reopened = LogStorage(path)
+
+    assert reopened.tasks_for_day(LUNCH) == [
+        ("2025-01-17 12:00:00", "Dinner")]
+
+
+def test_half_written_records_are_left_for_later(tmp_path) -> None:
+    path = str(tmp_path / "tasks.jsonl")
+    storage = LogStorage(path)
+    storage.add_task("2025-01-17 12:00:00", "Lunch")
+    with open(path, "ab") as log:
+        log.write(b'["add",2,28926720,"Hal')
+
+    reopened = LogStorage(path)
+
+    assert [task for _, _, task in reopened.iter_tasks()] == ["Lunch"]
@@ -0,0 +1,87 @@
+import logging
+
+import pytest
+
+import logsetup
+
+
+@pytest.fixture(autouse=True)
+def restore_root_logger():
+    root = logging.getLogger()
+    level = root.level
+    yield
+    logsetup.shutdown_logging()
+    root.setLevel(level)
+
+
+def test_default_log_path_follows_xdg_state_home(tmp_path,
+                                                 monkeypatch) -> None:
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path))
+
+    assert logsetup.default_log_path() == str(
+        tmp_path / "cli_calender" / "cli-calender.log")
+
+
+def test_records_reach_the_file_through_the_listener(tmp_path) -> None:
+    path = tmp_path / "logs" / "calender.log"
+    logsetup.configure_logging(str(path), "info")
+
+    logging.getLogger("test").info("Added task %d", 7)
+    logging.getLogger("test").debug("Not written")
+    logsetup.shutdown_logging()
+
+    text = path.read_text()
+    assert "INFO test: Added task 7" in text
+    assert "Not written" not in text
+
+
+def test_file_is_only_created_once_something_is_logged(tmp_path) -> None:
+    path = tmp_path / "calender.log"
+
+    logsetup.configure_logging(str(path), "info")
+    logsetup.shutdown_logging()
+
+    assert not path.exists()
+
+
+def test_log_file_is_rotated(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(logsetup, "LOG_MAX_BYTES", 200)
+    path = tmp_path / "calender.log"
+    logsetup.configure_logging(str(path), "info")
+
+    for i in range(20):
+        logging.getLogger("test").info("message number %d", i)
+    logsetup.shutdown_logging()
+
+    assert (tmp_path / "calender.log.1").exists()
+    assert not (tmp_path / "calender.log.4").exists()
+
+
+def test_off_disables_logging_without_formatting(tmp_path) -> None:
+    class Exploding:
+        def __str__(self) -> str:
+            raise AssertionError("message was formatted")
+
+    logsetup.configure_logging(str(tmp_path / "calender.log"), "off")
+
+    logging.getLogger("test").error("value %s", Exploding())
+
+    assert not logging.getLogger("test").isEnabledFor(logging.CRITICAL)
+    assert not (tmp_path / "calender.log").exists()
+
+
+def test_reconfiguring_moves_logging_to_the_new_file(tmp_path) -> None:
+    first, second = tmp_path / "first.log", tmp_path / "second.log"
+    logsetup.configure_logging(str(first), "info")
+    logging.getLogger("test").info("one")
+
+    logsetup.configure_logging(str(second), "warning")
+    logging.getLogger("test").info("two")
+    logging.getLogger("test").warning("three")
+    logsetup.shutdown_logging()
+
+    assert "one" in first.read_text()
+    assert "two" not in second.read_text()
+    assert "three" in second.read_text()
+    handlers = logging.getLogger().handlers
+    assert not any(type(h).__name__ == "QueueHandler" for h in handlers)
@@ -1,8 +1,21 @@
+import os
+import subprocess
+import sys
 from argparse import Namespace
 
+import pytest
+
+import logsetup
 import main as main_module
 
 
+@pytest.fixture(autouse=True)
+def log_to_tmp(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+    yield
+    logsetup.shutdown_logging()
+
+
 def test_main_entry_calls_wrapper_with_main_and_args(monkeypatch) -> None:
     expected_args = Namespace(year=2025, month="Jan", day=1, command=None)
     calls: dict[str, object] = {}
@@ -42,3 +55,108 @@ def test_main_entry_uses_none_argv_when_not_provided(monkeypatch) -> None:
     assert rc == 0
     assert seen["argv"] is None
     assert seen["wrapped"] is True
+
+
+def test_main_entry_dispatches_subcommands_without_wrapper(monkeypatch) -> None:
+    expected_args = Namespace(command="task", task_command="add",
+                              date="2025-01-17 12:00", description="x")
+    seen: dict[str, object] = {}
+
+    def fake_wrapper(fn, args):  # pragma: no cover - must not be reached
+        raise AssertionError("curses wrapper used for a headless command")
+
+    def fake_run_command(args):
+        seen["args"] = args
+        return 0
+
+    monkeypatch.setattr(main_module, "get_args", lambda argv: expected_args)
+    monkeypatch.setattr(main_module, "run_command", fake_run_command)
+
+    rc = main_module.main_entry(["task"], wrapper=fake_wrapper)
+
+    assert rc == 0
+    assert seen["args"] is expected_args
+
+
+def test_headless_task_add_never_imports_curses(tmp_path) -> None:
+    src_dir = os.path.dirname(os.path.abspath(main_module.__file__))
+    code = (
+        "import sys\n"
+        "import main\n"
+        "main.main_entry(['task', 'add', '--date', '2025-01-17 12:00', 'x'])\n"
+        "assert '_curses' not in sys.modules, 'curses was imported'\n"
+        "assert 'CliCalendar' not in sys.modules, 'UI was imported'\n"
+    )
+    env = dict(os.environ, PYTHONPATH=src_dir)
+
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path,
+                            env=env, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert (tmp_path / "cli_calender.db").exists()
+    log = tmp_path / "state" / "cli_calender" / "cli-calender.log"
+    assert "Added task 1 'x'" in log.read_text()
+
+
+def test_log_backend_never_imports_sqlite3(tmp_path) -> None:
+    src_dir = os.path.dirname(os.path.abspath(main_module.__file__))
+    code = (
+        "import sys\n"
+        "import main\n"
+        "main.main_entry(['--backend', 'log', 'task', 'add', '--date', "
+        "'2025-01-17 12:00', 'x'])\n"
+        "assert 'sqlite3' not in sys.modules, 'sqlite3 was imported'\n"
+    )
+    env = dict(os.environ, PYTHONPATH=src_dir)
+
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path,
+                            env=env, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert (tmp_path / "cli_calender.jsonl").exists()
+
+
+def test_agenda_streams_to_stdout_without_curses(tmp_path) -> None:
+    src_dir = os.path.dirname(os.path.abspath(main_module.__file__))
+    code = (
+        "import sys\n"
+        "import main\n"
+        "main.main_entry(['task', 'add', '--date', '2025-01-17 12:00', 'x'])\n"
+        "main.main_entry(['agenda', '--from', '2025-01-17', '--format', "
+        "'csv'])\n"
+        "assert '_curses' not in sys.modules, 'curses was imported'\n"
+    )
+    env = dict(os.environ, PYTHONPATH=src_dir)
+
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path,
+                            env=env, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines() == ["date,task,id,rule",
+                                          "2025-01-17 12:00,x,1,"]
+
+
+def test_headless_import_skips_heavy_modules(tmp_path) -> None:
+    src_dir = os.path.dirname(os.path.abspath(main_module.__file__))
+    code = (
+        "import sys\n"
+        "import main\n"
+        "heavy = {'curses', 'calendar', 'dateutil', 'csv', 'json', 'random'}\n"
+        "loaded = heavy & set(sys.modules)\n"
+        "assert not loaded, loaded\n"
+    )
+    env = dict(os.environ, PYTHONPATH=src_dir)
+
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path,
+                            env=env, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+
+
+def test_main_entry_rejects_an_unknown_backend(monkeypatch) -> None:
+    monkeypatch.setenv(main_module.BACKEND_ENV, "csv")
+    seen = []
+    monkeypatch.setattr(main_module, "run_command", seen.append)
+
+    assert main_module.main_entry(["task", "search", "x"]) == 2
+    assert seen == []
@@ -0,0 +1,150 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+import migrations
+from constants import DB_TASK_TABLE
+from TaskRepository import TaskRepository
+
+
+def make_legacy_db(path) -> None:
+    con = sqlite3.connect(path)
+    con.execute(f"CREATE TABLE {DB_TASK_TABLE} ("
+                " date TEXT UNIQUE NOT NULL, task TEXT NOT NULL)")
+    con.execute("CREATE TABLE config ("
+                " id INTEGER PRIMARY KEY CHECK (id = 1),"
+                " bg_color INTEGER,"
+                " task_color INTEGER,"
+                " task_title INTEGER,"
+                " calendar_color INTEGER,"
+                " cursor_color INTEGER)")
+    con.executemany(f"INSERT INTO {DB_TASK_TABLE} VALUES (?, ?)", [
+        ("2025-01-17 00:00:00", "Midnight"),
+        ("2025-01-17 12:00:00", "Lunch"),
+        ("2025-01-17 23:59:00", "Last minute"),
+    ])
+    con.execute("INSERT INTO config VALUES (1, 4, 1, 3, 0, 2)")
+    con.commit()
+    con.close()
+
+
+def test_new_database_is_created_at_current_version(tmp_path) -> None:
+    db_path = str(tmp_path / "new.db")
+    TaskRepository(db_path).init_db()
+
+    con = sqlite3.connect(db_path)
+    try:
+        assert migrations.schema_version(con) == migrations.SCHEMA_VERSION
+    finally:
+        con.close()
+
+
+def test_legacy_database_is_migrated_in_place(tmp_path) -> None:
+    db_path = str(tmp_path / "legacy.db")
+    make_legacy_db(db_path)
+
+    repo = TaskRepository(db_path)
+    repo.init_db()
+
+    assert repo.tasks_for_day(datetime(2025, 1, 17)) == [
+        ("2025-01-17 00:00:00", "Midnight"),
+        ("2025-01-17 12:00:00", "Lunch"),
+        ("2025-01-17 23:59:00", "Last minute"),
+    ]
+    assert repo.load_config()["bg_color"] == 4
+    tables = {row[0] for row in repo._connect().execute(
+        "SELECT name FROM sqlite_master WHERE type='table'")}
+    assert {t for t in tables if "fts" not in t} == {
+        DB_TASK_TABLE, "config", "recurrences", "recurrence_exceptions",
+        "import_progress", "changes"}
+    assert [row[0] for row in repo.iter_tasks()] == [1, 2, 3]
+
+
+def test_failed_migration_leaves_database_untouched(tmp_path,
+                                                    monkeypatch) -> None:
+    db_path = str(tmp_path / "broken.db")
+    make_legacy_db(db_path)
+    con = sqlite3.connect(db_path)
+
+    def broken(cur: sqlite3.Cursor) -> None:
+        raise sqlite3.IntegrityError("broken step")
+
+    monkeypatch.setattr(migrations, "MIGRATIONS",
+                        (*migrations.MIGRATIONS[:-1], broken))
+    with pytest.raises(sqlite3.IntegrityError):
+        migrations.migrate(con)
+
+    assert migrations.schema_version(con) == 0
+    columns = [row[1] for row in con.execute(
+        f"PRAGMA table_info({DB_TASK_TABLE})")]
+    assert columns == ["date", "task"]
+    con.close()
+
+
+def test_legacy_dates_sqlite_can_not_read_are_normalized(tmp_path,
+                                                         caplog) -> None:
+    db_path = str(tmp_path / "legacy.db")
+    make_legacy_db(db_path)
+    con = sqlite3.connect(db_path)
+    con.executemany(f"INSERT INTO {DB_TASK_TABLE} VALUES (?, ?)", [
+        ("2025-1-17 9:00:00", "Unpadded"),
+        ("2025-1-17 12:00:00", "Same minute as lunch"),
+        ("not a date", "Broken"),
+    ])
+    con.commit()
+    con.close()
+
+    repo = TaskRepository(db_path)
+    repo.init_db()
+
+    assert repo.tasks_for_day(datetime(2025, 1, 17)) == [
+        ("2025-01-17 00:00:00", "Midnight"),
+        ("2025-01-17 09:00:00", "Unpadded"),
+        ("2025-01-17 12:00:00", "Lunch"),
+        ("2025-01-17 23:59:00", "Last minute"),
+    ]
+    assert "'Broken'" in caplog.text
+    assert "'Same minute as lunch'" in caplog.text
+
+
+def test_migrate_is_a_no_op_at_current_version(tmp_path) -> None:
+    con = sqlite3.connect(str(tmp_path / "noop.db"))
+
+    assert migrations.migrate(con) == migrations.SCHEMA_VERSION
+    assert migrations.migrate(con) == 0
+    con.close()
+
+
+def test_range_lookups_use_the_covering_index(tmp_path) -> None:
+    repo = TaskRepository(str(tmp_path / "plan.db"))
+    repo.init_db()
+
+    plan = repo._connect().execute(
+        f"EXPLAIN QUERY PLAN SELECT id, ts, task FROM {DB_TASK_TABLE} "
+        "WHERE ts BETWEEN ? AND ? ORDER BY ts ASC", (0, 1)).fetchall()
+
+    assert "COVERING INDEX" in " ".join(row[-1] for row in plan)
+
+
+def test_migrated_database_has_no_log_settings(tmp_path) -> None:
+    db_path = str(tmp_path / "legacy.db")
+    make_legacy_db(db_path)
+
+    repo = TaskRepository(db_path)
+    repo.init_db()
+
+    assert repo.load_log_settings() == {}
+    repo.save_config({"log_level": "debug"})
+    assert repo.load_log_settings() == {"level": "debug"}
+    assert repo.load_config()["bg_color"] == 4
+
+
+def test_migrated_tasks_are_searchable(tmp_path) -> None:
+    db_path = str(tmp_path / "legacy.db")
+    make_legacy_db(db_path)
+
+    repo = TaskRepository(db_path)
+    repo.init_db()
+
+    assert [row[2] for row in repo.search("lunch")] == ["Lunch"]
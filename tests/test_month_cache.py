@@ -0,0 +1,161 @@
+from datetime import datetime
+
+import pytest
+
+from MonthCache import MonthCache
+from TaskRepository import TaskRepository
+
+
+class CountingRepository(TaskRepository):
+
+    def __init__(self, db_path: str):
+        super().__init__(db_path)
+        self.range_queries: list[tuple[str, str]] = []
+
+    def entries(self, start, end):
+        self.range_queries.append((start, end))
+        return super().entries(start, end)
+
+
+def day_tasks(cache: MonthCache, date: datetime) -> list[tuple[str, str]]:
+    return [(task.date, task.task) for task in cache.tasks_for_day(date)]
+
+
+def make_cache(tmp_path, **kwargs) -> tuple[MonthCache, CountingRepository]:
+    repo = CountingRepository(str(tmp_path / "month_cache.db"))
+    repo.init_db()
+    return MonthCache(repo, **kwargs), repo
+
+
+def test_days_of_a_month_are_served_by_one_query(tmp_path) -> None:
+    cache, repo = make_cache(tmp_path, prefetch=False)
+    repo.add_task("2025-01-17 09:00:00", "Standup")
+    repo.add_task("2025-01-17 12:00:00", "Lunch")
+    repo.add_task("2025-01-31 23:59:00", "Last minute")
+
+    for day in range(1, 32):
+        cache.tasks_for_day(datetime(2025, 1, day))
+
+    assert repo.range_queries == [("2025-01-01 00:00:00", "2025-01-31 23:59:59")]
+    assert day_tasks(cache, datetime(2025, 1, 17)) == [
+        ("2025-01-17 09:00:00", "Standup"),
+        ("2025-01-17 12:00:00", "Lunch"),
+    ]
+    assert day_tasks(cache, datetime(2025, 1, 31)) == [
+        ("2025-01-31 23:59:00", "Last minute"),
+    ]
+
+
+def test_prefetch_loads_adjacent_months_in_the_same_query(tmp_path) -> None:
+    cache, repo = make_cache(tmp_path)
+    repo.add_task("2025-02-03 10:00:00", "February")
+
+    cache.tasks_for_day(datetime(2025, 1, 15))
+
+    assert repo.range_queries == [("2024-12-01 00:00:00", "2025-02-28 23:59:59")]
+    assert (2024, 12) in cache and (2025, 2) in cache
+    assert day_tasks(cache, datetime(2025, 2, 3)) == [
+        ("2025-02-03 10:00:00", "February"),
+    ]
+    assert len(repo.range_queries) == 1
+
+
+def test_least_recently_used_month_is_evicted(tmp_path) -> None:
+    cache, _ = make_cache(tmp_path, capacity=2, prefetch=False)
+
+    cache.month(2025, 1)
+    cache.month(2025, 2)
+    cache.month(2025, 1)
+    cache.month(2025, 3)
+
+    assert (2025, 1) in cache
+    assert (2025, 2) not in cache
+    assert (2025, 3) in cache
+
+
+def test_repository_writes_invalidate_the_affected_month(tmp_path) -> None:
+    cache, repo = make_cache(tmp_path, prefetch=False)
+    cache.month(2025, 1)
+    cache.month(2025, 2)
+
+    repo.add_task("2025-01-17 09:00:00", "Standup")
+
+    assert (2025, 1) not in cache
+    assert (2025, 2) in cache
+    assert day_tasks(cache, datetime(2025, 1, 17)) == [
+        ("2025-01-17 09:00:00", "Standup"),
+    ]
+
+    repo.delete_task("2025-01-17 09:00:00")
+
+    assert day_tasks(cache, datetime(2025, 1, 17)) == []
+
+
+def test_bulk_insert_clears_the_cache(tmp_path) -> None:
+    cache, repo = make_cache(tmp_path, prefetch=False)
+    cache.month(2025, 1)
+
+    repo.add_tasks([("2025-03-01 10:00:00", "Imported")])
+
+    assert (2025, 1) not in cache
+
+
+def test_capacity_must_fit_prefetched_months(tmp_path) -> None:
+    repo = TaskRepository(str(tmp_path / "month_cache.db"))
+
+    with pytest.raises(ValueError):
+        MonthCache(repo, capacity=2)
+
+
+def test_recurring_tasks_are_merged_into_the_cached_month(tmp_path) -> None:
+    cache, repo = make_cache(tmp_path, prefetch=False)
+    repo.add_task("2025-01-13 08:00:00", "Coffee")
+    repo.add_task("2025-01-13 12:00:00", "Lunch")
+    rule_id = repo.add_recurrence("2025-01-06 09:00:00", "Standup",
+                                  "FREQ=WEEKLY")
+
+    assert day_tasks(cache, datetime(2025, 1, 13)) == [
+        ("2025-01-13 08:00:00", "Coffee"),
+        ("2025-01-13 09:00:00", "Standup"),
+        ("2025-01-13 12:00:00", "Lunch"),
+    ]
+    assert day_tasks(cache, datetime(2025, 1, 27)) == [
+        ("2025-01-27 09:00:00", "Standup"),
+    ]
+
+    repo.add_exception(rule_id, "2025-01-27 09:00:00")
+
+    assert day_tasks(cache, datetime(2025, 1, 27)) == []
+    assert len(repo.range_queries) == 2
+
+
+def test_external_write_reloads_only_the_month_it_touched(tmp_path) -> None:
+    cache, repo = make_cache(tmp_path, capacity=3)
+    repo.watch()
+    cache.tasks_for_day(datetime(2025, 1, 17))
+    other = TaskRepository(str(tmp_path / "month_cache.db"))
+    other.add_task("2025-02-03 09:00:00", "Added elsewhere")
+
+    assert repo.poll_changes()
+
+    assert (2025, 2) not in cache
+    assert (2025, 1) in cache and (2024, 12) in cache
+    assert day_tasks(cache, datetime(2025, 2, 3)) == [
+        ("2025-02-03 09:00:00", "Added elsewhere")]
+    other.close()
+
+
+def test_day_lookups_slice_the_sorted_month(tmp_path) -> None:
+    cache, repo = make_cache(tmp_path, prefetch=False)
+    repo.add_task("2025-01-01 00:00:00", "First minute")
+    repo.add_task("2025-01-17 12:30:00", "Lunch")
+    repo.add_task("2025-01-31 23:59:00", "Last minute")
+
+    month = cache.month(2025, 1)
+
+    assert list(month.starts[:3]) == [0, 1, 1]
+    assert month.starts[-1] == len(month.tasks) == 3
+    assert [task.time for task in month.day(17)] == ["12:30"]
+    assert month.day(16) == []
+    assert day_tasks(cache, datetime(2025, 1, 31)) == [
+        ("2025-01-31 23:59:00", "Last minute")]
@@ -0,0 +1,49 @@
+import calendar
+
+import pytest
+
+from MonthGrid import month_grid
+from MonthGrid import MonthGrid
+
+
+def test_cells_and_days_are_inverse_lookups() -> None:
+    grid = MonthGrid(2024, 1)
+
+    for day in range(1, 32):
+        assert grid.day_at(*grid.cell_of(day)) == day
+    assert grid.last_day == 31
+
+
+def test_day_at_outside_month_or_grid_is_none() -> None:
+    grid = MonthGrid(2024, 2)  # Starts on a Thursday.
+
+    assert grid.day_at(0, 0) is None
+    assert grid.day_at(0, 3) == 1
+    assert grid.day_at(-1, 0) is None
+    assert grid.day_at(0, 7) is None
+    assert grid.day_at(len(grid.weeks), 0) is None
+
+
+@pytest.mark.parametrize("day, step, expected", [
+    (15, (0, 1), 16),
+    (15, (0, -1), None),  # Monday, nothing to the left.
+    (15, (-1, 0), 8),
+    (15, (1, 0), 22),
+    (1, (0, 1), 2),
+    (11, (-1, 0), 4),
+    (31, (0, 1), None),
+    (29, (1, 0), None),
+])
+def test_neighbour(day, step, expected) -> None:
+    assert MonthGrid(2024, 1).neighbour(day, *step) == expected
+
+
+def test_lines_match_text_calendar_weeks() -> None:
+    text = calendar.TextCalendar().formatmonth(2024, 9).splitlines()[2:]
+
+    assert list(MonthGrid(2024, 9).lines) == text
+
+
+def test_month_grid_is_cached() -> None:
+    assert month_grid(2024, 1) is month_grid(2024, 1)
+    assert month_grid(2024, 1) is not month_grid(2024, 2)
@@ -1,6 +1,8 @@
 from datetime import datetime
 
 from CliCalendar import CliCalender
+from constants import REFRESH_INTERVAL_MS
+from TaskRepository import TaskRepository
 
 
 class FakeWindow:
@@ -10,17 +12,27 @@ class FakeWindow:
     def clear(self) -> None:
         self.calls.append((("clear",), {}))
 
+    def erase(self) -> None:
+        self.calls.append((("erase",), {}))
+
     def addstr(self, *args, **kwargs) -> None:
         self.calls.append((args, kwargs))
 
     def refresh(self) -> None:
         self.calls.append((("refresh",), {}))
 
+    def noutrefresh(self) -> None:
+        self.calls.append((("noutrefresh",), {}))
+
 
 class FakeStdScr:
     def __init__(self, key: str | None = None) -> None:
         self._key = key
         self.calls: list[tuple[tuple, dict]] = []
+        self.size = (30, 120)
+        self.typed = ""
+        self.delay = -1
+        self.getstr_delays: list[int] = []
 
     def set_key(self, key: str) -> None:
         self._key = key
@@ -28,21 +40,71 @@ class FakeStdScr:
     def clear(self) -> None:
         self.calls.append((("clear",), {}))
 
+    def erase(self) -> None:
+        self.calls.append((("erase",), {}))
+
     def addstr(self, *args, **kwargs) -> None:
         self.calls.append((args, kwargs))
 
     def refresh(self) -> None:
         self.calls.append((("refresh",), {}))
 
+    def noutrefresh(self) -> None:
+        self.calls.append((("noutrefresh",), {}))
+
     def getmaxyx(self) -> tuple[int, int]:
-        return (30, 120)
+        return self.size
 
     def getkey(self) -> str:
         assert self._key is not None
         return self._key
 
+    def move(self, y: int, x: int) -> None:
+        self.calls.append((("move", y, x), {}))
+
+    def clrtoeol(self) -> None:
+        self.calls.append((("clrtoeol",), {}))
+
+    def timeout(self, delay: int) -> None:
+        self.delay = delay
+
+    def getstr(self, *_args) -> bytes:
+        self.getstr_delays.append(self.delay)
+        return self.typed.encode()
+
+
+class FakeCursesError(Exception):
+    pass
+
+
+class QueuedStdScr(FakeStdScr):
+    # Hands out queued keys like a terminal in timeout mode. Once the queue
+    # is empty every read times out, after idle_reads idle waits the test
+    # is over.
+    def __init__(self, keys: list[str], idle_reads: int = 0) -> None:
+        super().__init__()
+        self.keys = list(keys)
+        self.timeouts: list[int] = []
+        self.idle_reads = idle_reads
+        self.on_idle = lambda: None
+
+    def timeout(self, delay: int) -> None:
+        super().timeout(delay)
+        self.timeouts.append(delay)
+
+    def getkey(self) -> str:
+        if self.keys:
+            return self.keys.pop(0)
+        if self.timeouts[-1] == REFRESH_INTERVAL_MS:
+            if not self.idle_reads:
+                raise EOFError
+            self.idle_reads -= 1
+            self.on_idle()
+        raise FakeCursesError
+
 
 class FakeCurses:
+    error = FakeCursesError
     COLOR_RED = 1
     COLOR_GREEN = 2
     COLOR_YELLOW = 3
@@ -51,11 +113,15 @@ class FakeCurses:
     COLOR_CYAN = 6
     COLOR_WHITE = 7
     A_STANDOUT = 256
+    A_BOLD = 512
+    A_UNDERLINE = 1024
+    A_REVERSE = 2048
 
     def __init__(self) -> None:
         self.started = False
         self.pairs: list[tuple[int, int, int]] = []
         self.created_windows: list[FakeWindow] = []
+        self.updates = 0
 
     def start_color(self) -> None:
         self.started = True
@@ -71,9 +137,21 @@ class FakeCurses:
         self.created_windows.append(win)
         return win
 
+    def doupdate(self) -> None:
+        self.updates += 1
+
     def endwin(self) -> None:
         pass
 
+    def echo(self) -> None:
+        pass
+
+    def noecho(self) -> None:
+        pass
+
+    def curs_set(self, _visibility: int) -> None:
+        pass
+
 
 def make_calendar(tmp_path) -> tuple[CliCalender, FakeCurses]:
     fake_curses = FakeCurses()
@@ -119,8 +197,8 @@ def test_move_right_triggers_draw_with_next_day(tmp_path, monkeypatch) -> None:
 def test_move_right_on_weekday_header_cell_returns_early(tmp_path, monkeypatch) -> None:
     cal, _ = make_calendar(tmp_path)
     stdscr = FakeStdScr(key="KEY_RIGHT")
-    # Use last-week row where slicing to the right yields empty string.
-    cal.pos = (6, 6)
+    # January 31st 2024 is a Wednesday, the grid cell to its right is empty.
+    cal._date = cal._date.replace(day=31)
 
     draw_called = {"value": False}
 
@@ -171,3 +249,271 @@ def test_move_ctrl_p_moves_to_previous_month(tmp_path, monkeypatch) -> None:
     assert cal._date.month == 12
     assert cal._date.year == 2023
     assert called == ["15"]
+
+
+def test_day_navigation_is_served_from_month_cache(tmp_path, monkeypatch) -> None:
+    cal, _ = make_calendar(tmp_path)
+    stdscr = FakeStdScr(key="KEY_RIGHT")
+    monkeypatch.setattr("CliCalendar.signal.signal", lambda *_args, **_kwargs: None)
+    cal.draw(stdscr)
+    loads = cal._tasks.loads
+
+    for _ in range(5):
+        cal.move(stdscr)
+
+    assert cal._date.day == 20
+    assert cal._tasks.loads == loads
+
+
+def positioned_writes(calls) -> list[tuple]:
+    return [args for args, _ in calls if len(args) >= 3 and isinstance(args[0], int)]
+
+
+def test_cursor_move_repaints_only_old_and_new_cells(tmp_path) -> None:
+    cal, fake_curses = make_calendar(tmp_path)
+    stdscr = FakeStdScr()
+    cal.draw(stdscr)
+    stdscr.calls.clear()
+
+    cal.draw(stdscr, "16")
+
+    assert ("erase",) not in [args for args, _ in stdscr.calls]
+    assert ("clear",) not in [args for args, _ in stdscr.calls]
+    # January 2024 starts on a Monday: the 15th and 16th are the first two
+    # cells of the third week, drawn below the two blank and two header lines.
+    assert positioned_writes(stdscr.calls) == [
+        (6, 4, "15", 0),
+        (6, 7, "16", 1 | FakeCurses.A_STANDOUT),
+    ]
+    assert len(fake_curses.created_windows) == 1
+    assert fake_curses.updates == 2
+
+
+def test_month_change_repaints_whole_grid(tmp_path) -> None:
+    cal, fake_curses = make_calendar(tmp_path)
+    stdscr = FakeStdScr()
+    cal.draw(stdscr)
+    stdscr.calls.clear()
+
+    cal._add_date(month=1)
+    cal.draw(stdscr)
+
+    assert stdscr.calls[0] == (("erase",), {})
+    assert any("February 2024" in args[0] for args, _ in stdscr.calls
+               if args and isinstance(args[0], str))
+    assert len(fake_curses.created_windows) == 1
+
+
+def test_resize_clears_screen_and_recreates_task_window(tmp_path) -> None:
+    cal, fake_curses = make_calendar(tmp_path)
+    stdscr = FakeStdScr()
+    cal.draw(stdscr)
+    stdscr.calls.clear()
+
+    stdscr.size = (40, 160)
+    cal.draw(stdscr)
+
+    assert stdscr.calls[0] == (("clear",), {})
+    assert len(fake_curses.created_windows) == 2
+
+
+def test_single_digit_day_is_not_matched_inside_two_digit_days(tmp_path) -> None:
+    cal, _ = make_calendar(tmp_path)
+    stdscr = FakeStdScr()
+    cal.draw(stdscr, "1")
+
+    assert cal.pos == (0, 0)
+    assert positioned_writes(stdscr.calls)[-1] == (4, 4, " 1", 1 | FakeCurses.A_STANDOUT)
+
+
+def test_rendered_grid_matches_text_calendar(tmp_path) -> None:
+    cal, _ = make_calendar(tmp_path)
+    stdscr = FakeStdScr()
+    cal.draw(stdscr)
+
+    painted = [args[0].rstrip() for args, _ in stdscr.calls
+               if len(args) == 2 and args[0].endswith("\n")]
+    assert painted == cal._month_calender.splitlines()
+
+
+def test_y_toggles_the_year_view(tmp_path, monkeypatch) -> None:
+    cal, _ = make_calendar(tmp_path)
+    stdscr = FakeStdScr(key="y")
+    monkeypatch.setattr("CliCalendar.signal.signal", lambda *_args, **_kwargs: None)
+    cal.draw(stdscr)
+    stdscr.calls.clear()
+
+    cal.move(stdscr)
+
+    written = [args[2] for args in positioned_writes(stdscr.calls)]
+    assert "2024" in written
+    assert any("December" in text for text in written)
+
+    stdscr.set_key("KEY_DOWN")
+    cal.move(stdscr)
+    stdscr.set_key("\x0e")
+    cal.move(stdscr)
+    assert cal._date.date() == datetime(2025, 1, 22).date()
+
+    stdscr.calls.clear()
+    stdscr.set_key("y")
+    cal.move(stdscr)
+    assert any("January 2025" in args[0] for args, _ in stdscr.calls
+               if args and isinstance(args[0], str))
+
+
+def test_search_jumps_to_matching_days_and_wraps(tmp_path, monkeypatch) -> None:
+    cal, _ = make_calendar(tmp_path)
+    monkeypatch.setattr("CliCalendar.signal.signal", lambda *_args, **_kwargs: None)
+    cal._add_task("2023-12-24 18:00", "Dinner with family")
+    cal._add_task("2024-03-02 19:00", "Dinner at Ana's")
+    cal._add_task("2024-03-09 19:00", "Lunch")
+    stdscr = FakeStdScr(key="/")
+    stdscr.typed = "dinner"
+    cal.draw(stdscr)
+
+    cal.move(stdscr)
+    assert cal._date.date() == datetime(2024, 3, 2).date()
+
+    stdscr.set_key("n")
+    stdscr.calls.clear()
+    cal.move(stdscr)
+    assert cal._date.date() == datetime(2023, 12, 24).date()
+    assert any("search hit bottom" in args[2] for args in
+               positioned_writes(stdscr.calls))
+
+    stdscr.set_key("N")
+    cal.move(stdscr)
+    assert cal._date.date() == datetime(2024, 3, 2).date()
+
+
+def test_queued_arrow_keys_are_drawn_once(tmp_path, monkeypatch) -> None:
+    cal, _ = make_calendar(tmp_path)
+    called: list[str] = []
+    monkeypatch.setattr(cal, "draw",
+                        lambda _stdscr, day=None: called.append(day))
+
+    cal.handle_keys(FakeStdScr(), ["KEY_RIGHT"] * 3 + ["KEY_DOWN", "\x0e"])
+
+    assert cal._date.date() == datetime(2024, 2, 25).date()
+    assert called == ["25"]
+
+
+def test_keys_without_effect_draw_nothing(tmp_path, monkeypatch) -> None:
+    cal, _ = make_calendar(tmp_path)
+    cal._date = cal._date.replace(day=31)
+    called: list[str] = []
+    monkeypatch.setattr(cal, "draw",
+                        lambda _stdscr, day=None: called.append(day))
+
+    cal.handle_keys(FakeStdScr(), ["KEY_RIGHT", "x", "n"])
+
+    assert called == []
+
+
+def test_read_keys_drains_queued_keys_without_waiting(tmp_path) -> None:
+    cal, _ = make_calendar(tmp_path)
+    stdscr = QueuedStdScr(["KEY_RIGHT", "KEY_RIGHT", "KEY_DOWN"])
+
+    assert cal._read_keys(stdscr) == ["KEY_RIGHT", "KEY_RIGHT", "KEY_DOWN"]
+    # The last frame was long ago, only keys already queued are taken.
+    assert stdscr.timeouts == [REFRESH_INTERVAL_MS, 0, 0, 0]
+
+
+def test_read_keys_leaves_prompt_input_queued(tmp_path) -> None:
+    cal, _ = make_calendar(tmp_path)
+    stdscr = QueuedStdScr(["KEY_RIGHT", "/", "d"])
+
+    assert cal._read_keys(stdscr) == ["KEY_RIGHT", "/"]
+    assert stdscr.keys == ["d"]
+
+
+def test_search_prompt_reads_in_blocking_mode(tmp_path) -> None:
+    cal, _ = make_calendar(tmp_path)
+    stdscr = QueuedStdScr(["KEY_RIGHT", "/"])
+    stdscr.typed = "dinner"
+    cal.draw(stdscr)
+
+    cal.handle_keys(stdscr, cal._read_keys(stdscr))
+
+    # The keys were drained with a zero timeout, the prompt must not be.
+    assert stdscr.getstr_delays == [-1]
+    assert stdscr.timeouts[-1] == REFRESH_INTERVAL_MS
+
+
+def test_read_keys_waits_out_the_frame_budget(tmp_path, monkeypatch) -> None:
+    cal, _ = make_calendar(tmp_path)
+    monkeypatch.setattr("CliCalendar.time.monotonic", lambda: 10.0)
+    cal._last_frame = 10.0
+    stdscr = QueuedStdScr(["KEY_RIGHT"])
+
+    cal._read_keys(stdscr)
+
+    assert stdscr.timeouts == [REFRESH_INTERVAL_MS, 17]
+
+
+def test_key_resize_repaints_for_the_new_size(tmp_path) -> None:
+    cal, fake_curses = make_calendar(tmp_path)
+    stdscr = FakeStdScr()
+    cal.draw(stdscr)
+    stdscr.calls.clear()
+
+    stdscr.size = (40, 160)
+    cal.handle_keys(stdscr, ["KEY_RESIZE"])
+
+    assert stdscr.calls[0] == (("clear",), {})
+    assert len(fake_curses.created_windows) == 2
+
+
+def test_run_installs_signal_handlers_once(tmp_path, monkeypatch) -> None:
+    cal, _ = make_calendar(tmp_path)
+    installed: list[int] = []
+    monkeypatch.setattr("CliCalendar.signal.signal",
+                        lambda signum, _handler: installed.append(signum))
+    stdscr = QueuedStdScr(["KEY_RIGHT", "KEY_RIGHT"])
+    frames: list[int] = []
+
+    try:
+        cal.run(stdscr, on_frame=lambda: frames.append(cal._date.day))
+    except EOFError:
+        pass
+
+    assert frames == [17]
+    assert len(installed) == 2
+
+
+def test_idle_calendar_shows_tasks_added_by_other_processes(
+        tmp_path, monkeypatch) -> None:
+    cal, fake_curses = make_calendar(tmp_path)
+    monkeypatch.setattr("CliCalendar.signal.signal", lambda *_args: None)
+    stdscr = QueuedStdScr([], idle_reads=3)
+    cal.draw(stdscr)
+    other = TaskRepository(str(tmp_path / "move.db"))
+    writes = [lambda: None, lambda: other.add_task("2024-01-15 18:00", "Added")]
+    stdscr.on_idle = lambda: writes.pop()() if writes else None
+    frames: list[int] = []
+
+    try:
+        cal.run(stdscr, on_frame=lambda: frames.append(1))
+    except EOFError:
+        pass
+
+    # Only the idle wait after the write repaints.
+    assert frames == [1]
+    panel = fake_curses.created_windows[0].calls
+    assert any("18:00: Added" in args[0] for args, _ in panel
+               if args and isinstance(args[0], str))
+    other.close()
+
+
+def test_first_frame_needs_no_further_queries(tmp_path) -> None:
+    make_calendar(tmp_path)[0]._repo.close()
+    cal, _ = make_calendar(tmp_path)
+    statements: list[str] = []
+    cal._repo._connect().set_trace_callback(statements.append)
+
+    cal.apply_log_settings()
+    cal.draw(FakeStdScr())
+    cal.draw(FakeStdScr(), "14")
+
+    assert statements == []
@@ -0,0 +1,124 @@
+import io
+from argparse import Namespace
+
+import pytest
+
+import main as main_module
+from Profiler import Profiler
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeWindow:
+    def __init__(self, clock: FakeClock) -> None:
+        self.clock = clock
+        self.written: list[str] = []
+
+    def addstr(self, *args) -> None:
+        self.written.append(next(a for a in args if isinstance(a, str)))
+
+    def getkey(self) -> str:
+        self.clock.now += 10.0  # time spent waiting is not a frame
+        return "KEY_RIGHT"
+
+    def getmaxyx(self) -> tuple[int, int]:
+        return (30, 120)
+
+
+class Repo:
+    def iter_tasks(self, start=None, end=None):
+        return iter(())
+
+
+def test_timed_records_one_sample_per_call() -> None:
+    clock = FakeClock()
+    profiler = Profiler(clock=clock)
+
+    def slow(x: int) -> int:
+        clock.now += 0.002
+        return x * 2
+
+    timed = profiler.timed("slow", slow)
+
+    assert timed(2) == 4
+    assert timed(3) == 6
+    assert profiler.timings["slow"] == [0.002, 0.002]
+
+
+def test_timed_generator_times_the_iteration() -> None:
+    clock = FakeClock()
+    profiler = Profiler(clock=clock)
+
+    def rows(n: int):
+        for i in range(n):
+            clock.now += 0.001  # fetching a row
+            yield i
+
+    timed = profiler.timed("rows", rows)
+    assert list(timed(3)) == [0, 1, 2]
+    abandoned = timed(5)
+    next(abandoned)
+    clock.now += 1.0  # the caller's time between rows is not counted
+    abandoned.close()
+
+    assert profiler.timings["rows"] == [pytest.approx(0.003),
+                                        pytest.approx(0.001)]
+
+
+def test_instrument_patches_only_the_instance() -> None:
+    profiler = Profiler()
+    repo, other = Repo(), Repo()
+
+    profiler.instrument(repo, ("iter_tasks",), "db.")
+    list(repo.iter_tasks())
+
+    assert len(profiler.timings["db.iter_tasks"]) == 1
+    assert "iter_tasks" not in vars(other)
+
+
+def test_keypress_latency_starts_when_the_key_arrives() -> None:
+    clock = FakeClock()
+    profiler = Profiler(clock=clock)
+    win = profiler.wrap_window(FakeWindow(clock))
+
+    win.getkey()
+    clock.now += 0.004
+    win.addstr(1, 2, "17", 0)
+    win.addstr("Tasks:")
+    profiler.frame_done()
+
+    assert profiler.timings["keypress"] == [pytest.approx(0.004)]
+    assert profiler.bytes_drawn == 8
+    assert win.getmaxyx() == (30, 120)
+
+
+def test_report_prints_percentiles_histogram_and_pstats(tmp_path) -> None:
+    pstats_path = str(tmp_path / "calender.pstats")
+    profiler = Profiler(pstats_path)
+    profiler.start()
+    profiler.timings["keypress"].extend([0.0003, 0.0015, 0.1])
+    profiler.timings["draw"].append(0.001)
+    out = io.StringIO()
+
+    profiler.report(out)
+
+    lines = [line.strip() for line in out.getvalue().splitlines()]
+    assert lines[0] == "cli_calender profile: 3 keypresses"
+    assert any(line.startswith("draw ") for line in lines)
+    buckets = {line.split(" #")[0]: line.rsplit(" ", 1)[1]
+               for line in lines if " ms #" in line}
+    assert buckets == {"< 0.5 ms": "1", "< 2 ms": "1", ">= 64 ms": "1"}
+    assert (tmp_path / "calender.pstats").stat().st_size > 0
+
+
+def test_profiler_is_off_unless_asked_for(monkeypatch) -> None:
+    monkeypatch.delenv(main_module.PROFILE_ENV, raising=False)
+    args = Namespace(profile=False, profile_output=None)
+
+    assert main_module._profiler(args) is None
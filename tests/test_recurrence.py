@@ -0,0 +1,86 @@
+from datetime import datetime
+
+import pytest
+
+from recurrence import format_rule
+from recurrence import last_occurrence
+from recurrence import occurrences
+from recurrence import parse_rule
+from recurrence import Rule
+from recurrence import RuleError
+
+
+def test_parse_rule_normalises_case_and_order() -> None:
+    rule = parse_rule("rrule:byday=we,mo;freq=weekly;interval=2")
+
+    assert rule == Rule("WEEKLY", 2, byday=(0, 2))
+    assert format_rule(rule) == "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE"
+
+
+@pytest.mark.parametrize("text", [
+    "FREQ=HOURLY",
+    "INTERVAL=2",
+    "FREQ=DAILY;INTERVAL=0",
+    "FREQ=DAILY;COUNT=2;UNTIL=20250101",
+    "FREQ=MONTHLY;BYDAY=MO",
+    "FREQ=WEEKLY;BYDAY=XX",
+    "FREQ=DAILY;BYHOUR=9",
+    "FREQ=DAILY;UNTIL=tomorrow",
+    "FREQ",
+])
+def test_parse_rule_rejects_unsupported_rules(text) -> None:
+    with pytest.raises(RuleError):
+        parse_rule(text)
+
+
+def test_daily_expansion_starts_inside_the_window() -> None:
+    first = datetime(2000, 1, 1, 9, 0)
+    rule = parse_rule("FREQ=DAILY;INTERVAL=3")
+
+    found = list(occurrences(first, rule, datetime(2025, 1, 1),
+                             datetime(2025, 1, 10, 23, 59)))
+
+    assert found == [datetime(2025, 1, 1, 9, 0), datetime(2025, 1, 4, 9, 0),
+                     datetime(2025, 1, 7, 9, 0), datetime(2025, 1, 10, 9, 0)]
+
+
+def test_weekly_by_day_counts_occurrences_before_the_window() -> None:
+    first = datetime(2025, 1, 15, 9, 0)  # a Wednesday
+    rule = parse_rule("FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE;COUNT=5")
+
+    assert list(occurrences(first, rule, first, datetime(2026, 1, 1))) == [
+        datetime(2025, 1, 15, 9, 0), datetime(2025, 1, 27, 9, 0),
+        datetime(2025, 1, 29, 9, 0), datetime(2025, 2, 10, 9, 0),
+        datetime(2025, 2, 12, 9, 0)]
+    assert list(occurrences(first, rule, datetime(2025, 2, 11),
+                            datetime(2026, 1, 1))) == [
+        datetime(2025, 2, 12, 9, 0)]
+    assert last_occurrence(first, rule) == datetime(2025, 2, 12, 9, 0)
+
+
+def test_monthly_skips_months_without_the_day() -> None:
+    first = datetime(2025, 1, 31, 10, 0)
+
+    found = list(occurrences(first, parse_rule("FREQ=MONTHLY"), first,
+                             datetime(2025, 6, 30)))
+
+    assert [when.month for when in found] == [1, 3, 5]
+
+
+def test_yearly_on_leap_day() -> None:
+    first = datetime(2024, 2, 29, 8, 0)
+
+    found = list(occurrences(first, parse_rule("FREQ=YEARLY"), first,
+                             datetime(2033, 1, 1)))
+
+    assert [when.year for when in found] == [2024, 2028, 2032]
+
+
+def test_until_is_inclusive_and_ends_the_rule() -> None:
+    first = datetime(2025, 1, 1, 9, 0)
+    rule = parse_rule("FREQ=DAILY;UNTIL=20250103")
+
+    assert len(list(occurrences(first, rule, first,
+                                datetime(2026, 1, 1)))) == 3
+    assert last_occurrence(first, rule) == datetime(2025, 1, 3, 23, 59)
+    assert last_occurrence(first, parse_rule("FREQ=DAILY")) is None
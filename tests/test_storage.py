@@ -0,0 +1,117 @@
+from datetime import datetime
+
+import pytest
+
+from storage import open_storage
+from storage import Storage
+
+
+@pytest.fixture(params=["sqlite", "memory", "log"])
+def storage(request, tmp_path) -> Storage:
+    repo = open_storage(request.param, str(tmp_path / f"{request.param}.db"))
+    repo.init_db()
+    yield repo
+    repo.close()
+
+
+def test_tasks_come_back_in_date_order(storage) -> None:
+    storage.add_task("2025-01-17 12:00:00", "Lunch")
+    storage.add_task("2025-01-17 09:00:00", "Standup")
+    storage.add_task("2025-01-18 08:00:00", "Other day")
+
+    assert storage.tasks_for_day(datetime(2025, 1, 17)) == [
+        ("2025-01-17 09:00:00", "Standup"),
+        ("2025-01-17 12:00:00", "Lunch"),
+    ]
+    assert [task for _, task in storage.entries(
+        "2025-01-17 00:00:00", "2025-01-31 23:59:59")] == [
+        "Standup", "Lunch", "Other day"]
+    assert [task for _, _, task in storage.iter_tasks(
+        "2025-01-18 00:00:00")] == ["Other day"]
+    assert storage.task_counts("2025-01-01 00:00:00",
+                               "2025-01-31 23:59:59") == [
+        ("2025-01-17", 2), ("2025-01-18", 1)]
+
+
+def test_add_tasks_reports_exact_repeats_as_conflicts(storage) -> None:
+    storage.add_task("2025-01-17 12:00:00", "Lunch")
+
+    inserted, conflicts = storage.add_tasks([
+        ("2025-01-17 12:00:00", "Lunch"),
+        ("2025-01-17 12:00:00", "Call"),
+        ("2025-01-17 12:00:00", "Call"),
+    ])
+
+    assert inserted == 1
+    assert sorted(conflicts) == [("2025-01-17 12:00:00", "Call"),
+                                 ("2025-01-17 12:00:00", "Lunch")]
+    with pytest.raises(ValueError):
+        storage.add_tasks([], batch_size=0)
+
+
+def test_deletes_by_date_id_and_range(storage) -> None:
+    first = storage.add_task("2025-01-17 12:00:00", "Lunch")
+    storage.add_task("2025-01-18 12:00:00", "Lunch")
+    storage.add_task("2025-01-19 12:00:00", "Lunch")
+    storage.add_task("2025-02-01 12:00:00", "Lunch")
+
+    assert storage.delete_task_by_id(first) == 1
+    assert storage.delete_task_by_id(first) == 0
+    assert storage.delete_task("2025-01-18 12:00:00") == 1
+    assert storage.delete_tasks_in_range("2025-01-01 00:00:00",
+                                         "2025-01-31 23:59:59") == 1
+    assert [date for _, date, _ in storage.iter_tasks()] == [
+        "2025-02-01 12:00:00"]
+
+
+def test_search_pages_in_date_order(storage) -> None:
+    for day in range(1, 6):
+        storage.add_task(f"2025-01-0{day} 12:00:00", f"team meeting {day}")
+    storage.add_task("2025-01-03 09:00:00", "Dentist")
+
+    found = list(storage.search("meeting", limit=2, offset=1))
+    backwards = list(storage.search("meeting", end="2025-01-04 00:00:00",
+                                    limit=1, reverse=True))
+
+    assert [date for _, date, _ in found] == ["2025-01-02 12:00:00",
+                                              "2025-01-03 12:00:00"]
+    assert [task for _, _, task in backwards] == ["team meeting 3"]
+    assert list(storage.search("  ")) == []
+    with pytest.raises(ValueError):
+        list(storage.search("meeting", order="rank", reverse=True))
+
+
+def test_config_needs_every_color(storage) -> None:
+    storage.save_config({"bg_color": 1})
+    assert storage.load_config() == {}
+
+    storage.save_config({"cursor_color": 2, "task_color": 3,
+                         "task_title": 4, "calendar_color": 5,
+                         "log_level": "debug"})
+    boot = storage.bootstrap("2025-01-01 00:00:00", "2025-01-31 23:59:59")
+
+    assert boot.config == {"bg_color": 1, "cursor_color": 2,
+                           "task_color": 3, "task_title": 4,
+                           "calendar_color": 5}
+    assert boot.log_settings == {"level": "debug"}
+    assert boot.entries == []
+
+
+def test_listeners_hear_about_written_months(storage) -> None:
+    seen = []
+    storage.subscribe(seen.append)
+
+    storage.add_task("2025-01-17 12:00:00", "Lunch")
+    storage.delete_tasks_in_range("2025-01-01 00:00:00",
+                                  "2025-12-31 23:59:59")
+
+    assert [date[0:7] for date in seen[:-1]] == ["2025-01"]
+    assert seen[-1] is None
+    assert storage.poll_changes() is False
+
+
+def test_unknown_backend_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        open_storage("csv")
+    with pytest.raises(ValueError):
+        open_storage("memory", snapshot=True)
@@ -0,0 +1,38 @@
+import tracemalloc
+
+from Task import Task
+from timestamps import from_minutes
+from timestamps import to_minutes
+
+
+def allocated(build) -> int:
+    tracemalloc.start()
+    try:
+        kept = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    assert kept
+    return size
+
+
+def test_task_keeps_minutes_and_display_time() -> None:
+    task = Task(to_minutes("2025-01-17 09:05:00"), "Standup")
+
+    assert task.time == "09:05"
+    assert task.date == "2025-01-17 09:05:00"
+    assert task == Task(task.ts, "Standup")
+    assert Task(to_minutes("1969-12-31 23:59:00"), "Before").time == "23:59"
+
+
+def test_tasks_take_less_memory_than_date_string_tuples() -> None:
+    start = to_minutes("2025-01-01 00:00:00")
+    # Descriptions and timestamps come from the database rows either way,
+    # only what the cache keeps per task is measured.
+    rows = [(start + i * 7, "Standup") for i in range(5000)]
+
+    as_tuples = allocated(lambda: [(from_minutes(ts), task)
+                                   for ts, task in rows])
+    as_tasks = allocated(lambda: [Task(ts, task) for ts, task in rows])
+
+    assert as_tasks < as_tuples * 0.8
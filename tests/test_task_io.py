@@ -0,0 +1,66 @@
+import io
+
+import pytest
+
+import task_io
+
+
+def test_guess_format_from_extension() -> None:
+    assert task_io.guess_format("tasks.csv") == "csv"
+    assert task_io.guess_format("tasks.JSONL") == "jsonl"
+    assert task_io.guess_format("tasks.json") == "jsonl"
+    assert task_io.guess_format("calendar.ics") == "ics"
+    assert task_io.guess_format("-") == "csv"
+
+
+def test_read_tasks_csv_yields_line_numbers() -> None:
+    stream = io.StringIO("date,task\n"
+                         "2025-01-17 09:00,Standup\n"
+                         "2025-01-17 12:00,\"Lunch, with team\"\n")
+
+    rows = list(task_io.read_tasks(stream, "csv"))
+
+    assert rows == [
+        (2, "2025-01-17 09:00", "Standup"),
+        (3, "2025-01-17 12:00", "Lunch, with team"),
+    ]
+
+
+def test_read_tasks_csv_without_header_columns_raises() -> None:
+    stream = io.StringIO("when,what\n2025-01-17 09:00,Standup\n")
+
+    with pytest.raises(task_io.TaskFormatError):
+        list(task_io.read_tasks(stream, "csv"))
+
+
+def test_read_tasks_jsonl_skips_blank_lines() -> None:
+    stream = io.StringIO('{"date": "2025-01-17 09:00", "task": "Standup"}\n'
+                         "\n"
+                         '{"date": "2025-01-17 12:00", "task": "Lunch"}\n')
+
+    rows = list(task_io.read_tasks(stream, "jsonl"))
+
+    assert rows == [
+        (1, "2025-01-17 09:00", "Standup"),
+        (3, "2025-01-17 12:00", "Lunch"),
+    ]
+
+
+def test_read_tasks_jsonl_malformed_line_raises() -> None:
+    stream = io.StringIO('{"date": "2025-01-17 09:00"}\n')
+
+    with pytest.raises(task_io.TaskFormatError):
+        list(task_io.read_tasks(stream, "jsonl"))
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl"])
+def test_write_then_read_roundtrip(fmt) -> None:
+    rows = [(1, "2025-01-17 09:00", "Standup"), (2, "2025-01-17 12:00", "Lunch")]
+    stream = io.StringIO()
+
+    assert task_io.write_tasks(stream, iter(rows), fmt) == 2
+
+    stream.seek(0)
+    assert [(d, t) for _, d, t in task_io.read_tasks(stream, fmt)] == [
+        (d, t) for _, d, t in rows
+    ]
@@ -1,4 +1,5 @@
 import sqlite3
+import threading
 from datetime import datetime
 
 import pytest
@@ -6,6 +7,7 @@ import pytest
 from TaskRepository import TaskRepository
 from constants import DB_CONFIG_TABLE
 from constants import DB_TASK_TABLE
+from timestamps import from_minutes
 
 
 def make_repo(tmp_path) -> tuple[TaskRepository, str]:
@@ -48,12 +50,64 @@ def test_add_task_and_tasks_for_day_are_ordered(tmp_path) -> None:
     ]
 
 
-def test_add_task_duplicate_date_raises_integrity_error(tmp_path) -> None:
+def test_add_task_allows_several_tasks_in_one_slot(tmp_path) -> None:
     repo, _ = make_repo(tmp_path)
 
+    first = repo.add_task("2025-01-17 12:00:00", "Lunch")
+    second = repo.add_task("2025-01-17 12:00:00", "Call")
+
+    assert first != second
+    assert repo.tasks_for_day(datetime(2025, 1, 17)) == [
+        ("2025-01-17 12:00:00", "Call"),
+        ("2025-01-17 12:00:00", "Lunch"),
+    ]
+
+
+def test_delete_task_removes_every_task_in_the_slot(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
     repo.add_task("2025-01-17 12:00:00", "Lunch")
-    with pytest.raises(sqlite3.IntegrityError):
-        repo.add_task("2025-01-17 12:00:00", "Conflict")
+    repo.add_task("2025-01-17 12:00:00", "Call")
+
+    assert repo.delete_task("2025-01-17 12:00:00") == 2
+
+
+def test_delete_task_by_id(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+    task_id = repo.add_task("2025-01-17 12:00:00", "Lunch")
+    repo.add_task("2025-01-17 12:00:00", "Call")
+    changed: list = []
+    repo.subscribe(changed.append)
+
+    assert repo.delete_task_by_id(task_id) == 1
+    assert repo.delete_task_by_id(task_id) == 0
+    assert changed == ["2025-01-17 12:00:00"]
+    assert repo.tasks_for_day(datetime(2025, 1, 17)) == [
+        ("2025-01-17 12:00:00", "Call"),
+    ]
+
+
+def test_delete_tasks_in_range_is_inclusive(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+    repo.add_task("2025-01-16 23:59:00", "Before")
+    repo.add_task("2025-01-17 00:00:00", "First")
+    repo.add_task("2025-01-17 23:59:00", "Last")
+    repo.add_task("2025-01-18 00:00:00", "After")
+
+    assert repo.delete_tasks_in_range("2025-01-17 00:00:00",
+                                      "2025-01-17 23:59:00") == 2
+    assert [row[2] for row in repo.iter_tasks()] == ["Before", "After"]
+
+
+def test_slot_heavy_day_lookup_uses_index(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+    repo.add_tasks([("2025-01-17 09:00:00", f"Task {i}") for i in range(300)])
+
+    plan = repo._connect().execute(
+        f"EXPLAIN QUERY PLAN SELECT id, ts, task FROM {DB_TASK_TABLE} "
+        "WHERE ts BETWEEN ? AND ? ORDER BY ts ASC", (0, 1)).fetchall()
+
+    assert len(repo.tasks_for_day(datetime(2025, 1, 17))) == 300
+    assert "COVERING INDEX" in " ".join(row[-1] for row in plan)
 
 
 def test_delete_task_returns_rowcount(tmp_path) -> None:
@@ -93,3 +147,526 @@ def test_load_config_empty_when_not_all_fields_populated(tmp_path) -> None:
     repo.save_config({"bg_color": 4})
 
     assert repo.load_config() == {}
+
+
+def test_repository_reuses_one_connection_per_thread(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+
+    first = repo._connect()
+    repo.add_task("2025-01-17 12:00:00", "Lunch")
+    repo.tasks_for_day(datetime(2025, 1, 17))
+
+    assert repo._connect() is first
+    assert repo._pool == [first]
+
+
+def test_repository_hands_each_thread_its_own_connection(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+    main_con = repo._connect()
+    seen: list[sqlite3.Connection] = []
+
+    def worker() -> None:
+        seen.append(repo._connect())
+        repo.add_task("2025-01-17 12:00:00", "From thread")
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+
+    assert seen[0] is not main_con
+    assert len(repo._pool) == 2
+    assert repo.tasks_for_day(datetime(2025, 1, 17)) == [
+        ("2025-01-17 12:00:00", "From thread"),
+    ]
+
+
+def test_context_manager_closes_pool(tmp_path) -> None:
+    db_path = tmp_path / "ctx.db"
+
+    with TaskRepository(str(db_path)) as repo:
+        repo.init_db()
+        con = repo._connect()
+
+    assert repo._pool == []
+    with pytest.raises(sqlite3.ProgrammingError):
+        con.execute("SELECT 1")
+
+
+def test_repository_reconnects_after_close(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+    repo.add_task("2025-01-17 12:00:00", "Lunch")
+
+    repo.close()
+
+    assert repo.tasks_for_day(datetime(2025, 1, 17)) == [
+        ("2025-01-17 12:00:00", "Lunch"),
+    ]
+
+
+def test_add_tasks_reports_conflicts_without_aborting(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+    repo.add_task("2025-01-17 12:00:00", "Existing")
+
+    inserted, conflicts = repo.add_tasks([
+        ("2025-01-17 09:00:00", "Standup"),
+        ("2025-01-17 12:00:00", "Existing"),
+        ("2025-01-17 09:00:00", "Standup"),
+        ("2025-01-17 12:00:00", "Same slot"),
+        ("2025-01-18 08:00:00", "Other day"),
+    ], batch_size=2)
+
+    assert inserted == 3
+    assert sorted(conflicts) == [
+        ("2025-01-17 09:00:00", "Standup"),
+        ("2025-01-17 12:00:00", "Existing"),
+    ]
+    assert repo.tasks_for_day(datetime(2025, 1, 17)) == [
+        ("2025-01-17 09:00:00", "Standup"),
+        ("2025-01-17 12:00:00", "Existing"),
+        ("2025-01-17 12:00:00", "Same slot"),
+    ]
+
+
+def test_add_tasks_rolls_back_everything_on_error(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+
+    def rows():
+        yield ("2025-01-17 09:00:00", "Standup")
+        raise RuntimeError("broken input")
+
+    with pytest.raises(RuntimeError):
+        repo.add_tasks(rows(), batch_size=1)
+
+    assert repo.tasks_for_day(datetime(2025, 1, 17)) == []
+
+
+def test_add_tasks_rejects_non_positive_batch_size(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+
+    with pytest.raises(ValueError):
+        repo.add_tasks([], batch_size=0)
+
+
+def test_iter_tasks_streams_inclusive_range(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+    repo.add_tasks([
+        ("2025-01-16 23:59:00", "Before"),
+        ("2025-01-17 00:00:00", "Midnight"),
+        ("2025-01-17 23:59:00", "Last minute"),
+        ("2025-01-18 00:00:00", "After"),
+    ])
+
+    rows = repo.iter_tasks("2025-01-17 00:00:00", "2025-01-17 23:59:00")
+
+    assert next(rows)[1:] == ("2025-01-17 00:00:00", "Midnight")
+    assert [row[1:] for row in rows] == [("2025-01-17 23:59:00", "Last minute")]
+    assert len(list(repo.iter_tasks())) == 4
+
+
+def test_tasks_for_day_includes_first_and_last_minute(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+    repo.add_task("2025-01-16 23:59:00", "Day before")
+    repo.add_task("2025-01-17 00:00:00", "Midnight")
+    repo.add_task("2025-01-17 23:59:00", "Last minute")
+    repo.add_task("2025-01-18 00:00:00", "Day after")
+
+    assert repo.tasks_for_day(datetime(2025, 1, 17, 15, 30)) == [
+        ("2025-01-17 00:00:00", "Midnight"),
+        ("2025-01-17 23:59:00", "Last minute"),
+    ]
+
+
+def test_task_counts_groups_by_day(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+    repo.add_tasks([
+        ("1969-12-31 23:59:00", "Before the epoch"),
+        ("1970-01-01 00:00:00", "Epoch"),
+        ("1970-01-01 08:00:00", "Breakfast"),
+        ("1970-01-01 08:00:00", "Coffee"),
+        ("1970-01-03 12:00:00", "Lunch"),
+        ("1970-01-04 00:00:00", "Outside"),
+    ])
+
+    counts = repo.task_counts("1969-12-31 00:00:00", "1970-01-03 23:59:59")
+
+    assert counts == [("1969-12-31", 1), ("1970-01-01", 3), ("1970-01-03", 1)]
+
+
+def test_search_matches_word_prefixes_in_date_order(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+    repo.add_task("2025-03-01 09:00:00", "Team meeting")
+    repo.add_task("2025-01-17 12:00:00", "Meet Ana for lunch")
+    repo.add_task("2025-02-01 08:00:00", "Dentist")
+
+    found = [row[1:] for row in repo.search("meet")]
+    assert found == [("2025-01-17 12:00:00", "Meet Ana for lunch"),
+                     ("2025-03-01 09:00:00", "Team meeting")]
+    assert [row[2] for row in repo.search("meet", reverse=True)] == [
+        "Team meeting", "Meet Ana for lunch"]
+    assert [row[2] for row in repo.search("meet lunch")] == [
+        "Meet Ana for lunch"]
+    assert [row[2] for row in repo.search("lun*")] == ["Meet Ana for lunch"]
+    assert list(repo.search("   ")) == []
+    assert list(repo.search("*")) == []
+
+
+def test_search_pages_and_bounds(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+    repo.add_tasks([(f"2025-01-{day:02d} 10:00:00", f"standup {day}")
+                    for day in range(1, 11)])
+
+    pages = [[row[2] for row in repo.search("standup", limit=4,
+                                            offset=offset)]
+             for offset in (0, 4, 8)]
+    assert pages == [["standup 1", "standup 2", "standup 3", "standup 4"],
+                     ["standup 5", "standup 6", "standup 7", "standup 8"],
+                     ["standup 9", "standup 10"]]
+    bounded = repo.search("standup", start="2025-01-05 00:00:00",
+                          end="2025-01-06 23:59:00")
+    assert [row[2] for row in bounded] == ["standup 5", "standup 6"]
+
+
+def test_search_by_rank_puts_the_best_match_first(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+    repo.add_task("2025-01-01 10:00:00", "review the quarterly report draft")
+    repo.add_task("2025-01-02 10:00:00", "review review review")
+
+    assert next(repo.search("review", order="rank"))[2] == \
+        "review review review"
+    with pytest.raises(ValueError):
+        list(repo.search("review", order="alphabetical"))
+
+
+def test_search_treats_query_syntax_as_plain_text(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+    repo.add_task("2025-01-01 10:00:00", 'call "Bob" AND NOT (x-ray)')
+
+    assert len(list(repo.search('"Bob" AND NOT (x-ray'))) == 1
+
+
+def test_search_index_follows_deletes_and_updates(tmp_path) -> None:
+    repo, db_path = make_repo(tmp_path)
+    task_id = repo.add_task("2025-01-01 10:00:00", "Dentist")
+    repo.add_task("2025-01-02 10:00:00", "Dentist again")
+
+    repo.delete_task_by_id(task_id)
+    con = sqlite3.connect(db_path)
+    con.execute(f"UPDATE {DB_TASK_TABLE} SET task = 'Gym'")
+    con.commit()
+    con.close()
+
+    assert list(repo.search("dentist")) == []
+    assert [row[2] for row in repo.search("gym")] == ["Gym"]
+
+
+def test_add_tasks_indexes_new_rows_and_resumes_triggers(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+    repo.add_task("2025-01-01 10:00:00", "Old dentist")
+
+    repo.add_tasks([("2025-01-02 10:00:00", "New dentist"),
+                    ("2025-01-01 10:00:00", "Old dentist")])
+    repo.add_task("2025-01-03 10:00:00", "Last dentist")
+
+    assert [row[2] for row in repo.search("dentist")] == [
+        "Old dentist", "New dentist", "Last dentist"]
+    con = repo._connect()
+    con.execute("INSERT INTO tasks_fts (tasks_fts, rank) "
+                "VALUES ('integrity-check', 1)")
+    assert con.execute("SELECT deferred FROM fts_sync").fetchone() == (0,)
+
+
+def test_search_without_fts5_scans_the_table(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+    repo.add_task("2025-01-01 10:00:00", "Pay 100% of rent")
+    repo.add_task("2025-01-02 10:00:00", "Pay 1000 to the bank")
+    repo._fts = False
+
+    assert [row[2] for row in repo.search("pay 100%")] == ["Pay 100% of rent"]
+    assert [row[2] for row in repo.search("pay", reverse=True)] == [
+        "Pay 1000 to the bank", "Pay 100% of rent"]
+
+
+def test_dense_matches_walk_the_date_index(tmp_path, monkeypatch) -> None:
+    import TaskRepository as module
+    repo, _ = make_repo(tmp_path)
+    repo.add_tasks([(f"2025-01-{day:02d} 10:00:00", f"standup {day}")
+                    for day in range(10, 0, -1)])
+    sorted_plan = [row[2] for row in repo.search("standup", limit=3,
+                                                 offset=2, reverse=True)]
+
+    monkeypatch.setattr(module, "_PROBE_COST", 0)
+    assert repo._dense(repo._connect(), '"standup"', 5)
+    probe_plan = [row[2] for row in repo.search("standup", limit=3,
+                                                offset=2, reverse=True)]
+
+    assert probe_plan == sorted_plan == ["standup 8", "standup 7",
+                                         "standup 6"]
+
+
+def test_recurrence_is_stored_once_and_expanded_per_range(tmp_path) -> None:
+    repo, db_path = make_repo(tmp_path)
+    changes = []
+    repo.subscribe(changes.append)
+
+    rule_id = repo.add_recurrence("2025-01-06 09:00:00", "Standup",
+                                  "freq=weekly;byday=mo,we")
+
+    assert changes == [None]
+    assert list(repo.iter_recurrences()) == [
+        (rule_id, "2025-01-06 09:00:00", "Standup",
+         "FREQ=WEEKLY;BYDAY=MO,WE")]
+    assert repo.occurrences("2025-03-01 00:00:00", "2025-03-07 23:59:00") == [
+        (rule_id, "2025-03-03 09:00:00", "Standup"),
+        (rule_id, "2025-03-05 09:00:00", "Standup"),
+    ]
+    con = sqlite3.connect(db_path)
+    try:
+        assert con.execute("SELECT count(*) FROM recurrences").fetchone() \
+            == (1,)
+    finally:
+        con.close()
+
+
+def test_occurrences_skip_rules_outside_the_range(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+    repo.add_recurrence("2025-01-01 08:00:00", "Ended", "FREQ=DAILY;COUNT=3")
+    later = repo.add_recurrence("2025-02-01 08:00:00", "Later", "FREQ=DAILY")
+
+    assert repo.occurrences("2025-01-10 00:00:00", "2025-01-31 23:59:00") \
+        == []
+    assert repo.occurrences("2025-01-31 00:00:00", "2025-02-01 23:59:00") \
+        == [(later, "2025-02-01 08:00:00", "Later")]
+
+
+def test_exceptions_cancel_move_and_rename_occurrences(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+    rule_id = repo.add_recurrence("2025-01-01 09:00:00", "Standup",
+                                  "FREQ=DAILY")
+
+    assert repo.add_exception(rule_id, "2025-01-02 09:00:00") == 1
+    assert repo.add_exception(rule_id, "2025-01-03 09:00:00",
+                              new_date="2025-01-05 18:00:00") == 1
+    assert repo.add_exception(rule_id, "2025-01-04 09:00:00",
+                              new_task="Retro") == 1
+    assert repo.add_exception(rule_id, "2025-01-04 10:00:00") == 0
+    assert repo.add_exception(rule_id + 1, "2025-01-04 09:00:00") == 0
+
+    assert [row[1:] for row in repo.occurrences(
+        "2025-01-01 00:00:00", "2025-01-05 23:59:00")] == [
+        ("2025-01-01 09:00:00", "Standup"),
+        ("2025-01-04 09:00:00", "Retro"),
+        ("2025-01-05 09:00:00", "Standup"),
+        ("2025-01-05 18:00:00", "Standup"),
+    ]
+    # A moved occurrence shows up at its new date even when the original
+    # date is outside the range.
+    assert [row[1] for row in repo.occurrences(
+        "2025-01-05 12:00:00", "2025-01-05 23:59:00")] == [
+        "2025-01-05 18:00:00"]
+
+    assert repo.delete_recurrence(rule_id) == 1
+    assert repo.occurrences("2025-01-01 00:00:00",
+                            "2025-01-05 23:59:00") == []
+    assert repo.delete_recurrence(rule_id) == 0
+
+
+def test_import_events_is_idempotent_by_uid(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+    changes = []
+    repo.subscribe(changes.append)
+    events = [
+        ("lunch@x", "2025-01-07 12:00:00", "Lunch", None, (), None),
+        ("standup@x", "2025-01-06 09:00:00", "Standup", "FREQ=DAILY",
+         ("2025-01-07 09:00:00",), None),
+        ("standup@x", "2025-01-08 10:00:00", "Late", None, (),
+         "2025-01-08 09:00:00"),
+        ("orphan@x", "2025-01-08 10:00:00", "Late", None, (),
+         "2025-01-08 09:00:00"),
+    ]
+
+    assert repo.import_events(events) == 3
+    assert repo.import_events(events) == 0
+
+    assert changes == [None]
+    assert [row[1:] for row in repo.occurrences(
+        "2025-01-06 00:00:00", "2025-01-08 23:59:00")] == [
+        ("2025-01-06 09:00:00", "Standup"),
+        ("2025-01-08 10:00:00", "Late"),
+    ]
+    assert [row[2] for row in repo.search("lunch")] == ["Lunch"]
+    assert list(repo.iter_calendar()) == events[:3]
+
+
+def test_import_checkpoint_is_saved_with_the_batch(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+    event = ("lunch@x", "2025-01-07 12:00:00", "Lunch", None, (), None)
+
+    repo.import_events([event], ("/tmp/cal.ics", 100, 7, 42))
+
+    assert repo.import_offset("/tmp/cal.ics", 100, 7) == 42
+    assert repo.import_offset("/tmp/cal.ics", 101, 7) == 0
+    repo.finish_import("/tmp/cal.ics")
+    assert repo.import_offset("/tmp/cal.ics", 100, 7) == 0
+
+
+def test_iter_calendar_gives_local_tasks_a_uid(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+    task_id = repo.add_task("2025-01-07 12:00:00", "Lunch")
+    rule_id = repo.add_recurrence("2025-01-06 09:00:00", "Standup",
+                                  "FREQ=WEEKLY")
+    repo.add_exception(rule_id, "2025-01-13 09:00:00")
+
+    assert list(repo.iter_calendar("2025-01-07 00:00:00",
+                                   "2025-01-31 23:59:00")) == [
+        (f"task-{task_id}@cli_calender", "2025-01-07 12:00:00", "Lunch",
+         None, (), None),
+        (f"rule-{rule_id}@cli_calender", "2025-01-06 09:00:00", "Standup",
+         "FREQ=WEEKLY", ("2025-01-13 09:00:00",), None),
+    ]
+
+
+def test_poll_changes_reports_months_written_by_other_processes(
+        tmp_path) -> None:
+    repo, db_path = make_repo(tmp_path)
+    changed: list = []
+    repo.subscribe(changed.append)
+    repo.watch()
+    other = TaskRepository(db_path)
+    assert repo.poll_changes() is False
+
+    other.add_task("2025-03-02 09:00:00", "Dentist")
+    other.add_tasks([("2025-03-09 10:00", "Gym"), ("2025-04-01 10:00", "Rent")])
+    assert repo.poll_changes() is True
+    assert changed == ["2025-03-01 00:00:00", "2025-04-01 00:00:00"]
+    assert repo.poll_changes() is False
+
+    other.delete_tasks_in_range("2025-03-01 00:00", "2025-03-31 23:59")
+    changed.clear()
+    assert repo.poll_changes() is True
+    assert changed == [None]
+
+    # Writes through the same connection are announced when they are made.
+    repo.add_task("2025-05-01 12:00:00", "Own write")
+    assert repo.poll_changes() is False
+    other.close()
+
+
+def test_poll_changes_reloads_everything_after_unlogged_writes(
+        tmp_path) -> None:
+    repo, db_path = make_repo(tmp_path)
+    changed: list = []
+    repo.subscribe(changed.append)
+    repo.watch()
+
+    con = sqlite3.connect(db_path)
+    con.execute(f"INSERT INTO {DB_TASK_TABLE} (ts, task) VALUES (0, 'x')")
+    con.commit()
+    con.close()
+
+    assert repo.poll_changes() is True
+    assert changed == [None]
+
+
+def test_bootstrap_reads_config_and_range_in_one_transaction(tmp_path) -> None:
+    repo, db_path = make_repo(tmp_path)
+    repo.save_config({"bg_color": 1, "task_color": 2, "task_title": 3,
+                      "calendar_color": 4, "cursor_color": 5,
+                      "log_level": "debug"})
+    repo.add_task("2025-01-17 12:00:00", "Lunch")
+    repo.add_task("2025-03-01 12:00:00", "Outside")
+    repo.add_recurrence("2025-01-06 09:00:00", "Standup", "FREQ=WEEKLY")
+    repo.close()
+
+    fresh = TaskRepository(db_path)
+    statements: list[str] = []
+    fresh._connect().set_trace_callback(statements.append)
+    boot = fresh.bootstrap("2025-01-01 00:00:00", "2025-01-31 23:59:59")
+
+    assert boot.config["cursor_color"] == 5
+    assert boot.log_settings == {"level": "debug"}
+    assert [task for _, task in boot.entries] == [
+        "Standup", "Standup", "Lunch", "Standup", "Standup"]
+    assert statements[0] == "BEGIN" and statements[-1] == "COMMIT"
+    assert statements.count("BEGIN") == 1
+    assert not any(s.startswith("CREATE") for s in statements)
+    assert fresh.poll_changes() is False
+
+
+def test_bootstrap_migrates_a_new_database(tmp_path) -> None:
+    repo = TaskRepository(str(tmp_path / "new.db"))
+
+    boot = repo.bootstrap("2025-01-01 00:00:00", "2025-01-31 23:59:59")
+
+    assert boot == ({}, {}, [])
+    repo.add_task("2025-01-17 12:00:00", "Lunch")
+
+
+def test_entries_merge_tasks_and_occurrences_by_minute(tmp_path) -> None:
+    repo, _ = make_repo(tmp_path)
+    repo.add_task("2025-01-13 09:00:00", "Same minute")
+    repo.add_task("2025-01-13 12:00:00", "Lunch")
+    repo.add_recurrence("2025-01-06 09:00:00", "Standup", "FREQ=WEEKLY")
+
+    entries = repo.entries("2025-01-13 00:00:00", "2025-01-13 23:59:59")
+
+    assert [(from_minutes(ts), task) for ts, task in entries] == [
+        ("2025-01-13 09:00:00", "Same minute"),
+        ("2025-01-13 09:00:00", "Standup"),
+        ("2025-01-13 12:00:00", "Lunch"),
+    ]
+
+
+def test_snapshot_reads_an_in_memory_copy(tmp_path) -> None:
+    repo, db_path = make_repo(tmp_path)
+    repo.add_task("2025-01-17 12:00:00", "Lunch")
+    repo.close()
+
+    # The copy is taken by the first query.
+    snapshot = TaskRepository(db_path, snapshot=True)
+    snapshot.load_config()
+    repo = TaskRepository(db_path)
+    repo.add_task("2025-01-17 13:00:00", "After the copy")
+
+    assert snapshot.tasks_for_day(datetime(2025, 1, 17)) == [
+        ("2025-01-17 12:00:00", "Lunch"),
+    ]
+    with pytest.raises(sqlite3.OperationalError, match="readonly"):
+        snapshot.add_task("2025-01-18 12:00:00", "Dinner")
+    assert len(repo.tasks_for_day(datetime(2025, 1, 17))) == 2
+
+
+def test_snapshot_is_shared_between_threads(tmp_path) -> None:
+    repo, db_path = make_repo(tmp_path)
+    repo.add_task("2025-01-17 12:00:00", "Lunch")
+    snapshot = TaskRepository(db_path, snapshot=True)
+    snapshot.tasks_for_day(datetime(2025, 1, 17))
+    repo.delete_task("2025-01-17 12:00:00")
+    seen = []
+
+    thread = threading.Thread(target=lambda: seen.extend(
+        snapshot.tasks_for_day(datetime(2025, 1, 17))))
+    thread.start()
+    thread.join()
+
+    assert seen == [("2025-01-17 12:00:00", "Lunch")]
+
+
+def test_snapshot_migrates_the_copy_not_the_file(tmp_path) -> None:
+    db_path = str(tmp_path / "old.db")
+    con = sqlite3.connect(db_path)
+    con.execute(f"CREATE TABLE {DB_TASK_TABLE} ("
+                " date TEXT UNIQUE NOT NULL, task TEXT NOT NULL)")
+    con.execute(f"INSERT INTO {DB_TASK_TABLE} VALUES"
+                " ('2025-01-17 12:00:00', 'Lunch')")
+    con.commit()
+    con.close()
+
+    snapshot = TaskRepository(db_path, snapshot=True)
+    boot = snapshot.bootstrap("2025-01-01 00:00:00", "2025-01-31 23:59:59")
+
+    assert [task for _, task in boot.entries] == ["Lunch"]
+    con = sqlite3.connect(db_path)
+    try:
+        assert con.execute("PRAGMA user_version").fetchone() == (0,)
+    finally:
+        con.close()
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+import pytest
+
+from timestamps import add_months
+from timestamps import day_range
+from timestamps import days_in_month
+from timestamps import from_minutes
+from timestamps import to_minutes
+
+
+def test_minutes_roundtrip() -> None:
+    ts = to_minutes("2025-01-17 12:34:00")
+
+    assert from_minutes(ts) == "2025-01-17 12:34:00"
+    assert to_minutes(datetime(2025, 1, 17, 12, 34)) == ts
+
+
+def test_epoch_and_negative_minutes() -> None:
+    assert to_minutes("1970-01-01 00:01:00") == 1
+    assert from_minutes(-1) == "1969-12-31 23:59:00"
+
+
+def test_day_range_covers_every_minute_of_the_day() -> None:
+    start, end = day_range(datetime(2025, 1, 17, 18, 45))
+
+    assert from_minutes(start) == "2025-01-17 00:00:00"
+    assert from_minutes(end) == "2025-01-17 23:59:00"
+
+
+@pytest.mark.parametrize("start, months, expected", [
+    (datetime(2024, 1, 31), 1, datetime(2024, 2, 29)),
+    (datetime(2023, 1, 31), 1, datetime(2023, 2, 28)),
+    (datetime(2024, 1, 15), -1, datetime(2023, 12, 15)),
+    (datetime(2024, 12, 15, 10, 30), 1, datetime(2025, 1, 15, 10, 30)),
+    (datetime(2024, 3, 31), -13, datetime(2023, 2, 28)),
+    (datetime(2024, 2, 29), 12, datetime(2025, 2, 28)),
+])
+def test_add_months_clamps_to_end_of_month(start, months, expected) -> None:
+    assert add_months(start, months) == expected
+
+
+def test_days_in_month() -> None:
+    assert days_in_month(2024, 2) == 29
+    assert days_in_month(2023, 2) == 28
+    assert days_in_month(2024, 12) == 31
@@ -0,0 +1,136 @@
+from collections import ChainMap
+from datetime import datetime
+
+from constants import DEFAULT_CONFIG
+from TaskRepository import TaskRepository
+from YearView import YearView
+
+CONFIG = ChainMap({"task_color": 2, "cursor_color": 1}, DEFAULT_CONFIG)
+
+
+class FakeCurses:
+    A_STANDOUT = 256
+    A_BOLD = 512
+    A_UNDERLINE = 1024
+    A_REVERSE = 2048
+
+    def color_pair(self, value: int) -> int:
+        return value
+
+
+class FakeStdScr:
+    def __init__(self, size: tuple[int, int] = (40, 120)) -> None:
+        self.size = size
+        self.writes: list[tuple] = []
+        self.erased = 0
+
+    def getmaxyx(self) -> tuple[int, int]:
+        return self.size
+
+    def erase(self) -> None:
+        self.erased += 1
+
+    def addstr(self, *args) -> None:
+        self.writes.append(args)
+
+    def noutrefresh(self) -> None:
+        pass
+
+
+class CountingRepo(TaskRepository):
+    def __init__(self, db_path: str) -> None:
+        super().__init__(db_path)
+        self.count_queries = 0
+
+    def task_counts(self, start, end):
+        self.count_queries += 1
+        return super().task_counts(start, end)
+
+
+def make_view(tmp_path) -> tuple[YearView, CountingRepo]:
+    repo = CountingRepo(str(tmp_path / "year.db"))
+    repo.init_db()
+    return YearView(repo, FakeCurses()), repo
+
+
+def test_counts_come_from_one_query_per_year(tmp_path) -> None:
+    view, repo = make_view(tmp_path)
+    repo.add_tasks([
+        ("2024-01-15 09:00:00", "Standup"),
+        ("2024-01-15 12:00:00", "Lunch"),
+        ("2024-12-31 23:59:00", "Last minute"),
+        ("2025-01-01 00:00:00", "Next year"),
+    ])
+
+    assert view.counts(2024) == {(1, 15): 2, (12, 31): 1}
+    view.counts(2025)
+    view.counts(2024)
+
+    assert repo.count_queries == 2
+
+
+def test_counts_include_recurring_tasks(tmp_path) -> None:
+    view, repo = make_view(tmp_path)
+    repo.add_task("2024-01-31 09:00:00", "Standup")
+    repo.add_recurrence("2023-12-31 10:00:00", "Report", "FREQ=MONTHLY")
+
+    assert view.counts(2024) == {(1, 31): 2, (3, 31): 1, (5, 31): 1,
+                                 (7, 31): 1, (8, 31): 1, (10, 31): 1,
+                                 (12, 31): 1}
+
+
+def test_changes_invalidate_the_year_they_touch(tmp_path) -> None:
+    view, repo = make_view(tmp_path)
+    view.counts(2024)
+    view.counts(2025)
+
+    repo.add_task("2024-03-01 10:00:00", "Dentist")
+
+    assert view.counts(2025) == {}
+    assert view.counts(2024) == {(3, 1): 1}
+    assert repo.count_queries == 3
+
+
+def test_days_are_shaded_by_task_count(tmp_path) -> None:
+    view, _ = make_view(tmp_path)
+
+    assert view.shade(0, CONFIG) == 0
+    assert view.shade(1, CONFIG) == 2
+    assert view.shade(3, CONFIG) == 2 | FakeCurses.A_BOLD
+    assert view.shade(100, CONFIG) == (2 | FakeCurses.A_BOLD
+                                       | FakeCurses.A_UNDERLINE
+                                       | FakeCurses.A_REVERSE)
+
+
+def test_draw_paints_every_day_once_then_only_the_cursor(tmp_path) -> None:
+    view, repo = make_view(tmp_path)
+    repo.add_task("2024-02-29 10:00:00", "Leap day")
+    stdscr = FakeStdScr()
+
+    view.draw(stdscr, datetime(2024, 1, 15), CONFIG)
+
+    days = [w for w in stdscr.writes
+            if len(w[2]) == 2 and w[2].strip().isdigit()]
+    assert len(days) == 366 + 1  # every day plus the cursor
+    leap_day = view.cell(2024, 2, 29, 120)
+    assert (*leap_day, "29", 2) in days
+
+    stdscr.writes.clear()
+    view.draw(stdscr, datetime(2024, 1, 16), CONFIG)
+
+    assert stdscr.erased == 1
+    assert stdscr.writes == [
+        (*view.cell(2024, 1, 15, 120), "15", 0),
+        (*view.cell(2024, 1, 16, 120), "16", 1 | FakeCurses.A_STANDOUT),
+    ]
+
+
+def test_small_terminals_skip_months_that_do_not_fit(tmp_path) -> None:
+    view, _ = make_view(tmp_path)
+    stdscr = FakeStdScr(size=(24, 80))
+
+    view.draw(stdscr, datetime(2024, 1, 15), CONFIG)
+
+    assert view.columns(80) == 3
+    assert all(y < 24 and x + len(text) <= 80
+               for y, x, text, *_ in stdscr.writes)